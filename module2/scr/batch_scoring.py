@@ -0,0 +1,301 @@
+
+"""
+Punto de entrada del scoring por lotes de base de datos a base de datos.
+
+Este módulo recalcula el alquiler predicho para todos los apartamentos de
+la tabla `RentApartments` y lo escribe en la tabla `RentPredictions`:
+- Las filas se leen en bloques ordenados por `(address, rowid)` mediante
+  paginación por clave (`(address, rowid) > última_clave`). `address` no
+  es única en la tabla de origen: el `rowid` desempata las direcciones
+  repetidas para que ningún bloque corte y pierda parte de una racha.
+- Cada bloque se preprocesa y se puntúa de forma vectorizada
+  (`ModelService.predict_records`) en un pool de procesos, con un número
+  acotado de bloques en vuelo.
+- Las predicciones se escriben en orden, con upserts por lotes dentro de
+  una transacción por bloque; de cada dirección se conserva una única
+  predicción, la de su última fila.
+- Tras cada bloque escrito se guarda un checkpoint con la última clave, de
+  modo que un job interrumpido continúa donde lo dejó.
+
+Uso típico:
+    >>> python batch_scoring.py --workers 4 --chunksize 50000
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sqlalchemy import and_, insert, literal_column, or_, select
+
+from config import db_settings, get_engine, model_settings
+from db.db_model import RentApartments, RentPredictions
+from model.instrumentation import profiling
+from model.model_service import ModelService
+from model.pipeline.collection import PIPELINE_COLUMNS
+from model.pipeline.resources import available_cpus
+
+ROW_KEY = 'rowid'
+
+_worker_service: ModelService | None = None
+
+
+def _init_worker(model_name: str) -> None:
+    """Carga el modelo una única vez en cada proceso del pool."""
+    global _worker_service
+    # El pool ya reparte el trabajo entre procesos: cada uno predice en un solo hilo.
+    model_settings.inference_workers = 1
+    _worker_service = ModelService()
+    _worker_service.load_model(model_name=model_name)
+
+
+def _score_chunk(records: pd.DataFrame) -> np.ndarray:
+    """Puntúa un bloque de registros crudos en un proceso del pool."""
+    return _worker_service.predict_records(records)
+
+
+def _fetch_chunk(last_key: tuple[str, int] | None, chunksize: int) -> pd.DataFrame:
+    """
+    Lee el siguiente bloque de apartamentos ordenado por `(address, rowid)`.
+
+    Parameters
+    ----------
+    last_key : tuple[str, int] | None
+        Dirección y `rowid` de la última fila ya leída; `None` para empezar
+        por el principio.
+    chunksize : int
+        Número máximo de filas del bloque.
+
+    Returns
+    -------
+    pd.DataFrame
+        Bloque con `address`, `rowid` y las columnas crudas del pipeline.
+    """
+    columns = [name for name in PIPELINE_COLUMNS if name != 'rent']
+    row_key = literal_column(ROW_KEY)
+    query = (
+        select(
+            RentApartments.address,
+            row_key.label(ROW_KEY),
+            *(getattr(RentApartments, name) for name in columns),
+        )
+        .order_by(RentApartments.address, row_key)
+        .limit(chunksize)
+    )
+    if last_key is not None:
+        address, row = last_key
+        query = query.where(or_(
+            RentApartments.address > address,
+            and_(RentApartments.address == address, row_key > row),
+        ))
+    with get_engine().connect() as connection:
+        return pd.read_sql(query, connection)
+
+
+def _write_predictions(
+        addresses: pd.Series,
+        predictions: np.ndarray,
+        model_hash: str,
+        batch_size: int,
+    ) -> None:
+    """
+    Escribe las predicciones con upserts por lotes en una transacción.
+
+    La tabla de origen puede repetir direcciones; como `address` es la
+    clave de `RentPredictions`, se conserva una predicción por dirección
+    (la de la última fila leída).
+
+    Parameters
+    ----------
+    addresses : pd.Series
+        Dirección de cada predicción.
+    predictions : np.ndarray
+        Alquiler predicho para cada dirección.
+    model_hash : str
+        Hash del modelo que generó las predicciones.
+    batch_size : int
+        Filas por sentencia `INSERT ... VALUES`.
+    """
+    scored_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    latest = dict(zip(addresses, predictions.tolist()))
+    rows = [
+        {
+            'address': address,
+            'predicted_rent': prediction,
+            'model_hash': model_hash,
+            'scored_at': scored_at,
+        }
+        for address, prediction in latest.items()
+    ]
+    with get_engine().begin() as connection:
+        for start in range(0, len(rows), batch_size):
+            connection.execute(_upsert_statement(rows[start:start + batch_size]))
+
+
+def _upsert_statement(rows: list[dict]):
+    """
+    Construye un `INSERT ... VALUES` multi-fila que actualiza por `address`.
+
+    Se usa `ON CONFLICT DO UPDATE` en SQLite y PostgreSQL; en otros motores
+    se emite un `INSERT` simple.
+    """
+    dialect = get_engine().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(RentPredictions).values(rows)
+
+    statement = dialect_insert(RentPredictions).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[RentPredictions.address],
+        set_={
+            column: statement.excluded[column]
+            for column in ('predicted_rent', 'model_hash', 'scored_at')
+        },
+    )
+
+
+def _read_checkpoint(path: Path, model_hash: str) -> tuple[tuple[str, int] | None, int]:
+    """
+    Devuelve la última clave `(address, rowid)` escrita y las filas ya puntuadas.
+
+    El checkpoint se ignora si fue generado con otro modelo o si guarda
+    solo la dirección (formato anterior, que no identifica una fila).
+    """
+    if not path.exists():
+        return None, 0
+    state = json.loads(path.read_text())
+    if state.get('model_hash') != model_hash:
+        logger.warning(f'Ignoring checkpoint {path}: it was written by another model')
+        return None, 0
+    if not isinstance(state.get('last_key'), list):
+        logger.warning(f'Ignoring checkpoint {path}: it does not record the last rowid')
+        return None, 0
+    address, row = state['last_key']
+    logger.info(f'Resuming batch scoring after address {address!r} (rowid {row})')
+    return (address, row), state['rows']
+
+
+def _write_checkpoint(path: Path, last_key: tuple[str, int], rows: int, model_hash: str) -> None:
+    """Guarda de forma atómica la última clave `(address, rowid)` escrita."""
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(json.dumps({'last_key': list(last_key), 'rows': rows, 'model_hash': model_hash}))
+    os.replace(tmp_path, path)
+
+
+def run_batch_scoring(
+        chunksize: int,
+        workers: int,
+        insert_batch_size: int,
+        checkpoint_path: Path,
+        restart: bool = False,
+    ) -> int:
+    """
+    Puntúa toda la tabla de apartamentos y escribe las predicciones.
+
+    Parameters
+    ----------
+    chunksize : int
+        Filas leídas y puntuadas por bloque.
+    workers : int
+        Procesos que puntúan bloques en paralelo.
+    insert_batch_size : int
+        Filas por sentencia de inserción.
+    checkpoint_path : Path
+        Archivo de checkpoint para reanudar el job.
+    restart : bool, default=False
+        Si es `True` se ignora el checkpoint y se puntúa desde el principio.
+
+    Returns
+    -------
+    int
+        Número total de filas puntuadas (incluidas las de ejecuciones
+        anteriores reanudadas).
+    """
+    ml_svc = ModelService()
+    ml_svc.load_model(model_name=model_settings.model_name)
+    RentPredictions.__table__.create(get_engine(), checkfirst=True)
+
+    if restart:
+        checkpoint_path.unlink(missing_ok=True)
+    last_key, total_rows = _read_checkpoint(checkpoint_path, ml_svc.model_hash)
+
+    logger.info(
+        f'Batch scoring {db_settings.rent_apartment_table_name} into '
+        f'{db_settings.rent_prediction_table_name} with {workers} workers'
+    )
+    start = time.perf_counter()
+    scored_rows = 0
+    in_flight: deque[tuple[pd.Series, tuple[str, int], Future]] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(model_settings.model_name,),
+    ) as pool:
+        exhausted = False
+        while not exhausted or in_flight:
+            while not exhausted and len(in_flight) < 2 * workers:
+                chunk = _fetch_chunk(last_key, chunksize)
+                if chunk.empty:
+                    exhausted = True
+                    break
+                last_key = (chunk['address'].iloc[-1], int(chunk[ROW_KEY].iloc[-1]))
+                future = pool.submit(_score_chunk, chunk.drop(columns=ROW_KEY))
+                in_flight.append((chunk['address'], last_key, future))
+
+            if not in_flight:
+                break
+            addresses, chunk_key, future = in_flight.popleft()
+            _write_predictions(addresses, future.result(), ml_svc.model_hash, insert_batch_size)
+
+            scored_rows += len(addresses)
+            total_rows += len(addresses)
+            _write_checkpoint(checkpoint_path, chunk_key, total_rows, ml_svc.model_hash)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f'Scored {total_rows} rows up to {chunk_key[0]!r} '
+                f'({scored_rows / elapsed:,.0f} rows/s)'
+            )
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f'Batch scoring finished: {scored_rows} rows in {elapsed:.1f}s '
+        f'({scored_rows / max(elapsed, 1e-9):,.0f} rows/s)'
+    )
+    checkpoint_path.unlink(missing_ok=True)
+    return total_rows
+
+
+@logger.catch
+def main() -> None:
+    """Interpreta los argumentos de línea de comandos y lanza el scoring."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--chunksize', type=int, default=db_settings.db_chunksize)
+    parser.add_argument('--workers', type=int, default=max(1, available_cpus() - 1))
+    parser.add_argument('--insert-batch-size', type=int, default=500)
+    parser.add_argument('--checkpoint', type=Path, default=Path('db/batch_scoring.checkpoint.json'))
+    parser.add_argument('--restart', action='store_true')
+    args = parser.parse_args()
+
+    logger.info('running the batch scoring job...')
+    with profiling('batch_scoring'):
+        run_batch_scoring(
+            chunksize=args.chunksize,
+            workers=args.workers,
+            insert_batch_size=args.insert_batch_size,
+            checkpoint_path=args.checkpoint,
+            restart=args.restart,
+        )
+
+
+if __name__ == "__main__":
+    main()
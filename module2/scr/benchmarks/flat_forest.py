@@ -0,0 +1,72 @@
+"""
+Benchmark del motor `FlatForest` frente a `RandomForestRegressor.predict`.
+
+Entrena un bosque sintético con la forma del peor caso de la búsqueda de
+hiperparámetros (300 árboles de profundidad 12 sobre las 9 features del
+modelo), lo aplana con `export_flat_forest` y compara latencia y
+throughput de ambos motores para lotes de 1, 64 y 10.000 filas,
+verificando además que las predicciones coinciden.
+
+Uso típico:
+    >>> python -m benchmarks.flat_forest --n-estimators 300 --max-depth 12
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from model.pipeline.model import export_flat_forest
+from model.schema import FEATURE_NAMES
+
+
+def _time_call(func, X: np.ndarray, repeat: int) -> float:
+    """Devuelve el mejor tiempo, en segundos, de `repeat` llamadas."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Ejecuta el benchmark e imprime una tabla con los resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n-estimators', type=int, default=300)
+    parser.add_argument('--max-depth', type=int, default=12)
+    parser.add_argument('--train-rows', type=int, default=20_000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 10_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    n_features = len(FEATURE_NAMES)
+    X_train = rng.normal(size=(args.train_rows, n_features)).astype(np.float32)
+    y_train = X_train @ rng.normal(size=n_features) + rng.normal(size=args.train_rows)
+
+    model = RandomForestRegressor(
+        n_estimators=args.n_estimators,
+        max_depth=args.max_depth,
+        n_jobs=-1,
+        random_state=42,
+    ).fit(X_train, y_train)
+    model.set_params(n_jobs=None)
+    flat = export_flat_forest(model)
+    print(f'{flat.n_trees} trees, {flat.n_nodes} nodes, max depth {flat.max_depth}')
+
+    print(f'{"batch":>8} {"sklearn ms":>12} {"flat ms":>10} {"speedup":>8} {"flat rows/s":>12} {"max abs diff":>13}')
+    for batch_size in args.batch_sizes:
+        X = rng.normal(size=(batch_size, n_features)).astype(np.float32)
+        diff = np.abs(model.predict(X) - flat.predict(X)).max()
+        sklearn_s = _time_call(model.predict, X, args.repeat)
+        flat_s = _time_call(flat.predict, X, args.repeat)
+        print(
+            f'{batch_size:>8} {sklearn_s * 1e3:>12.3f} {flat_s * 1e3:>10.3f} '
+            f'{sklearn_s / flat_s:>7.1f}x {batch_size / flat_s:>12.0f} {diff:>13.2e}'
+        )
+
+
+if __name__ == '__main__':
+    main()
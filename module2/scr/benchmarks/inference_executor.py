@@ -0,0 +1,86 @@
+"""
+Benchmark del ejecutor de inferencia en paralelo (`model.inference`).
+
+Entrena un bosque sintético, y para varios tamaños de lote compara la
+latencia de evaluarlo en el hilo que llama con la de repartirlo entre los
+hilos del pool por filas y por árboles, con los dos motores de inferencia.
+Indica para cada motor el menor tamaño de lote a partir del cual repartir
+compensa, que es el valor recomendado para
+`model_settings.inference_parallel_min_rows` en esta máquina.
+
+Uso típico:
+    >>> python -m benchmarks.inference_executor --workers 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+from model.inference import InferenceExecutor
+from model.pipeline.model import export_flat_forest
+from model.pipeline.resources import available_cpus
+from model.schema import FEATURE_NAMES
+
+
+def _best_time(func, X: np.ndarray, repeat: int) -> float:
+    """Devuelve el mejor tiempo, en segundos, de `repeat` llamadas."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    """Ejecuta el benchmark e imprime una tabla con los resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=available_cpus())
+    parser.add_argument('--n-estimators', type=int, default=300)
+    parser.add_argument('--max-depth', type=int, default=12)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[64, 512, 2048, 8192, 32768])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    n_features = len(FEATURE_NAMES)
+    X_train = rng.normal(size=(20_000, n_features)).astype(np.float32)
+    y_train = X_train @ rng.normal(size=n_features) + rng.normal(size=len(X_train))
+    forest = RandomForestRegressor(
+        n_estimators=args.n_estimators, max_depth=args.max_depth, n_jobs=-1, random_state=42,
+    ).fit(X_train, y_train)
+    InferenceExecutor.prepare(forest)
+    models = {'sklearn': forest, 'flat': export_flat_forest(forest)}
+
+    executors = {
+        split: InferenceExecutor(args.workers, min_rows=1, split=split)
+        for split in ('rows', 'trees')
+    }
+    print(f'{args.workers} workers, {args.n_estimators} trees of depth {args.max_depth}')
+    print(f'{"engine":>8} {"batch":>7} {"serial ms":>10} {"rows ms":>9} {"trees ms":>9} {"best speedup":>13}')
+    for engine, model in models.items():
+        crossover = None
+        for batch_size in args.batch_sizes:
+            X = rng.normal(size=(batch_size, n_features)).astype(np.float32)
+            serial = _best_time(model.predict, X, args.repeat)
+            parallel = {
+                split: _best_time(lambda X: executor.predict(model, X), X, args.repeat)
+                for split, executor in executors.items()
+            }
+            speedup = serial / min(parallel.values())
+            if crossover is None and speedup > 1.1:
+                crossover = batch_size
+            print(
+                f'{engine:>8} {batch_size:>7} {serial * 1e3:>10.2f} {parallel["rows"] * 1e3:>9.2f} '
+                f'{parallel["trees"] * 1e3:>9.2f} {speedup:>12.2f}x'
+            )
+        print(f'{"":>8} suggested inference_parallel_min_rows: {crossover or "none (keep serial)"}')
+
+    for executor in executors.values():
+        executor.shutdown()
+
+
+if __name__ == '__main__':
+    main()
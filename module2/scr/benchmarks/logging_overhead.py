@@ -0,0 +1,102 @@
+"""
+Benchmark del coste del logging sobre el throughput de predicción.
+
+Publica en un `ModelService` un bosque sintético pequeño (para que el
+coste del modelo no oculte el del logging) y mide las predicciones de una
+fila por segundo con distintas configuraciones del sink de loguru:
+- `off`: sin sinks, el coste mínimo de una llamada a `logger.info`.
+- `sync`: escritura síncrona en archivo (la configuración original).
+- `enqueue`: escritura desde un hilo en segundo plano.
+- `enqueue+json`: ídem, con salida JSON estructurada.
+- `enqueue+sampled`: ídem, escribiendo el 1 % de los mensajes por petición.
+- `sync+rate-limited`: escritura síncrona limitada a 100 mensajes por
+  petición por segundo.
+
+Cada configuración escribe en un directorio temporal; el tiempo de vaciar
+la cola al terminar se muestra aparte, ya que no lo paga la petición.
+
+Uso típico:
+    >>> python -m benchmarks.logging_overhead --calls 20000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from sklearn.ensemble import RandomForestRegressor
+
+from config.logger import LoggerSettings, configure_logging
+from model.model_service import LoadedModel, ModelService
+from model.pipeline.model import export_flat_forest
+from model.preprocessing import RentPreprocessor
+from model.schema import FEATURE_NAMES
+
+_CONFIGURATIONS = {
+    'off': None,
+    'sync': {'log_enqueue': False},
+    'enqueue': {'log_enqueue': True},
+    'enqueue+json': {'log_enqueue': True, 'log_serialize': True},
+    'enqueue+sampled': {'log_enqueue': True, 'log_request_sample_rate': 0.01},
+    'sync+rate-limited': {'log_enqueue': False, 'log_request_rate_limit': 100},
+}
+
+
+def _build_service(n_estimators: int) -> ModelService:
+    """Publica en un `ModelService` un bosque aplanado entrenado con datos sintéticos."""
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(2_000, len(FEATURE_NAMES))).astype(np.float32)
+    y = X @ rng.normal(size=len(FEATURE_NAMES))
+    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=6, random_state=42).fit(X, y)
+    model.feature_names_in_ = np.asarray(FEATURE_NAMES, dtype=object)
+
+    service = ModelService()
+    service._swap(LoadedModel(export_flat_forest(model), 'benchmark', RentPreprocessor(), Path('benchmark')))
+    return service
+
+
+def main() -> None:
+    """Ejecuta el benchmark e imprime una tabla con los resultados."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--calls', type=int, default=20_000)
+    parser.add_argument('--n-estimators', type=int, default=10)
+    parser.add_argument('--configurations', nargs='+', choices=list(_CONFIGURATIONS), default=list(_CONFIGURATIONS))
+    args = parser.parse_args()
+
+    service = _build_service(args.n_estimators)
+    row = [dict.fromkeys(FEATURE_NAMES, 1.0)]
+
+    print(f'{"configuration":>18} {"calls/s":>10} {"us/call":>9} {"overhead":>9} {"drain ms":>9} {"lines":>7}')
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in args.configurations:
+            logger.remove()
+            log_path = Path(tmp_dir) / f'{name}.log'
+            options = _CONFIGURATIONS[name]
+            if options is not None:
+                configure_logging(LoggerSettings(log_level='INFO', log_path=str(log_path), **options))
+
+            for _ in range(100):
+                service.predict_batch(row)
+            start = time.perf_counter()
+            for _ in range(args.calls):
+                service.predict_batch(row)
+            elapsed = time.perf_counter() - start
+
+            drain_start = time.perf_counter()
+            logger.remove()
+            drain = time.perf_counter() - drain_start
+
+            per_call = elapsed / args.calls
+            baseline = baseline or per_call
+            lines = sum(1 for _ in log_path.open()) if log_path.exists() else 0
+            print(
+                f'{name:>18} {args.calls / elapsed:>10.0f} {per_call * 1e6:>9.1f} '
+                f'{(per_call / baseline - 1) * 100:>8.1f}% {drain * 1e3:>9.1f} {lines:>7}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark del pipeline de preparación sobre DataFrames grandes.
+
+Genera un DataFrame sintético con las columnas crudas de `RentApartments`
+y compara el throughput (filas/s) de la implementación anterior
+(`pd.get_dummies` + `Series.apply` con `re.findall`) con la actual
+(vocabulario fijo a `uint8` + `str.extract`), verificando que ambas
+producen los mismos valores.
+
+Uso típico:
+    >>> python -m benchmarks.preparation --rows 1000000
+"""
+
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from model.pipeline.preparation import (
+    CATEGORY_VOCABULARY,
+    _enconde_cat_cols,
+    _parse_garden_col,
+)
+
+_GARDEN_VALUES = (
+    'Not present',
+    'Present (12 m²)',
+    'Present (20 m², located on the south)',
+    'Present (100 m², located on the north-east)',
+)
+
+
+def _synthetic_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Genera `n_rows` filas con el esquema crudo de RentApartments."""
+    rng = np.random.default_rng(seed)
+    data = {
+        'area': rng.uniform(20, 250, n_rows).astype(np.float32),
+        'constraction_year': rng.integers(1850, 2024, n_rows, dtype=np.int16),
+        'bedrooms': rng.integers(1, 6, n_rows, dtype=np.int8),
+        'garden': pd.array(
+            rng.choice(_GARDEN_VALUES, n_rows, p=(0.9, 0.04, 0.03, 0.03)), dtype='string',
+        ),
+        'rent': rng.integers(500, 6000, n_rows, dtype=np.int32),
+    }
+    for column, categories in CATEGORY_VOCABULARY.items():
+        data[column] = pd.array(rng.choice(categories, n_rows), dtype='string')
+    return pd.DataFrame(data)
+
+
+def _legacy_prepare(data: pd.DataFrame) -> pd.DataFrame:
+    """Implementación previa: `get_dummies` y `apply` fila a fila."""
+    encoded = pd.get_dummies(data, columns=list(CATEGORY_VOCABULARY), drop_first=True)
+    encoded['garden'] = encoded['garden'].apply(
+        lambda x: int(re.findall(r'\d+', x)[0]) if x != 'Not present' else 0
+    )
+    return encoded
+
+
+def _current_prepare(data: pd.DataFrame) -> pd.DataFrame:
+    """Implementación actual del pipeline."""
+    encoded = _enconde_cat_cols(data)
+    encoded['garden'] = _parse_garden_col(encoded['garden'])
+    return encoded
+
+
+def main() -> None:
+    """Ejecuta el benchmark e imprime filas/s de cada implementación."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    raw = _synthetic_frame(args.rows)
+    results = {}
+    for name, prepare in (('legacy', _legacy_prepare), ('current', _current_prepare)):
+        frame = raw.copy()
+        start = time.perf_counter()
+        results[name] = prepare(frame)
+        elapsed = time.perf_counter() - start
+        memory = results[name].memory_usage(deep=True).sum() / 2**20
+        print(f'{name:>8}: {elapsed:8.3f} s  {args.rows / elapsed:>12,.0f} rows/s  {memory:8.1f} MiB')
+
+    legacy, current = results['legacy'], results['current']
+    for column in current.columns:
+        np.testing.assert_array_equal(
+            legacy[column].to_numpy(dtype=np.float64),
+            current[column].to_numpy(dtype=np.float64),
+        )
+    print('outputs match')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark del tiempo de arranque (importación) de los puntos de entrada.
+
+Importa cada módulo en un intérprete nuevo con `python -X importtime`,
+suma el tiempo acumulado de las importaciones de primer nivel y lo
+compara con un presupuesto en milisegundos. Además comprueba que el
+camino de inferencia no importa dependencias que solo necesita el
+entrenamiento (pandas, scikit-learn, SQLAlchemy), ya que cada una añade
+cientos de milisegundos al arranque en frío de un pod de inferencia.
+
+El proceso termina con código 1 si algún módulo supera el presupuesto o
+importa una dependencia prohibida, de modo que puede usarse en CI.
+
+Uso típico:
+    >>> python -m benchmarks.startup --budget-ms 750
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+_DEFAULT_TARGETS = ('server', 'runner', 'model.model_service')
+_FORBIDDEN_MODULES = ('pandas', 'sklearn', 'sqlalchemy', 'scipy')
+_IMPORTTIME_LINE = re.compile(r'^import time:\s*(\d+) \|\s*(\d+) \|( *)(\S+)$')
+
+
+def _import_profile(module: str) -> dict[str, tuple[int, int]]:
+    """
+    Importa `module` en un intérprete nuevo y devuelve su perfil.
+
+    Returns
+    -------
+    dict[str, tuple[int, int]]
+        Por módulo importado, `(profundidad, tiempo acumulado en µs)`.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            _, cumulative, indent, name = match.groups()
+            profile[name] = ((len(indent) - 1) // 2, int(cumulative))
+    return profile
+
+
+def _total_ms(profile: dict[str, tuple[int, int]]) -> float:
+    """Suma el tiempo acumulado de las importaciones de primer nivel."""
+    return sum(cumulative for depth, cumulative in profile.values() if depth == 0) / 1000
+
+
+def main() -> None:
+    """Ejecuta el benchmark, imprime el desglose y aplica el presupuesto."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('modules', nargs='*', default=list(_DEFAULT_TARGETS))
+    parser.add_argument('--budget-ms', type=float, default=750.0)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8)
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        profiles = [_import_profile(module) for _ in range(args.repeats)]
+        best = min(profiles, key=_total_ms)
+        total = _total_ms(best)
+        forbidden = sorted(name for name in _FORBIDDEN_MODULES if name in best)
+        over_budget = total > args.budget_ms
+
+        status = 'FAIL' if over_budget or forbidden else 'ok'
+        print(f'{module:>22}: {total:8.1f} ms (budget {args.budget_ms:.0f} ms)  [{status}]')
+        heaviest = sorted(
+            ((cumulative, name) for name, (depth, cumulative) in best.items() if depth <= 1),
+            reverse=True,
+        )[:args.top]
+        for cumulative, name in heaviest:
+            print(f'{"":>24}{cumulative / 1000:8.1f} ms  {name}')
+        if forbidden:
+            print(f'{"":>24}training-only dependencies imported: {forbidden}')
+        failed = failed or over_budget or bool(forbidden)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
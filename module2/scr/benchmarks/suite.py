@@ -0,0 +1,303 @@
+"""
+Suite reproducible de benchmarks de entrenamiento e inferencia.
+
+Genera una tabla sintética de `RentApartments` del tamaño indicado en una
+base SQLite temporal y mide, sobre ella y con la configuración del
+proyecto:
+- Extracción: filas/s de `load_data_from_db` y de `stream_data_from_db`.
+- Preparación: filas/s de `prepare_frame`.
+- Entrenamiento: tiempo total de `build_model`, duración de cada etapa y
+  pico de memoria residente.
+- Carga: tiempo de `ModelService.load_model` con cada motor de inferencia.
+- Predicción: latencia (p50/p99) y filas/s de `predict_batch` con varios
+  tamaños de lote, y throughput con varios hilos concurrentes.
+
+Los resultados se escriben en JSON. Con `--compare` se comparan contra una
+línea base guardada y el proceso termina con código 1 si alguna métrica
+empeora más que `--threshold`, de modo que puede usarse en CI. La línea
+base depende de la máquina: debe generarse en la misma en la que se
+compara.
+
+La base de datos, el modelo y el log del benchmark viven en un directorio
+temporal, por lo que la suite no modifica los datos ni los modelos del
+proyecto.
+
+Uso típico:
+    >>> python -m benchmarks.suite --rows 10000 --output benchmarks/results/baseline.json
+    >>> python -m benchmarks.suite --rows 10000 --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+_GARDEN_VALUES = (
+    'Not present',
+    'Present (12 m²)',
+    'Present (20 m², located on the south)',
+    'Present (100 m², located on the north-east)',
+)
+
+
+def _synthetic_table(n_rows: int, seed: int):
+    """Genera `n_rows` apartamentos con el esquema completo de RentApartments."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    area = rng.uniform(20, 250, n_rows).round(1)
+    bedrooms = rng.integers(1, 6, n_rows)
+    yes_no = {column: rng.choice(('no', 'yes'), n_rows) for column in
+              ('balcony', 'storage', 'parking', 'furnished', 'garage')}
+    garden = rng.choice(_GARDEN_VALUES, n_rows, p=(0.9, 0.04, 0.03, 0.03))
+    rent = (
+        600 + 14 * area + 90 * bedrooms
+        + 250 * (yes_no['furnished'] == 'yes')
+        + 150 * (garden != 'Not present')
+        + rng.normal(0, 250, n_rows)
+    ).clip(300).astype(int)
+    zip_codes = np.char.add(rng.integers(1000, 1110, n_rows).astype(str), ' AB')
+    return pd.DataFrame({
+        'address': [f'Synthetic street {i}' for i in range(n_rows)],
+        'area': area,
+        'constraction_year': rng.integers(1850, 2024, n_rows),
+        'rooms': bedrooms + 1,
+        'bedrooms': bedrooms,
+        'bathrooms': rng.integers(1, 3, n_rows),
+        **yes_no,
+        'garden': garden,
+        'energy': rng.choice(tuple('ABCDEFG'), n_rows),
+        'facilities': 'Cable TV, Internet connection',
+        'zip': zip_codes,
+        'neighborhood': np.char.add('Neighborhood ', rng.integers(0, 200, n_rows).astype(str)),
+        'rent': rent,
+    })
+
+
+def _timed(function, *args, **kwargs) -> tuple[object, float]:
+    """Ejecuta `function` y devuelve su resultado y su duración en segundos."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class _Results:
+    """Métricas de una ejecución, con su unidad y su sentido de mejora."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, dict] = {}
+
+    def add(self, name: str, value: float, unit: str, higher_is_better: bool) -> None:
+        self.metrics[name] = {
+            'value': float(value),
+            'unit': unit,
+            'higher_is_better': higher_is_better,
+        }
+        print(f'{name:<42} {value:>14,.3f} {unit}')
+
+
+def _run_suite(args: argparse.Namespace, work_dir: Path) -> dict[str, dict]:
+    """Ejecuta todas las mediciones con la configuración apuntando a `work_dir`."""
+    # Las importaciones del proyecto se hacen aquí, después de apuntar la
+    # configuración al directorio temporal.
+    import pandas as pd
+
+    from config import db_settings, get_engine, model_settings
+    from db.db_model import Base
+    from model.model_service import ModelService
+    from model.pipeline.collection import load_data_from_db, stream_data_from_db
+    from model.pipeline.model import build_model
+    from model.pipeline.preparation import prepare_frame
+    from model.pipeline.resources import add_stage_listener, peak_rss_mb, reset_peak_rss
+    from model.schema import FEATURE_NAMES
+
+    results = _Results()
+    n_rows = args.rows
+
+    table = _synthetic_table(n_rows, args.seed)
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    _, elapsed = _timed(
+        table.to_sql, db_settings.rent_apartment_table_name, engine,
+        if_exists='append', index=False, chunksize=10_000,
+    )
+    results.add('ingest.rows_per_s', n_rows / elapsed, 'rows/s', True)
+
+    raw, elapsed = _timed(load_data_from_db)
+    results.add('extract.full.rows_per_s', n_rows / elapsed, 'rows/s', True)
+    _, elapsed = _timed(lambda: pd.concat(list(stream_data_from_db()), ignore_index=True))
+    results.add('extract.streaming.rows_per_s', n_rows / elapsed, 'rows/s', True)
+
+    _, elapsed = _timed(prepare_frame, raw.copy())
+    results.add('prepare.rows_per_s', n_rows / elapsed, 'rows/s', True)
+
+    stages: dict[str, float] = {}
+
+    def record_stage(name: str, seconds: float | None) -> None:
+        if seconds is not None:
+            stages[name] = seconds
+
+    add_stage_listener(record_stage)
+    reset_peak_rss()
+    _, elapsed = _timed(build_model)
+    results.add('train.wall_s', elapsed, 's', False)
+    results.add('train.peak_rss_mib', peak_rss_mb(), 'MiB', False)
+    for stage, seconds in stages.items():
+        results.add(f'train.stage.{stage}_s', seconds, 's', False)
+
+    rng = np.random.default_rng(args.seed)
+    matrix = rng.normal(size=(max(args.batch_sizes), len(FEATURE_NAMES))).astype(np.float32)
+    matrix[:, 0] = rng.uniform(20, 250, len(matrix))
+    for engine_name in args.engines:
+        model_settings.inference_engine = engine_name
+        load_times = []
+        for _ in range(args.repeat):
+            service = ModelService()
+            _, elapsed = _timed(service.load_model, model_settings.model_name)
+            load_times.append(elapsed)
+        results.add(f'load.{engine_name}.ms', 1000 * min(load_times), 'ms', False)
+
+        for batch_size in args.batch_sizes:
+            batch = matrix[:batch_size]
+            service.predict_batch(batch)
+            latencies = np.array([
+                _timed(service.predict_batch, batch)[1] for _ in range(args.predict_calls)
+            ])
+            prefix = f'predict.{engine_name}.batch_{batch_size}'
+            results.add(f'{prefix}.p50_ms', 1000 * np.percentile(latencies, 50), 'ms', False)
+            results.add(f'{prefix}.p99_ms', 1000 * np.percentile(latencies, 99), 'ms', False)
+            results.add(f'{prefix}.rows_per_s', batch_size / np.median(latencies), 'rows/s', True)
+
+        for concurrency in args.concurrency:
+            throughput = _concurrent_throughput(
+                service, matrix[:args.concurrency_batch_size], concurrency, args.predict_calls,
+            )
+            results.add(
+                f'predict.{engine_name}.concurrency_{concurrency}.rows_per_s',
+                throughput, 'rows/s', True,
+            )
+    return results.metrics
+
+
+def _concurrent_throughput(service, batch: np.ndarray, threads: int, calls: int) -> float:
+    """Filas/s de `threads` hilos llamando a la vez a `predict_batch` con `batch`."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker() -> None:
+        barrier.wait()
+        for _ in range(calls):
+            service.predict_batch(batch)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * calls * len(batch) / (time.perf_counter() - start)
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compara dos ejecuciones y devuelve las métricas que empeoran más que `threshold`.
+
+    Parameters
+    ----------
+    current : dict
+        Resultado de la ejecución actual.
+    baseline : dict
+        Resultado guardado de la línea base.
+    threshold : float
+        Empeoramiento relativo tolerado (0.1 = 10 %).
+
+    Returns
+    -------
+    list[str]
+        Nombres de las métricas con regresión.
+    """
+    if current['meta']['rows'] != baseline['meta']['rows']:
+        print(f'warning: baseline used {baseline["meta"]["rows"]} rows, this run {current["meta"]["rows"]}')
+
+    regressions = []
+    print(f'\n{"metric":<42} {"baseline":>12} {"current":>12} {"change":>8}')
+    for name, metric in current['metrics'].items():
+        reference = baseline['metrics'].get(name)
+        if reference is None or reference['value'] == 0:
+            continue
+        change = metric['value'] / reference['value'] - 1
+        worse = -change if metric['higher_is_better'] else change
+        regressed = worse > threshold
+        if regressed:
+            regressions.append(name)
+        print(
+            f'{name:<42} {reference["value"]:>12,.3f} {metric["value"]:>12,.3f} '
+            f'{change:>+7.1%}{"  REGRESSION" if regressed else ""}'
+        )
+    return regressions
+
+
+def main() -> None:
+    """Ejecuta la suite, guarda el JSON y, opcionalmente, compara con la línea base."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--training-search', choices=('grid', 'halving', 'warm_start'), default='warm_start')
+    parser.add_argument('--engines', nargs='+', choices=('sklearn', 'flat'), default=['sklearn', 'flat'])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 64, 1024])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--concurrency-batch-size', type=int, default=1)
+    parser.add_argument('--predict-calls', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', type=Path, default=Path('benchmarks/results/latest.json'))
+    parser.add_argument('--compare', type=Path)
+    parser.add_argument('--threshold', type=float, default=0.15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='rent-benchmark-') as tmp_dir:
+        work_dir = Path(tmp_dir)
+        (work_dir / 'models').mkdir()
+        os.environ.update({
+            'DB_CONN_STR': f'sqlite:///{work_dir / "benchmark.sqlite"}',
+            'MODEL_PATH': str(work_dir / 'models'),
+            'LOG_PATH': str(work_dir / 'benchmark.log'),
+            'TRAINING_SEARCH': args.training_search,
+            'INCREMENTAL_EXTRACTION': 'false',
+            'PREDICTION_CACHE_ENABLED': 'false',
+        })
+        metrics = _run_suite(args, work_dir)
+
+    run = {
+        'meta': {
+            'rows': args.rows,
+            'seed': args.seed,
+            'training_search': args.training_search,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'metrics': metrics,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(run, indent=2))
+    print(f'\nresults written to {args.output}')
+
+    if args.compare is not None:
+        regressions = compare(run, json.loads(args.compare.read_text()), args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} metrics regressed more than {args.threshold:.0%}: {regressions}')
+            sys.exit(1)
+        print(f'\nno regressions beyond {args.threshold:.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,36 @@
-from .db import db_settings, engine
-from .model import model_settings
-from .logger import LoggerSettings
\ No newline at end of file
+"""
+Configuración de la aplicación cargada desde `config/.env`.
+
+Los objetos de configuración se exponen de forma perezosa: cada submódulo
+(y con él su objeto de settings) solo se importa la primera vez que se
+accede al nombre correspondiente, de modo que un proceso de inferencia no
+paga la configuración de base de datos o de entrenamiento. El logging se
+configura al importar el paquete.
+"""
+from importlib import import_module
+
+from .logger import LoggerSettings
+
+_LAZY_ATTRIBUTES = {
+    'db_settings': '.db',
+    'get_engine': '.db',
+    'instrumentation_settings': '.instrumentation',
+    'model_settings': '.model',
+    'serving_settings': '.serving',
+    'training_settings': '.training',
+}
+
+__all__ = ['LoggerSettings', *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name: str):
+    """Importa bajo demanda el submódulo que define `name`."""
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,10 +1,25 @@
 """
 Este modulo contiene los parámetros cargados desde variables de entorno
 necesarios para localizar e identificar el proceso de logging.
+
+El motor de SQLAlchemy se crea de forma perezosa con `get_engine()`, con
+el pool y los pragmas de SQLite configurados en `DbSettings`. Tras un
+`fork` el proceso hijo descarta el motor heredado y crea el suyo, de modo
+que cada proceso trabajador tiene su propio pool de conexiones.
+SQLAlchemy no se importa hasta la primera llamada a `get_engine()`.
 """
-from sqlalchemy import create_engine 
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from pydantic import NonNegativeInt, PositiveInt
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+
 class DbSettings(BaseSettings):
     """
     DB confuguration settings for the application.
@@ -12,6 +27,45 @@ class DbSettings(BaseSettings):
     Attributes:
         mode_config (SettingConfigDict): Model config, loaded from .env file.
         log_level (str): Logging level for the application
+        db_chunksize (int): Filas por bloque en la extracción en streaming.
+        rent_prediction_table_name (str): Tabla donde el scoring por lotes
+            escribe las predicciones.
+        incremental_extraction (bool): Usa la instantánea local y la marca
+            de agua en lugar de releer la tabla completa en `build_model`.
+        snapshot_dir (str): Directorio de las instantáneas Parquet.
+        watermark_column (str): Columna usada como marca de agua; debe
+            crecer al insertar o actualizar una fila (`updated_at`, que
+            mantiene `ingest.py`). `rowid` se rechaza porque no cambia al
+            actualizar una fila.
+        snapshot_key_column (str): Columna que identifica una fila; las
+            versiones nuevas de una fila reemplazan a las anteriores y las
+            claves que ya no están en la tabla se eliminan de la
+            instantánea.
+        snapshot_max_parts (int): Número de partes a partir del cual la
+            instantánea se compacta en un único archivo.
+        db_pool_size (int): Conexiones persistentes del pool por proceso.
+        db_max_overflow (int): Conexiones adicionales permitidas por encima
+            de `db_pool_size` en picos de carga.
+        db_pool_timeout (int): Segundos de espera por una conexión libre.
+        db_pool_pre_ping (bool): Comprueba cada conexión antes de usarla.
+        db_pool_recycle (int): Segundos tras los que una conexión se
+            renueva (-1 la mantiene indefinidamente).
+        db_statement_timeout_ms (int | None): Tiempo máximo de una sentencia
+            en PostgreSQL (`statement_timeout`) o MySQL
+            (`max_execution_time`).
+        db_read_only (bool): Abre la base SQLite en modo solo lectura
+            (URI `mode=ro`); los pragmas que escriben se omiten.
+        sqlite_journal_mode (str | None): Pragma `journal_mode`; `None`
+            conserva el modo del archivo. `WAL` permite lectores
+            concurrentes con un escritor, pero se guarda en el propio
+            archivo: debe activarse explícitamente
+            (`SQLITE_JOURNAL_MODE=WAL`) solo en despliegues que escriben,
+            no sobre la base `db/db.sqlite` incluida en el repositorio.
+        sqlite_synchronous (str | None): Pragma `synchronous`.
+        sqlite_mmap_size (int): Bytes de la base leídos mediante mmap.
+        sqlite_cache_size (int): Pragma `cache_size` (negativo en KiB).
+        sqlite_busy_timeout_ms (int): Espera ante una base bloqueada antes
+            de fallar.
 
     """
 
@@ -23,7 +77,117 @@ class DbSettings(BaseSettings):
 
     db_conn_str: str
     rent_apartment_table_name: str
+    rent_prediction_table_name: str = 'rent_predictions'
+    db_chunksize: PositiveInt = 50_000
+    incremental_extraction: bool = False
+    snapshot_dir: str = 'db/snapshots'
+    watermark_column: str = 'updated_at'
+    snapshot_key_column: str = 'rowid'
+    snapshot_max_parts: PositiveInt = 32
+    db_pool_size: PositiveInt = 5
+    db_max_overflow: NonNegativeInt = 10
+    db_pool_timeout: PositiveInt = 30
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 1800
+    db_statement_timeout_ms: PositiveInt | None = None
+    db_read_only: bool = False
+    sqlite_journal_mode: str | None = None
+    sqlite_synchronous: str | None = 'NORMAL'
+    sqlite_mmap_size: NonNegativeInt = 268_435_456
+    sqlite_cache_size: int = -65_536
+    sqlite_busy_timeout_ms: NonNegativeInt = 5_000
 
 db_settings = DbSettings()
 
-engine = create_engine(db_settings.db_conn_str)
\ No newline at end of file
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    Devuelve el motor de base de datos del proceso actual, creándolo si no existe.
+
+    Returns:
+        Engine: Motor con el pool y los pragmas de `db_settings`.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine(db_settings)
+    return _engine
+
+
+def _create_engine(settings: DbSettings) -> Engine:
+    """Crea el motor aplicando la configuración de pool y del dialecto."""
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.engine import make_url
+
+    url = make_url(settings.db_conn_str)
+    backend = url.get_backend_name()
+    in_memory = backend == 'sqlite' and url.database in (None, '', ':memory:')
+    kwargs = {
+        'pool_pre_ping': settings.db_pool_pre_ping,
+        'pool_recycle': settings.db_pool_recycle,
+    }
+    connect_args = {}
+
+    if not in_memory:
+        kwargs.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    if backend == 'sqlite':
+        connect_args['timeout'] = settings.sqlite_busy_timeout_ms / 1000
+        connect_args['check_same_thread'] = False
+        if settings.db_read_only and not in_memory:
+            url = url.set(
+                database=f'file:{url.database}',
+                query={**url.query, 'mode': 'ro', 'uri': 'true'},
+            )
+    elif settings.db_statement_timeout_ms is not None:
+        if backend == 'postgresql':
+            connect_args['options'] = f'-c statement_timeout={settings.db_statement_timeout_ms}'
+        elif backend == 'mysql':
+            connect_args['init_command'] = (
+                f'SET SESSION max_execution_time={settings.db_statement_timeout_ms}'
+            )
+
+    engine = create_engine(url, connect_args=connect_args, **kwargs)
+    if backend == 'sqlite':
+        event.listen(engine, 'connect', _sqlite_pragmas(settings))
+    return engine
+
+
+def _sqlite_pragmas(settings: DbSettings):
+    """Construye el listener que aplica los pragmas a cada conexión SQLite nueva."""
+    pragmas = {
+        'mmap_size': settings.sqlite_mmap_size,
+        'cache_size': settings.sqlite_cache_size,
+    }
+    if not settings.db_read_only:
+        if settings.sqlite_journal_mode is not None:
+            pragmas['journal_mode'] = settings.sqlite_journal_mode
+        if settings.sqlite_synchronous is not None:
+            pragmas['synchronous'] = settings.sqlite_synchronous
+
+    def set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    return set_pragmas
+
+
+def _reset_engine_after_fork() -> None:
+    """Descarta en el hijo el pool heredado sin cerrar las conexiones del padre."""
+    global _engine, _engine_lock
+    _engine_lock = threading.Lock()
+    if _engine is not None:
+        _engine.dispose(close=False)
+        _engine = None
+
+
+os.register_at_fork(after_in_child=_reset_engine_after_fork)
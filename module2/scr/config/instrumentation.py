@@ -0,0 +1,46 @@
+"""
+Este modulo contiene los parámetros cargados desde variables de entorno
+necesarios para configurar la instrumentación y el profiling.
+"""
+from pathlib import Path
+from typing import Literal
+
+from pydantic import PositiveFloat, PositiveInt
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class InstrumentationSettings(BaseSettings):
+    """
+    Instrumentation configuration settings for the application.
+
+    Attributes:
+        mode_config (SettingConfigDict): Model config, loaded from .env file.
+        metrics_enabled (bool): Registra tiempos, llamadas y filas de las
+            etapas instrumentadas con `model.instrumentation`.
+        metrics_file (Path | None): Archivo en el que se escriben las
+            métricas en formato de texto de Prometheus al terminar el
+            proceso (apto para el textfile collector de node_exporter).
+        profiler (str): Profiler de la ejecución: `none`, `cprofile`
+            (determinista, con sobrecarga en cada llamada) o `sampling`
+            (muestrea las pilas de todos los hilos cada
+            `profile_interval_ms`).
+        profile_dir (Path): Directorio donde se guardan los perfiles.
+        profile_interval_ms (float): Intervalo del profiler por muestreo.
+        profile_top (int): Funciones más costosas que se muestran en el log
+            al terminar un perfil.
+
+    """
+
+    model_config = SettingsConfigDict(
+        env_file="config/.env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    metrics_enabled: bool = True
+    metrics_file: Path | None = None
+    profiler: Literal['none', 'cprofile', 'sampling'] = 'none'
+    profile_dir: Path = Path('logs/profiles')
+    profile_interval_ms: PositiveFloat = 10.0
+    profile_top: PositiveInt = 20
+
+instrumentation_settings = InstrumentationSettings()
@@ -2,7 +2,13 @@
 Este modulo contiene los parámetros cargados desde variables de entorno
 necesarios para localizar e identificar el proceso de logging.
 """
+import random
+import threading
+import time
+from typing import Literal
+
 from loguru import logger
+from pydantic import Field, PositiveFloat
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class LoggerSettings(BaseSettings):
@@ -12,6 +18,23 @@ class LoggerSettings(BaseSettings):
     Attributes:
         mode_config (SettingConfigDict): Model config, loaded from .env file.
         log_level (str): Logging level for the application
+        log_path (str): Archivo de log.
+        log_enqueue (bool): Escribe el log desde un hilo en segundo plano:
+            quien registra solo encola el mensaje y no espera al disco. La
+            cola es segura entre procesos (útil con los workers de
+            `batch_scoring`), pero serializar cada mensaje cuesta más que
+            escribirlo cuando el disco es rápido; ver
+            `benchmarks.logging_overhead`.
+        log_serialize (bool): Escribe cada mensaje como una línea JSON con
+            sus campos estructurados.
+        log_rotation (str): Cuándo rotar el archivo (ej. `1 day`, `100 MB`).
+        log_retention (str): Cuánto conservar los archivos rotados.
+        log_compression (str | None): Formato de compresión de los archivos
+            rotados (`gz`, `bz2`, `xz`, `zip`); `None` no comprime.
+        log_request_sample_rate (float): Fracción de los mensajes por
+            petición (marcados con `per_request=True`) que se escriben.
+        log_request_rate_limit (float | None): Máximo de mensajes por
+            petición escritos por segundo; `None` no limita.
 
     """
 
@@ -22,28 +45,91 @@ class LoggerSettings(BaseSettings):
     )
 
     log_level: str
+    log_path: str = 'logs/app.log'
+    log_enqueue: bool = False
+    log_serialize: bool = False
+    log_rotation: str = '1 day'
+    log_retention: str = '2 days'
+    log_compression: Literal['gz', 'bz2', 'xz', 'zip'] | None = None
+    log_request_sample_rate: float = Field(default=1.0, ge=0, le=1)
+    log_request_rate_limit: PositiveFloat | None = None
+
+
+class RequestLogFilter:
+    """
+    Filtro de loguru que muestrea y limita los mensajes por petición.
+
+    Solo afecta a los mensajes registrados con `per_request=True` (ver
+    `request_logger`); el resto se escriben siempre. El límite de ritmo es
+    un token bucket con capacidad de un segundo de mensajes, y al menos de
+    uno, para que un límite inferior a un mensaje por segundo también deje
+    pasar mensajes.
+
+    Attributes:
+        sample_rate (float): Fracción de mensajes por petición que se escriben.
+        rate_limit (float | None): Máximo de mensajes por petición por segundo.
+        dropped (int): Mensajes por petición descartados.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, rate_limit: float | None = None) -> None:
+        self.sample_rate = sample_rate
+        self.rate_limit = rate_limit
+        self.dropped = 0
+        self._capacity = max(1.0, rate_limit or 0.0)
+        self._tokens = self._capacity
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
 
+    def __call__(self, record: dict) -> bool:
+        if not record['extra'].get('per_request'):
+            return True
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            with self._lock:
+                self.dropped += 1
+            return False
+        if self.rate_limit is not None:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity,
+                    self._tokens + (now - self._refilled_at) * self.rate_limit,
+                )
+                self._refilled_at = now
+                if self._tokens < 1:
+                    self.dropped += 1
+                    return False
+                self._tokens -= 1
+        return True
 
 
+# Logger para los mensajes que se emiten en cada predicción.
+request_logger = logger.bind(per_request=True)
 
-def configure_logging(log_level: str) -> None:
+
+def configure_logging(settings: LoggerSettings) -> None:
     """Configura el sistema de logging utilizando Loguru.
-    
+
     Arg:
-        log_level (str): Nivel de logging deseado.
+        settings (LoggerSettings): Nivel, archivo, rotación y modo de
+            escritura del log.
 
     Returns:
         None
     """
     logger.remove()  # Elimina los manejadores por defecto
     logger.add(
-        "logs/app.log",
-        rotation="1 day",
-        retention="2 days",
-        #compression="zip",
-        level=log_level,
+        settings.log_path,
+        rotation=settings.log_rotation,
+        retention=settings.log_retention,
+        compression=settings.log_compression,
+        level=settings.log_level,
+        enqueue=settings.log_enqueue,
+        serialize=settings.log_serialize,
+        filter=RequestLogFilter(
+            settings.log_request_sample_rate,
+            settings.log_request_rate_limit,
+        ),
     )
 
 
-configure_logging(log_level= LoggerSettings().log_level)
-
+configure_logging(LoggerSettings())
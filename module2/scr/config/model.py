@@ -3,7 +3,9 @@ Este modulo contiene los parámetros cargados desde variables de entorno
 necesarios para localizar e identificar el modelo a utilizar.
 """
 
-from pydantic import DirectoryPath
+from typing import Literal
+
+from pydantic import DirectoryPath, NonNegativeInt, PositiveFloat, PositiveInt
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class ModelSettings(BaseSettings):
@@ -19,6 +21,59 @@ class ModelSettings(BaseSettings):
         Ruta al directorio donde se encuentra el modelo.
     model_name : str
         Nombre del modelo.
+    predict_chunk_size : int
+        Número máximo de filas evaluadas por llamada al modelo en
+        `ModelService.predict_batch`.
+    inference_engine : str
+        Motor de inferencia de `ModelService`: `sklearn` evalúa el
+        `RandomForestRegressor` original y `flat` el bosque aplanado en
+        arrays (`FlatForest`).
+    prediction_cache_enabled : bool
+        Activa la caché de predicciones en `ModelService`.
+    prediction_cache_max_entries : int | None
+        Número máximo de entradas de la caché.
+    prediction_cache_max_bytes : int | None
+        Tamaño máximo aproximado de la caché en bytes.
+    prediction_cache_ttl_seconds : float | None
+        Tiempo de vida de cada entrada de la caché en segundos.
+    fallback_model_name : str | None
+        Modelo que se sirve mientras se construye el modelo configurado.
+        Si es `None`, `load_model` espera a que termine la construcción.
+    model_build_wait_seconds : float | None
+        Tiempo máximo de espera por la construcción del modelo (`None`
+        espera indefinidamente).
+    model_build_poll_seconds : float
+        Intervalo con el que se consulta el progreso de la construcción.
+    model_reload_enabled : bool
+        Vigila el archivo del modelo en el servidor y recarga en caliente
+        las nuevas versiones.
+    model_reload_interval_seconds : float
+        Intervalo entre comprobaciones del archivo del modelo.
+    model_reload_warmup_rows : int
+        Filas de prueba evaluadas con un modelo nuevo antes de publicarlo.
+    segment_routing_enabled : bool
+        Enruta cada predicción del servidor al modelo de su segmento.
+    segment_column : str
+        Columna que define el segmento: `neighborhood` o `zip`.
+    segment_models_dir : str
+        Subdirectorio de `model_path` con un directorio por segmento.
+    registry_max_bytes : int
+        Presupuesto de memoria de los modelos de segmento residentes.
+    inference_workers : int | None
+        Hilos del pool persistente de inferencia (ver `model.inference`).
+        `None` usa las CPUs disponibles; 1 evalúa siempre en el hilo que
+        llama.
+    inference_parallel_min_rows : int
+        Filas a partir de las cuales un lote se reparte entre los hilos;
+        por debajo, el coste de despacho supera la ganancia.
+    inference_split : str
+        Reparto de un lote grande: `rows` (bloques de filas) o `trees`
+        (subconjuntos de árboles cuyas sumas parciales se reducen).
+    model_variant : str
+        Variante servida: `accurate` (el bosque completo) o `fast` (el
+        artefacto comprimido `<model_name>.fast.forest`, con menos árboles
+        y nodos y precisión float32, ver `model.pipeline.compression`).
+        `fast` usa siempre el motor `flat`.
     """
 
     model_config = SettingsConfigDict(
@@ -29,5 +84,25 @@ class ModelSettings(BaseSettings):
 
     model_path: DirectoryPath
     model_name: str
+    predict_chunk_size: PositiveInt = 50_000
+    inference_engine: Literal['sklearn', 'flat'] = 'sklearn'
+    prediction_cache_enabled: bool = False
+    prediction_cache_max_entries: PositiveInt | None = 100_000
+    prediction_cache_max_bytes: PositiveInt | None = None
+    prediction_cache_ttl_seconds: PositiveFloat | None = 3600
+    fallback_model_name: str | None = None
+    model_build_wait_seconds: PositiveFloat | None = None
+    model_build_poll_seconds: PositiveFloat = 1.0
+    model_reload_enabled: bool = False
+    model_reload_interval_seconds: PositiveFloat = 5.0
+    model_reload_warmup_rows: NonNegativeInt = 8
+    segment_routing_enabled: bool = False
+    segment_column: Literal['neighborhood', 'zip'] = 'neighborhood'
+    segment_models_dir: str = 'segments'
+    registry_max_bytes: PositiveInt = 512 * 2**20
+    inference_workers: PositiveInt | None = None
+    inference_parallel_min_rows: PositiveInt = 4096
+    inference_split: Literal['rows', 'trees'] = 'rows'
+    model_variant: Literal['accurate', 'fast'] = 'accurate'
 
 model_settings = ModelSettings()
\ No newline at end of file
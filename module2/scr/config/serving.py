@@ -0,0 +1,42 @@
+"""
+Este modulo contiene los parámetros cargados desde variables de entorno
+necesarios para configurar el servidor de inferencia.
+"""
+from pydantic import NonNegativeFloat, PositiveInt
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class ServingSettings(BaseSettings):
+    """
+    Serving configuration settings for the application.
+
+    Attributes:
+        mode_config (SettingConfigDict): Model config, loaded from .env file.
+        serving_host (str): Host en el que escucha el servidor HTTP.
+        serving_port (int): Puerto en el que escucha el servidor HTTP.
+        max_batch_size (int): Número máximo de peticiones por micro-lote.
+        max_wait_ms (float): Tiempo máximo que espera el primer elemento de
+            un micro-lote antes de enviarlo al modelo.
+        max_queue_size (int): Peticiones pendientes admitidas antes de
+            aplicar backpressure a los clientes.
+        latency_window (int): Número de latencias recientes usadas para
+            calcular los percentiles.
+        max_body_bytes (int): Tamaño máximo del cuerpo de una petición
+            HTTP; las mayores se rechazan con 413 sin leerlas.
+
+    """
+
+    model_config = SettingsConfigDict(
+        env_file="config/.env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    serving_host: str = '127.0.0.1'
+    serving_port: PositiveInt = 8000
+    max_batch_size: PositiveInt = 64
+    max_wait_ms: NonNegativeFloat = 2.0
+    max_queue_size: PositiveInt = 10_000
+    latency_window: PositiveInt = 10_000
+    max_body_bytes: PositiveInt = 64 * 2**10
+
+serving_settings = ServingSettings()
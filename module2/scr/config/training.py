@@ -0,0 +1,97 @@
+"""
+Este modulo contiene los parámetros cargados desde variables de entorno
+necesarios para configurar el motor de entrenamiento del modelo.
+"""
+from typing import Literal
+
+from pydantic import Field, NonNegativeFloat, PositiveInt
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class TrainingSettings(BaseSettings):
+    """
+    Training configuration settings for the application.
+
+    Attributes:
+        mode_config (SettingConfigDict): Model config, loaded from .env file.
+        training_search (str): Estrategia de búsqueda de hiperparámetros:
+            `grid` (GridSearchCV), `halving` (successive halving con
+            `n_estimators` como recurso) o `warm_start` (crece cada bosque
+            con `warm_start` a lo largo de los valores de `n_estimators`).
+        training_n_jobs (int | None): Procesos de la búsqueda. Si es `None`
+            se usan todas las CPUs disponibles divididas entre
+            `forest_n_jobs`.
+        forest_n_jobs (int): Hilos de cada bosque durante la búsqueda.
+        cv_folds (int): Número de folds de la validación cruzada.
+        halving_factor (int): Factor de reducción de candidatos por ronda
+            en la búsqueda `halving`.
+        cv_cache_enabled (bool): En la búsqueda `grid`, calcula los folds
+            una vez, comparte los datos entre procesos mediante archivos
+            mapeados en memoria y cachea en disco el R² de cada ajuste, de
+            modo que al repetir la búsqueda solo se entrenan los candidatos
+            nuevos (ver `model.pipeline.cv`).
+        cv_cache_dir (str): Directorio de la caché de validación cruzada.
+        cv_random_state (int): Semilla de los bosques de la validación
+            cruzada cacheada; forma parte de la clave de la caché.
+        memory_efficient (bool): Extrae en streaming con dtypes compactos y
+            construye una única matriz float32 contigua cuyas particiones de
+            entrenamiento y test son vistas, sin copiar DataFrames.
+        sharded_training (bool): Entrena out-of-core por fragmentos: un
+            sub-bosque por fragmento de la tabla, combinados al final (ver
+            `model.pipeline.sharded`).
+        shard_rows (int): Filas de cada fragmento del entrenamiento por
+            fragmentos.
+        shard_n_estimators (int): Árboles del sub-bosque de cada fragmento.
+        shard_max_depth (int | None): Profundidad máxima de los árboles de
+            cada sub-bosque.
+        holdout_fraction (float): Fracción de las filas de cada fragmento
+            que se reserva para test en el entrenamiento por fragmentos.
+        holdout_max_rows (int): Tamaño máximo de la muestra de test; las
+            filas reservadas que no caben en ella se usan para entrenar.
+        segment_min_rows (int): Filas mínimas de un segmento para entrenar
+            su propio modelo en `build_segment_models`.
+        segment_n_estimators (int): Árboles de cada modelo de segmento.
+        segment_max_depth (int | None): Profundidad máxima de los árboles
+            de cada modelo de segmento.
+        compression_enabled (bool): Genera tras el entrenamiento la
+            variante comprimida `fast` del modelo (ver
+            `model.pipeline.compression`).
+        compression_max_r2_loss (float): Pérdida máxima de R² en test
+            admitida al descartar árboles en la variante `fast`.
+        compression_prune_tolerance (float): Diferencia máxima, en unidades
+            del alquiler, entre las hojas de un subárbol para colapsarlo en
+            una hoja.
+        compression_float32 (bool): Guarda umbrales y valores de la
+            variante `fast` en float32.
+
+    """
+
+    model_config = SettingsConfigDict(
+        env_file="config/.env",
+        env_file_encoding="utf-8",
+        extra="ignore",
+    )
+
+    training_search: Literal['grid', 'halving', 'warm_start'] = 'grid'
+    training_n_jobs: PositiveInt | None = None
+    forest_n_jobs: PositiveInt = 1
+    cv_folds: PositiveInt = 5
+    halving_factor: PositiveInt = 3
+    cv_cache_enabled: bool = True
+    cv_cache_dir: str = 'model/cv_cache'
+    cv_random_state: int = 42
+    memory_efficient: bool = False
+    sharded_training: bool = False
+    shard_rows: PositiveInt = 500_000
+    shard_n_estimators: PositiveInt = 50
+    shard_max_depth: PositiveInt | None = 12
+    holdout_fraction: float = Field(default=0.2, gt=0, lt=1)
+    holdout_max_rows: PositiveInt = 100_000
+    segment_min_rows: PositiveInt = 200
+    segment_n_estimators: PositiveInt = 100
+    segment_max_depth: PositiveInt | None = 12
+    compression_enabled: bool = True
+    compression_max_r2_loss: NonNegativeFloat = 0.005
+    compression_prune_tolerance: NonNegativeFloat = 5.0
+    compression_float32: bool = True
+
+training_settings = TrainingSettings()
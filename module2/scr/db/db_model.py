@@ -13,9 +13,14 @@ permite flexibilidad entre distintos entornos.
 
 El modelo está pensado para ser utilizado en operaciones CRUD y en
 consultas relacionadas con la gestión de apartamentos en alquiler.
+
+El módulo define además `RentPredictions`, donde el proceso de scoring
+por lotes escribe el alquiler predicho para cada apartamento.
 """
 
-from sqlalchemy import INTEGER, REAL, VARCHAR
+from datetime import datetime
+
+from sqlalchemy import INTEGER, REAL, VARCHAR, DateTime
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 from config import db_settings
@@ -66,3 +71,22 @@ class RentApartments(Base):
     neighborhood: Mapped[str] = mapped_column(VARCHAR(100))
     rent: Mapped[int] = mapped_column(INTEGER())
 
+
+
+class RentPredictions(Base):
+    """
+    Clase SQLAlchemy para las predicciones de alquiler por apartamento.
+
+    Attributes:
+        address (str): Dirección del apartamento. Clave primaria.
+        predicted_rent (float): Alquiler mensual predicho por el modelo.
+        model_hash (str): Hash de contenido del modelo que generó la predicción.
+        scored_at (datetime): Momento en que se calculó la predicción.
+    """
+
+    __tablename__ = db_settings.rent_prediction_table_name
+
+    address: Mapped[str] = mapped_column(VARCHAR(255), primary_key=True)
+    predicted_rent: Mapped[float] = mapped_column(REAL())
+    model_hash: Mapped[str] = mapped_column(VARCHAR(64))
+    scored_at: Mapped[datetime] = mapped_column(DateTime())
@@ -0,0 +1,319 @@
+"""
+Punto de entrada de la ingesta masiva de anuncios en `RentApartments`.
+
+Este módulo carga archivos CSV o Parquet de anuncios nuevos en la tabla
+de apartamentos con memoria acotada y alto throughput de escritura:
+- El archivo se lee en bloques (`pandas.read_csv(chunksize=...)` o
+  `pyarrow.parquet.ParquetFile.iter_batches`), sin cargarlo entero.
+- Cada bloque se escribe con una única sentencia `insert()` de SQLAlchemy
+  Core ejecutada como `executemany`, dentro de una transacción por
+  bloque.
+- En modo `upsert` (por defecto) se usa `INSERT ... ON CONFLICT(address)
+  DO UPDATE` en SQLite y PostgreSQL, de modo que un anuncio ya cargado se
+  actualiza en lugar de duplicarse. Requiere un índice único sobre
+  `address`, que se crea si no existe; si la tabla ya contiene
+  direcciones duplicadas, `--dedupe` conserva la última versión de cada
+  una antes de crearlo. El modo `append` inserta sin comprobar conflictos;
+  una vez creado el índice único (por una carga `upsert` anterior), una
+  carga `append` falla y se deshace su bloque si contiene alguna
+  `address` que ya esté en la tabla.
+- Con `--rebuild-indexes` los índices secundarios se eliminan antes de la
+  carga y se reconstruyen al final, lo que es más rápido que mantenerlos
+  fila a fila en cargas grandes. El índice único de `address` se conserva
+  porque lo necesita el upsert.
+
+Se registra el throughput (filas/s) de cada bloque y de la carga completa.
+Cada fila insertada o actualizada recibe en `updated_at` el instante de
+escritura de su bloque (la columna se añade a la tabla si no existe): es
+la marca de agua por defecto de la extracción incremental
+(`db_settings.watermark_column`), de modo que las filas actualizadas por
+un upsert, que conservan su `rowid`, también se vuelven a extraer.
+
+Uso típico:
+    >>> python ingest.py listings.parquet --batch-size 100000 --rebuild-indexes
+"""
+
+import argparse
+import time
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Literal
+
+import pandas as pd
+from loguru import logger
+from sqlalchemy import Index, MetaData, Table, insert, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+
+from config import db_settings, get_engine
+from db.db_model import RentApartments
+from model.instrumentation import timed
+
+KEY_COLUMN = 'address'
+UPDATED_AT_COLUMN = 'updated_at'
+COLUMNS = [column.name for column in RentApartments.__table__.columns]
+
+
+def read_batches(path: Path, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Lee un archivo CSV o Parquet en bloques con las columnas de `RentApartments`.
+
+    Parameters
+    ----------
+    path : Path
+        Archivo de entrada (`.csv` o `.parquet`).
+    batch_size : int
+        Filas por bloque.
+
+    Yields
+    ------
+    pd.DataFrame
+        Bloque con las columnas de la tabla, en su orden.
+
+    Raises
+    ------
+    ValueError
+        Si el formato no está soportado o faltan columnas.
+    """
+    suffix = path.suffix.lower()
+    if suffix == '.parquet':
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        _check_columns(parquet.schema_arrow.names, path)
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=COLUMNS):
+            yield batch.to_pandas()
+    elif suffix == '.csv':
+        _check_columns(pd.read_csv(path, nrows=0).columns, path)
+        yield from pd.read_csv(path, usecols=COLUMNS, chunksize=batch_size)
+    else:
+        raise ValueError(f'Formato de entrada no soportado: {path.suffix} (se espera .csv o .parquet)')
+
+
+def ingest_file(
+        path: Path,
+        batch_size: int,
+        mode: Literal['upsert', 'append'] = 'upsert',
+        rebuild_indexes: bool = False,
+        dedupe: bool = False,
+    ) -> dict:
+    """
+    Carga un archivo de anuncios en la tabla `RentApartments`.
+
+    Parameters
+    ----------
+    path : Path
+        Archivo CSV o Parquet.
+    batch_size : int
+        Filas leídas y escritas por transacción.
+    mode : {'upsert', 'append'}, default='upsert'
+        `upsert` actualiza los anuncios cuya `address` ya existe; `append`
+        inserta todas las filas, y falla si la tabla tiene el índice único
+        de `address` y alguna ya existe.
+    rebuild_indexes : bool, default=False
+        Elimina los índices secundarios durante la carga y los reconstruye
+        al final.
+    dedupe : bool, default=False
+        Si la tabla tiene direcciones duplicadas, conserva la última
+        versión de cada una para poder crear el índice único del upsert.
+
+    Returns
+    -------
+    dict
+        Filas escritas, bloques, segundos y filas/s.
+    """
+    engine = get_engine()
+    with engine.begin() as connection:
+        _ensure_updated_at(connection, db_settings.rent_apartment_table_name)
+    table = Table(db_settings.rent_apartment_table_name, MetaData(), autoload_with=engine)
+    if mode == 'upsert':
+        with engine.begin() as connection:
+            _ensure_unique_key(connection, table, dedupe)
+    dropped = _drop_secondary_indexes(table) if rebuild_indexes else []
+
+    statement = _insert_statement(table, mode)
+    total_rows = batches = 0
+    start = time.perf_counter()
+    try:
+        for batch in read_batches(path, batch_size):
+            rows = _to_rows(batch, datetime.now(timezone.utc).replace(tzinfo=None))
+            batch_start = time.perf_counter()
+            with timed('ingest_batch') as stage, engine.begin() as connection:
+                stage.rows = len(rows)
+                connection.execute(statement, rows)
+            total_rows += len(rows)
+            batches += 1
+            logger.info(
+                f'Ingested {total_rows} rows from {path} '
+                f'({len(rows) / (time.perf_counter() - batch_start):,.0f} rows/s in this batch)'
+            )
+    finally:
+        if dropped:
+            _create_indexes(dropped)
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        'rows': total_rows,
+        'batches': batches,
+        'seconds': elapsed,
+        'rows_per_s': total_rows / max(elapsed, 1e-9),
+    }
+    logger.info(
+        f'Ingestion finished: {total_rows} rows in {elapsed:.1f}s '
+        f'({summary["rows_per_s"]:,.0f} rows/s)'
+    )
+    return summary
+
+
+def _check_columns(columns, path: Path) -> None:
+    """Comprueba que el archivo contiene todas las columnas de la tabla."""
+    missing = [column for column in COLUMNS if column not in set(columns)]
+    if missing:
+        raise ValueError(f'Faltan columnas en {path}: {missing}')
+
+
+def _to_rows(batch: pd.DataFrame, updated_at: datetime) -> list[dict]:
+    """Convierte un bloque en parámetros de `executemany`, con `None` en los nulos."""
+    batch = batch[COLUMNS].astype(object)
+    rows = batch.where(batch.notna(), None).to_dict('records')
+    for row in rows:
+        row[UPDATED_AT_COLUMN] = updated_at
+    return rows
+
+
+def _insert_statement(table: Table, mode: str):
+    """
+    Construye la sentencia `INSERT` que se ejecuta con cada bloque.
+
+    En modo `upsert` se usa `ON CONFLICT(address) DO UPDATE` en SQLite y
+    PostgreSQL; en otros motores se emite un `INSERT` simple.
+    """
+    dialect = get_engine().dialect.name
+    if mode == 'append' or dialect not in ('sqlite', 'postgresql'):
+        if mode == 'upsert':
+            logger.warning(f'Upserts are not supported on {dialect}; inserting rows instead')
+        return insert(table)
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+    statement = dialect_insert(table)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c[KEY_COLUMN]],
+        set_={
+            column: statement.excluded[column]
+            for column in (*COLUMNS, UPDATED_AT_COLUMN) if column != KEY_COLUMN
+        },
+    )
+
+
+def _ensure_updated_at(connection: Connection, table_name: str) -> None:
+    """Añade a la tabla la columna `updated_at` y su índice si no existen."""
+    if UPDATED_AT_COLUMN in {info['name'] for info in inspect(connection).get_columns(table_name)}:
+        return
+    connection.execute(text(f'ALTER TABLE "{table_name}" ADD COLUMN "{UPDATED_AT_COLUMN}" TIMESTAMP'))
+    connection.execute(text(
+        f'CREATE INDEX "ix_{table_name}_{UPDATED_AT_COLUMN}" ON "{table_name}" ("{UPDATED_AT_COLUMN}")'
+    ))
+    logger.info(f'Added column {UPDATED_AT_COLUMN} to {table_name} for incremental extraction')
+
+
+def _ensure_unique_key(connection: Connection, table: Table, dedupe: bool) -> None:
+    """
+    Garantiza un índice único sobre `address`, necesario para `ON CONFLICT`.
+
+    Raises
+    ------
+    ValueError
+        Si la tabla tiene direcciones duplicadas y `dedupe` es `False`.
+    """
+    inspector = inspect(connection)
+    keys = [inspector.get_pk_constraint(table.name).get('constrained_columns') or []]
+    keys += [index['column_names'] for index in inspector.get_indexes(table.name) if index['unique']]
+    keys += [constraint['column_names'] for constraint in inspector.get_unique_constraints(table.name)]
+    if [KEY_COLUMN] in keys:
+        return
+
+    index = Index(f'ux_{table.name}_{KEY_COLUMN}', table.c[KEY_COLUMN], unique=True)
+    if dedupe:
+        _delete_duplicates(connection, table)
+    try:
+        with connection.begin_nested():
+            index.create(connection)
+    except IntegrityError as error:
+        raise ValueError(
+            f'La tabla {table.name} tiene valores de {KEY_COLUMN} duplicados y no admite '
+            'upserts; usa --dedupe para conservar la última versión de cada uno o --mode append'
+        ) from error
+    logger.info(f'Created unique index {index.name} for upserts')
+
+
+def _delete_duplicates(connection: Connection, table: Table) -> None:
+    """Elimina las versiones antiguas de cada `address`, conservando la última insertada."""
+    if connection.dialect.name != 'sqlite':
+        raise ValueError('--dedupe solo está soportado en SQLite')
+    result = connection.execute(text(
+        f'DELETE FROM "{table.name}" WHERE rowid NOT IN '
+        f'(SELECT MAX(rowid) FROM "{table.name}" GROUP BY "{KEY_COLUMN}")'
+    ))
+    logger.warning(f'Deleted {result.rowcount} duplicated rows from {table.name}')
+
+
+def _drop_secondary_indexes(table: Table) -> list[Index]:
+    """Elimina los índices que no sostienen el upsert y los devuelve para recrearlos."""
+    engine = get_engine()
+    indexes = [
+        Index(info['name'], *(table.c[column] for column in info['column_names']), unique=info['unique'])
+        for info in inspect(engine).get_indexes(table.name)
+        if info['column_names'] != [KEY_COLUMN]
+    ]
+    with engine.begin() as connection:
+        for index in indexes:
+            index.drop(connection)
+    if indexes:
+        logger.info(f'Dropped indexes {[index.name for index in indexes]} for the load')
+    return indexes
+
+
+def _create_indexes(indexes: list[Index]) -> None:
+    """Reconstruye los índices eliminados antes de la carga."""
+    start = time.perf_counter()
+    with get_engine().begin() as connection:
+        for index in indexes:
+            index.create(connection)
+    logger.info(f'Rebuilt {len(indexes)} indexes in {time.perf_counter() - start:.1f}s')
+
+
+@logger.catch(reraise=True)
+def main() -> None:
+    """
+    Interpreta los argumentos de línea de comandos y lanza la ingesta.
+
+    Los errores se registran en el log y se relanzan, de modo que una
+    carga fallida termina con código distinto de cero.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--batch-size', type=int, default=db_settings.db_chunksize)
+    parser.add_argument(
+        '--mode', choices=('upsert', 'append'), default='upsert',
+        help='append rejects addresses already in the table once the unique address index exists',
+    )
+    parser.add_argument('--rebuild-indexes', action='store_true')
+    parser.add_argument('--dedupe', action='store_true')
+    args = parser.parse_args()
+
+    logger.info(f'running the bulk ingestion of {args.path}...')
+    ingest_file(
+        args.path,
+        batch_size=args.batch_size,
+        mode=args.mode,
+        rebuild_indexes=args.rebuild_indexes,
+        dedupe=args.dedupe,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Formato de artefacto de modelo sin pickle y mapeado en memoria.
+
+Un artefacto es un directorio `<model_name>.forest/` que contiene:
+- `manifest.json`: versión de formato, nombres de features,
+  hiperparámetros, score R², dimensiones del bosque y hash de contenido.
+- Un archivo `.npy` por cada array de `FlatForest` (`feature`,
+  `threshold`, `children`, `value`, `roots`).
+
+`<model_name>.forest` es un enlace simbólico a un directorio versionado
+oculto (`.<model_name>.forest.v<timestamp>`); `save_artifact` escribe
+una versión nueva y sustituye el enlace con `os.replace`, de modo que el
+artefacto existe en todo momento y los lectores ven la versión anterior
+o la nueva, nunca un hueco.
+
+Los arrays se abren con `mmap_mode='r'`, por lo que cargar un artefacto
+solo lee el manifiesto y N procesos de serving comparten una única copia
+del bosque en la page cache del sistema operativo. Los modelos `.pkl`
+existentes pueden convertirse con `convert_pickle`.
+
+Uso típico:
+    >>> python -m model.artifact model/models/rf_db_v2
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle as pk
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from model.flat_forest import FlatForest
+
+FORMAT_VERSION = 1
+ARTIFACT_SUFFIX = '.forest'
+MANIFEST_NAME = 'manifest.json'
+ARRAY_NAMES = ('feature', 'threshold', 'children', 'value', 'roots')
+# Permisos del directorio de cada versión: `mkdtemp` lo crea con 0700 y el
+# artefacto se comparte con workers que pueden correr con otro usuario.
+ARTIFACT_DIR_MODE = 0o755
+
+
+def artifact_path_for(model_path: str | Path, variant: str | None = None) -> Path:
+    """
+    Devuelve la ruta del artefacto asociado a la ruta de un modelo.
+
+    Parameters
+    ----------
+    model_path : str | Path
+        Ruta del modelo pickle (ej. `model/models/rf_db_v2`).
+    variant : str | None, default=None
+        Variante del artefacto (ej. `fast`, ver
+        `model.pipeline.compression`). `None` y `accurate` son el bosque
+        completo.
+
+    Returns
+    -------
+    Path
+        Ruta del directorio del artefacto (ej. `model/models/rf_db_v2.forest`
+        o `model/models/rf_db_v2.fast.forest`).
+    """
+    model_path = Path(model_path)
+    infix = '' if variant in (None, 'accurate') else f'.{variant}'
+    return model_path.with_name(model_path.name + infix + ARTIFACT_SUFFIX)
+
+
+def content_hash(forest: FlatForest) -> str:
+    """
+    Calcula el hash SHA-256 del contenido de los arrays del bosque.
+
+    Parameters
+    ----------
+    forest : FlatForest
+        Bosque aplanado.
+
+    Returns
+    -------
+    str
+        Hash hexadecimal del contenido.
+    """
+    digest = hashlib.sha256()
+    for name in ARRAY_NAMES:
+        array = np.ascontiguousarray(getattr(forest, name))
+        digest.update(name.encode())
+        digest.update(str(array.dtype).encode())
+        digest.update(str(array.shape).encode())
+        digest.update(array.data)
+    return digest.hexdigest()
+
+
+def save_artifact(
+        forest: FlatForest,
+        path: str | Path,
+        hyperparameters: dict | None = None,
+        r2_score: float | None = None,
+        extra: dict | None = None,
+    ) -> dict:
+    """
+    Guarda un bosque aplanado como artefacto versionado.
+
+    El artefacto se escribe en un directorio temporal junto al destino, se
+    renombra como versión nueva y se publica sustituyendo el enlace `path`
+    con `os.replace`: los lectores nunca ven un artefacto a medio escribir
+    ni un momento sin artefacto. Se conserva la versión reemplazada, por
+    si algún lector la estaba abriendo, y se eliminan las anteriores. Un
+    artefacto antiguo que sea un directorio real se migra a una versión
+    la primera vez, con un único hueco entre ambos renombrados.
+
+    Parameters
+    ----------
+    forest : FlatForest
+        Bosque aplanado a persistir.
+    path : str | Path
+        Directorio destino del artefacto.
+    hyperparameters : dict | None, default=None
+        Hiperparámetros del modelo original.
+    r2_score : float | None, default=None
+        Score R² obtenido en el conjunto de test.
+    extra : dict | None, default=None
+        Campos adicionales del manifiesto (ej. el informe de compresión de
+        una variante).
+
+    Returns
+    -------
+    dict
+        Manifiesto escrito junto a los arrays.
+    """
+    path = Path(path)
+    logger.info(f'saving the model artifact to a directory: {path}')
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'feature_names': None if forest.feature_names_in_ is None
+            else [str(name) for name in forest.feature_names_in_],
+        'hyperparameters': _jsonable(hyperparameters or {}),
+        'r2_score': r2_score,
+        'n_trees': forest.n_trees,
+        'n_nodes': forest.n_nodes,
+        'max_depth': forest.max_depth,
+        'content_hash': content_hash(forest),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        **(extra or {}),
+        'arrays': {},
+    }
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f'.{path.name}.tmp.', dir=path.parent))
+    try:
+        os.chmod(tmp_dir, ARTIFACT_DIR_MODE)
+        for name in ARRAY_NAMES:
+            array = np.ascontiguousarray(getattr(forest, name))
+            np.save(tmp_dir / f'{name}.npy', array, allow_pickle=False)
+            manifest['arrays'][name] = {'dtype': str(array.dtype), 'shape': list(array.shape)}
+        (tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+        version_dir = _new_version_dir(path)
+        tmp_dir.rename(version_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    if path.is_dir() and not path.is_symlink():
+        path.rename(_new_version_dir(path))
+    replaced = path.resolve() if path.is_symlink() else None
+    _publish(path, version_dir)
+    _remove_old_versions(path, keep={version_dir, replaced})
+    return manifest
+
+
+def _new_version_dir(path: Path) -> Path:
+    """Devuelve un nombre de versión nuevo, ordenable por antigüedad."""
+    return path.with_name(f'.{path.name}.v{time.time_ns():020d}-{os.getpid()}')
+
+
+def _publish(path: Path, version_dir: Path) -> None:
+    """Apunta el enlace `path` a `version_dir` de forma atómica."""
+    tmp_link = path.with_name(f'.{path.name}.link.{os.getpid()}')
+    tmp_link.unlink(missing_ok=True)
+    tmp_link.symlink_to(version_dir.name, target_is_directory=True)
+    os.replace(tmp_link, path)
+
+
+def _remove_old_versions(path: Path, keep: set[Path | None]) -> None:
+    """Elimina las versiones del artefacto que no están en `keep`."""
+    keep = {version.resolve() for version in keep if version is not None}
+    for version in path.parent.glob(f'.{path.name}.v*'):
+        if version.resolve() not in keep:
+            shutil.rmtree(version, ignore_errors=True)
+
+
+def load_manifest(path: str | Path) -> dict:
+    """
+    Lee y valida el manifiesto de un artefacto.
+
+    Parameters
+    ----------
+    path : str | Path
+        Directorio del artefacto.
+
+    Returns
+    -------
+    dict
+        Manifiesto del artefacto.
+
+    Raises
+    ------
+    ValueError
+        Si la versión de formato no es compatible.
+    """
+    manifest = json.loads((Path(path).resolve() / MANIFEST_NAME).read_text())
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(
+            f'Versión de artefacto no soportada: {manifest.get("format_version")} '
+            f'(se esperaba {FORMAT_VERSION}).'
+        )
+    return manifest
+
+
+def load_artifact(
+        path: str | Path,
+        mmap: bool = True,
+        verify: bool = True,
+    ) -> tuple[FlatForest, dict]:
+    """
+    Carga un artefacto, mapeando sus arrays en memoria.
+
+    El enlace del artefacto se resuelve una única vez, de modo que el
+    manifiesto y los arrays se leen de la misma versión aunque otra se
+    publique durante la carga.
+
+    Parameters
+    ----------
+    path : str | Path
+        Directorio del artefacto.
+    mmap : bool, default=True
+        Si es `True` los arrays se abren con `mmap_mode='r'`; si es
+        `False` se leen completos en memoria privada.
+    verify : bool, default=True
+        Si es `True` se comprueba el `content_hash` del manifiesto. Obliga
+        a leer los arrays una vez, lo que también los carga en la page
+        cache.
+
+    Returns
+    -------
+    tuple[FlatForest, dict]
+        Bosque aplanado y manifiesto del artefacto.
+
+    Raises
+    ------
+    ValueError
+        Si la versión, la forma de los arrays o el hash de contenido no
+        coinciden con el manifiesto.
+    """
+    path = Path(path).resolve()
+    manifest = load_manifest(path)
+    arrays = {}
+    for name in ARRAY_NAMES:
+        array = np.load(path / f'{name}.npy', mmap_mode='r' if mmap else None, allow_pickle=False)
+        expected = manifest['arrays'][name]
+        if list(array.shape) != expected['shape'] or str(array.dtype) != expected['dtype']:
+            raise ValueError(f'El array {name} del artefacto {path} no coincide con el manifiesto.')
+        arrays[name] = array
+
+    feature_names = manifest['feature_names']
+    forest = FlatForest(
+        **arrays,
+        max_depth=manifest['max_depth'],
+        feature_names_in_=None if feature_names is None else np.asarray(feature_names, dtype=str),
+    )
+    if verify and content_hash(forest) != manifest['content_hash']:
+        raise ValueError(f'El contenido del artefacto {path} no coincide con el hash del manifiesto.')
+    return forest, manifest
+
+
+def convert_pickle(
+        pickle_path: str | Path,
+        path: str | Path | None = None,
+        r2_score: float | None = None,
+    ) -> dict:
+    """
+    Convierte un modelo `RandomForestRegressor` en pickle a artefacto.
+
+    Parameters
+    ----------
+    pickle_path : str | Path
+        Ruta del modelo serializado con pickle.
+    path : str | Path | None, default=None
+        Directorio destino. Por defecto, `artifact_path_for(pickle_path)`.
+    r2_score : float | None, default=None
+        Score R² a registrar en el manifiesto, si se conoce.
+
+    Returns
+    -------
+    dict
+        Manifiesto del artefacto generado.
+    """
+    from model.pipeline.model import export_flat_forest
+
+    pickle_path = Path(pickle_path)
+    logger.info(f'Converting pickled model {pickle_path} to an artifact')
+    with pickle_path.open('rb') as file:
+        model = pk.load(file)
+    return save_artifact(
+        export_flat_forest(model),
+        path or artifact_path_for(pickle_path),
+        hyperparameters=model.get_params(),
+        r2_score=r2_score,
+    )
+
+
+def _jsonable(params: dict) -> dict:
+    """Filtra los hiperparámetros que pueden serializarse como JSON."""
+    return {
+        key: value for key, value in params.items()
+        if value is None or isinstance(value, (bool, int, float, str))
+    }
+
+
+def main() -> None:
+    """Convierte desde la línea de comandos un modelo pickle a artefacto."""
+    parser = argparse.ArgumentParser(description='Convierte un modelo pickle a artefacto.')
+    parser.add_argument('pickle_path', type=Path)
+    parser.add_argument('--output', type=Path, default=None)
+    args = parser.parse_args()
+    manifest = convert_pickle(args.pickle_path, args.output)
+    logger.info(f'Converted {args.pickle_path}: {json.dumps(manifest)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""
+Micro-batching asíncrono de peticiones de inferencia.
+
+Este módulo contiene la clase `MicroBatcher`, que recibe peticiones
+concurrentes de una sola fila, las encola y las agrupa en micro-lotes
+limitados por tamaño máximo y tiempo máximo de espera. Cada micro-lote se
+evalúa con una única llamada a `ModelService.predict_batch` en un hilo de
+trabajo, de modo que el event loop nunca queda bloqueado por el modelo.
+
+También expone métricas de profundidad de cola, tamaño de lote y
+percentiles de latencia por petición.
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from loguru import logger
+
+from model.model_service import ModelService
+
+
+class LatencyStats:
+    """
+    Ventana deslizante de muestras numéricas con percentiles.
+
+    Attributes
+    ----------
+    count : int
+        Número total de muestras registradas desde el inicio.
+    """
+
+    def __init__(self, window: int) -> None:
+        """Inicializa la ventana con capacidad para `window` muestras."""
+        self._samples: deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        """Registra una nueva muestra."""
+        self._samples.append(value)
+        self.count += 1
+
+    def percentiles(self, quantiles: tuple[float, ...] = (50, 90, 99)) -> dict:
+        """
+        Calcula los percentiles de las muestras de la ventana.
+
+        Parameters
+        ----------
+        quantiles : tuple[float, ...], default=(50, 90, 99)
+            Percentiles a calcular.
+
+        Returns
+        -------
+        dict
+            Diccionario `{'p50': valor, ...}`. Vacío si no hay muestras.
+        """
+        if not self._samples:
+            return {}
+        values = np.percentile(np.fromiter(self._samples, dtype=np.float64), quantiles)
+        return {f'p{q:g}': float(v) for q, v in zip(quantiles, values)}
+
+
+class MicroBatcher:
+    """
+    Agrupa peticiones concurrentes en micro-lotes para el modelo.
+
+    Attributes
+    ----------
+    service : ModelService
+        Servicio con el modelo ya cargado.
+    max_batch_size : int
+        Número máximo de peticiones por micro-lote.
+    max_wait : float
+        Tiempo máximo, en segundos, que se espera para completar un lote
+        desde que llega su primera petición.
+    """
+
+    def __init__(
+            self,
+            service: ModelService,
+            max_batch_size: int,
+            max_wait_ms: float,
+            max_queue_size: int = 0,
+            latency_window: int = 10_000,
+        ) -> None:
+        """
+        Inicializa el micro-batcher.
+
+        Parameters
+        ----------
+        service : ModelService
+            Servicio con el modelo ya cargado.
+        max_batch_size : int
+            Número máximo de peticiones por micro-lote.
+        max_wait_ms : float
+            Tiempo máximo de espera en milisegundos para completar un lote.
+        max_queue_size : int, default=0
+            Capacidad de la cola (0 = ilimitada).
+        latency_window : int, default=10_000
+            Número de muestras recientes usadas para las métricas.
+        """
+        self.service = service
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='predict')
+        self._worker: asyncio.Task | None = None
+        self.latency = LatencyStats(latency_window)
+        self.batch_sizes = LatencyStats(latency_window)
+
+    async def start(self) -> None:
+        """Arranca la tarea que consume la cola y ejecuta los lotes."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Detiene la tarea de trabajo y libera el hilo del modelo."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, features: Mapping) -> float:
+        """
+        Encola una petición de una fila y espera su predicción.
+
+        Parameters
+        ----------
+        features : Mapping
+            Observación como diccionario `{feature: valor}`.
+
+        Returns
+        -------
+        float
+            Predicción del modelo para la observación.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future, time.perf_counter()))
+        return await future
+
+    def metrics(self) -> dict:
+        """
+        Devuelve las métricas actuales del micro-batcher.
+
+        Returns
+        -------
+        dict
+            Profundidad de cola, peticiones y lotes procesados, tamaño de
+            lote y percentiles de latencia en ms.
+        """
+        return {
+            'queue_depth': self._queue.qsize(),
+            'requests': self.latency.count,
+            'batches': self.batch_sizes.count,
+            'batch_size': self.batch_sizes.percentiles((50, 99, 100)),
+            'latency_ms': self.latency.percentiles(),
+        }
+
+    async def _collect(self) -> list[tuple]:
+        """Espera la primera petición y completa el lote hasta su límite."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        """Bucle principal: agrupa peticiones y las evalúa por lotes."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            rows = [features for features, _, _ in batch]
+            try:
+                predictions = await loop.run_in_executor(
+                    self._executor, self.service.predict_batch, rows,
+                )
+            except Exception as error:
+                if len(batch) == 1:
+                    logger.exception('Error al evaluar un micro-lote')
+                    self._fail(batch[0][1], error)
+                    continue
+                # Una fila inválida no debe hacer fallar al resto del lote:
+                # se reevalúa fila a fila y solo falla la petición culpable.
+                logger.warning(
+                    f'Error al evaluar un micro-lote de {len(batch)} filas ({error}); '
+                    'reevaluando fila a fila'
+                )
+                predictions = await loop.run_in_executor(self._executor, self._predict_rows, rows)
+
+            finished = time.perf_counter()
+            self.batch_sizes.add(len(batch))
+            for (_, future, enqueued), prediction in zip(batch, predictions):
+                if isinstance(prediction, Exception):
+                    self._fail(future, prediction)
+                    continue
+                self.latency.add((finished - enqueued) * 1000)
+                if not future.done():
+                    future.set_result(float(prediction))
+
+    def _predict_rows(self, rows: list[Mapping]) -> list[float | Exception]:
+        """Evalúa cada fila por separado, devolviendo la excepción de las que fallan."""
+        predictions = []
+        for row in rows:
+            try:
+                predictions.append(self.service.predict_batch([row])[0])
+            except Exception as error:
+                logger.exception('Error al evaluar una petición')
+                predictions.append(error)
+        return predictions
+
+    @staticmethod
+    def _fail(future: asyncio.Future, error: Exception) -> None:
+        """Propaga el error a la petición si sigue esperando."""
+        if not future.done():
+            future.set_exception(error)
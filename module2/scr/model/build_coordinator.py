@@ -0,0 +1,242 @@
+"""
+Coordinación de la construcción del modelo entre procesos.
+
+Cuando un proceso de inferencia no encuentra el modelo configurado, en
+lugar de entrenarlo en línea delega en `BuildCoordinator`:
+- Un lock de archivo (`<modelo>.build.lock`) garantiza que solo un
+  proceso entrena; el lock lo mantiene el propio proceso de construcción
+  y el sistema lo libera si este muere.
+- El entrenamiento se ejecuta en un proceso en segundo plano
+  (`python -m model.build_coordinator`) que publica su progreso por etapas
+  en `<modelo>.build.json`. Su salida estándar y de errores se añade a
+  `<modelo>.build.log`, de modo que un fallo anterior a la configuración
+  del logging (ej. un error de importación o un `.env` inválido) deja
+  rastro.
+- `build_model` escribe cada archivo en un temporal y lo renombra, y el
+  pickle se escribe el último, de modo que su existencia indica que el
+  modelo está completo.
+
+El resto de procesos esperan con `wait` o sirven un modelo de respaldo
+mientras tanto (ver `ModelService.load_model`).
+
+Uso típico:
+    >>> python -m model.build_coordinator rf_db_v2
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from loguru import logger
+
+BUILD_LOCK_SUFFIX = '.build.lock'
+BUILD_PROGRESS_SUFFIX = '.build.json'
+BUILD_LOG_SUFFIX = '.build.log'
+
+
+class BuildCoordinator:
+    """
+    Coordina la construcción en segundo plano de un modelo.
+
+    Attributes
+    ----------
+    model_path : Path
+        Ruta del pickle del modelo; su existencia marca el modelo como listo.
+    lock_path : Path
+        Archivo sobre el que el proceso de construcción mantiene el lock.
+    progress_path : Path
+        Archivo JSON con el estado y la etapa de la construcción.
+    log_path : Path
+        Archivo al que se añade la salida del proceso de construcción.
+    """
+
+    def __init__(self, model_path: str | Path) -> None:
+        """
+        Inicializa el coordinador del modelo en `model_path`.
+
+        Parameters
+        ----------
+        model_path : str | Path
+            Ruta del pickle del modelo a construir.
+        """
+        self.model_path = Path(model_path)
+        self.lock_path = self.model_path.with_name(self.model_path.name + BUILD_LOCK_SUFFIX)
+        self.progress_path = self.model_path.with_name(self.model_path.name + BUILD_PROGRESS_SUFFIX)
+        self.log_path = self.model_path.with_name(self.model_path.name + BUILD_LOG_SUFFIX)
+
+    def is_ready(self) -> bool:
+        """Indica si el modelo ya está construido."""
+        return self.model_path.exists()
+
+    def is_building(self) -> bool:
+        """Indica si algún proceso mantiene el lock de construcción."""
+        with open(self.lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return False
+
+    def progress(self) -> dict | None:
+        """Devuelve el último estado publicado por la construcción, si existe."""
+        try:
+            return json.loads(self.progress_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def start_build(self) -> subprocess.Popen | None:
+        """
+        Lanza la construcción en un proceso en segundo plano si hace falta.
+
+        Si dos procesos la lanzan a la vez, solo uno obtiene el lock y el
+        otro termina sin entrenar.
+
+        Returns
+        -------
+        subprocess.Popen | None
+            Proceso de construcción lanzado, o `None` si el modelo ya existe
+            o se está construyendo.
+        """
+        if self.is_ready() or self.is_building():
+            return None
+        logger.info(f'Launching a background build of {self.model_path} (output in {self.log_path})')
+        with open(self.log_path, 'ab') as log_file:
+            return subprocess.Popen(
+                [sys.executable, '-m', 'model.build_coordinator', self.model_path.name],
+                stdin=subprocess.DEVNULL,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+
+    def wait(self, timeout: float | None = None, poll_seconds: float = 1.0) -> None:
+        """
+        Espera a que el modelo esté construido, lanzando la construcción si nadie lo hace.
+
+        Si ningún proceso tiene el lock (la construcción no empezó o su
+        proceso murió) se lanza una nueva; si la lanzada por esta espera
+        termina sin modelo, se propaga el error publicado.
+
+        Parameters
+        ----------
+        timeout : float | None, default=None
+            Segundos máximos de espera; `None` espera indefinidamente.
+        poll_seconds : float, default=1.0
+            Intervalo entre comprobaciones del progreso.
+
+        Raises
+        ------
+        RuntimeError
+            Si la construcción lanzada por esta espera termina con error.
+        TimeoutError
+            Si el modelo no está listo antes de `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        process = None
+        last_stage = None
+        while not self.is_ready():
+            if process is not None and process.poll() is not None:
+                if self.is_ready():
+                    break
+                if not self.is_building():
+                    error = (self.progress() or {}).get('error') or 'sin error publicado'
+                    raise RuntimeError(
+                        f'La construcción de {self.model_path} falló: {error} '
+                        f'(salida en {self.log_path})'
+                    )
+                # Otro proceso obtuvo el lock antes que el nuestro.
+                process = None
+            if process is None:
+                process = self.start_build()
+            stage = (self.progress() or {}).get('stage')
+            if stage != last_stage:
+                last_stage = stage
+                logger.info(f'Waiting for {self.model_path.name}: stage {stage}')
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f'El modelo {self.model_path} no se construyó en {timeout}s.')
+            time.sleep(poll_seconds)
+
+    def run_build(self) -> bool:
+        """
+        Construye el modelo en el proceso actual manteniendo el lock.
+
+        Returns
+        -------
+        bool
+            `True` si este proceso construyó el modelo; `False` si ya
+            estaba construido u otro proceso tenía el lock.
+        """
+        with open(self.lock_path, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                logger.info(f'Another process is already building {self.model_path}')
+                return False
+            if self.is_ready():
+                return False
+
+            from model.instrumentation import profiling
+            from model.pipeline.model import build_model
+            from model.pipeline.resources import add_stage_listener
+
+            started_at = time.time()
+            stages: dict[str, float] = {}
+
+            def publish(status: str, stage: str | None = None, error: str | None = None) -> None:
+                self._write_progress({
+                    'status': status,
+                    'stage': stage,
+                    'stages': stages,
+                    'pid': os.getpid(),
+                    'started_at': started_at,
+                    'updated_at': time.time(),
+                    'error': error,
+                })
+
+            def on_stage(name: str, elapsed: float | None) -> None:
+                if elapsed is None:
+                    publish('running', stage=name)
+                else:
+                    stages[name] = round(elapsed, 3)
+
+            add_stage_listener(on_stage)
+            publish('running')
+            logger.info(f'Building {self.model_path} in process {os.getpid()}')
+            try:
+                with profiling('build_model'):
+                    build_model()
+            except Exception as error:
+                publish('failed', error=repr(error))
+                raise
+            publish('done')
+            logger.info(f'Built {self.model_path} in {time.time() - started_at:.1f}s')
+            return True
+
+    def _write_progress(self, state: dict) -> None:
+        """Publica el estado de la construcción de forma atómica."""
+        tmp_path = self.progress_path.with_name(f'.{self.progress_path.name}.tmp')
+        tmp_path.write_text(json.dumps(state))
+        os.replace(tmp_path, self.progress_path)
+
+
+@logger.catch(reraise=True)
+def main() -> None:
+    """Construye el modelo indicado en línea de comandos con el lock de construcción."""
+    from config import model_settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('model_name', nargs='?', default=model_settings.model_name)
+    args = parser.parse_args()
+    # `build_model` guarda el modelo con el nombre configurado.
+    model_settings.model_name = args.model_name
+    BuildCoordinator(Path(model_settings.model_path) / args.model_name).run_build()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Caché en proceso de predicciones del modelo.
+
+Este módulo contiene la clase `PredictionCache`, una caché LRU con
+expiración por TTL cuyas claves son un hash canónico del vector de
+features ordenado. La caché queda asociada al hash de contenido del modelo
+cargado, de forma que cargar un modelo distinto la invalida
+automáticamente.
+"""
+
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Coste aproximado en bytes de una entrada del OrderedDict (nodo, tupla y
+# marca de tiempo) además de la clave y el valor.
+_ENTRY_OVERHEAD = 120
+
+
+class PredictionCache:
+    """
+    Caché LRU + TTL de predicciones indexada por vector de features.
+
+    Attributes
+    ----------
+    max_entries : int | None
+        Número máximo de entradas. `None` para no limitar por entradas.
+    max_bytes : int | None
+        Tamaño máximo aproximado en bytes. `None` para no limitar por bytes.
+    ttl_seconds : float | None
+        Tiempo de vida de cada entrada. `None` para no expirar.
+    model_hash : str | None
+        Hash de contenido del modelo al que pertenecen las entradas.
+    hits, misses, evictions, expirations : int
+        Contadores de uso de la caché.
+    """
+
+    def __init__(
+            self,
+            max_entries: int | None = 100_000,
+            max_bytes: int | None = None,
+            ttl_seconds: float | None = None,
+        ) -> None:
+        """
+        Inicializa una caché vacía.
+
+        Parameters
+        ----------
+        max_entries : int | None, default=100_000
+            Número máximo de entradas.
+        max_bytes : int | None, default=None
+            Tamaño máximo aproximado en bytes.
+        ttl_seconds : float | None, default=None
+            Tiempo de vida de cada entrada en segundos.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.model_hash: str | None = None
+        self._entries: OrderedDict[bytes, tuple[float, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def keys_for(matrix: np.ndarray) -> list[bytes]:
+        """
+        Calcula la clave canónica de cada fila de una matriz de features.
+
+        Las filas se normalizan a float64 contiguo (y `-0.0` a `0.0`) antes
+        de calcular el hash, de modo que un mismo vector produce la misma
+        clave independientemente del tipo con el que llegó.
+
+        Parameters
+        ----------
+        matrix : np.ndarray
+            Matriz `(n_filas, n_features)` en el orden de entrenamiento.
+
+        Returns
+        -------
+        list[bytes]
+            Una clave por fila.
+        """
+        canonical = np.ascontiguousarray(matrix, dtype=np.float64) + 0.0
+        return [
+            hashlib.blake2b(row.tobytes(), digest_size=16).digest()
+            for row in canonical
+        ]
+
+    def bind(self, model_hash: str) -> None:
+        """
+        Asocia la caché a un modelo, vaciándola si el modelo ha cambiado.
+
+        Parameters
+        ----------
+        model_hash : str
+            Hash de contenido del modelo cargado.
+        """
+        with self._lock:
+            if model_hash != self.model_hash:
+                self._entries.clear()
+                self._bytes = 0
+                self.model_hash = model_hash
+
+    def get_many(
+            self,
+            keys: list[bytes],
+            model_hash: str | None = None,
+        ) -> list[float | None]:
+        """
+        Busca varias claves, devolviendo `None` para los fallos.
+
+        Parameters
+        ----------
+        keys : list[bytes]
+            Claves calculadas con `keys_for`.
+        model_hash : str | None, default=None
+            Modelo que evalúa el lote. Si la caché está asociada a otro
+            modelo, todas las claves se tratan como fallos.
+
+        Returns
+        -------
+        list[float | None]
+            Predicción cacheada o `None` por cada clave.
+        """
+        now = time.monotonic()
+        values: list[float | None] = []
+        with self._lock:
+            if model_hash is not None and model_hash != self.model_hash:
+                self.misses += len(keys)
+                return [None] * len(keys)
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl_seconds is not None \
+                        and now - entry[1] > self.ttl_seconds:
+                    self._remove(key)
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[0])
+        return values
+
+    def put_many(
+            self,
+            keys: list[bytes],
+            values: np.ndarray,
+            model_hash: str | None = None,
+        ) -> None:
+        """
+        Inserta varias predicciones, desalojando las menos usadas.
+
+        Parameters
+        ----------
+        keys : list[bytes]
+            Claves calculadas con `keys_for`.
+        values : np.ndarray
+            Predicción correspondiente a cada clave.
+        model_hash : str | None, default=None
+            Modelo que calculó las predicciones. Si la caché ya está
+            asociada a otro modelo, las predicciones se descartan.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if model_hash is not None and model_hash != self.model_hash:
+                return
+            for key, value in zip(keys, values):
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (float(value), now)
+                self._bytes += self._entry_size(key)
+            self._evict()
+
+    def clear(self) -> None:
+        """Vacía la caché sin reiniciar los contadores."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Devuelve los contadores y la ocupación actual de la caché.
+
+        Returns
+        -------
+        dict
+            Aciertos, fallos, tasa de acierto, desalojos, expiraciones,
+            entradas y bytes aproximados.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'model_hash': self.model_hash,
+            }
+
+    @staticmethod
+    def _entry_size(key: bytes) -> int:
+        """Estima el tamaño en bytes de una entrada."""
+        return sys.getsizeof(key) + _ENTRY_OVERHEAD
+
+    def _remove(self, key: bytes) -> None:
+        """Elimina una entrada. Debe llamarse con el lock adquirido."""
+        del self._entries[key]
+        self._bytes -= self._entry_size(key)
+
+    def _evict(self) -> None:
+        """Desaloja entradas LRU hasta cumplir los límites configurados."""
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, _ = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(key)
+            self.evictions += 1
@@ -0,0 +1,152 @@
+"""
+Motor de inferencia vectorizado para bosques aplanados.
+
+Este módulo contiene la clase `FlatForest`, que representa todos los
+árboles de un `RandomForestRegressor` como arrays contiguos de NumPy
+(feature, umbral, hijos izquierdo/derecho y valor de hoja) y los recorre
+para lotes completos nivel a nivel, sin pasar por el despacho genérico
+por árbol de scikit-learn.
+
+En los arrays aplanados las hojas apuntan a sí mismas como hijos, de modo
+que el recorrido puede avanzar `max_depth` niveles sin ramas: una fila que
+ya ha llegado a su hoja permanece en ella.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class FlatForest:
+    """
+    Bosque de regresión aplanado en arrays contiguos.
+
+    Attributes
+    ----------
+    feature : np.ndarray
+        Índice de la feature evaluada en cada nodo (int32, 0 en hojas).
+    threshold : np.ndarray
+        Umbral de cada nodo (float64, o float32 en las variantes
+        comprimidas; +inf en hojas).
+    children : np.ndarray
+        Índices globales `(n_nodos, 2)` de los hijos izquierdo y derecho de
+        cada nodo (int32, el propio nodo en hojas). Se guardan intercalados
+        para resolver el siguiente nodo con un único acceso por nivel.
+    value : np.ndarray
+        Valor de predicción de cada nodo (float64, o float32 en las
+        variantes comprimidas).
+    roots : np.ndarray
+        Índice global de la raíz de cada árbol (int32).
+    max_depth : int
+        Profundidad máxima entre todos los árboles.
+    feature_names_in_ : np.ndarray | None
+        Nombres de las features en el orden de entrenamiento.
+    block_rows : int
+        Número de filas recorridas a la vez; acota la memoria intermedia
+        a `n_trees * block_rows` índices.
+    """
+
+    feature: np.ndarray
+    threshold: np.ndarray
+    children: np.ndarray
+    value: np.ndarray
+    roots: np.ndarray
+    max_depth: int
+    feature_names_in_: np.ndarray | None = None
+    block_rows: int = 4096
+
+    @property
+    def n_trees(self) -> int:
+        """Número de árboles del bosque."""
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        """Número total de nodos del bosque."""
+        return len(self.feature)
+
+    @property
+    def children_left(self) -> np.ndarray:
+        """Índice global del hijo izquierdo de cada nodo."""
+        return self.children[:, 0]
+
+    @property
+    def children_right(self) -> np.ndarray:
+        """Índice global del hijo derecho de cada nodo."""
+        return self.children[:, 1]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predice un lote de observaciones recorriendo todos los árboles.
+
+        Las features se convierten a float32 antes de compararlas con los
+        umbrales, igual que hace scikit-learn, para obtener exactamente las
+        mismas decisiones de partición.
+
+        Parameters
+        ----------
+        X : np.ndarray
+            Matriz `(n_filas, n_features)` en el orden de entrenamiento.
+
+        Returns
+        -------
+        np.ndarray
+            Predicción media de los árboles para cada fila.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        return self.partial_sum(X, slice(None)) / self.n_trees
+
+    def partial_sum(self, X: np.ndarray, trees: slice) -> np.ndarray:
+        """
+        Suma las predicciones de un subconjunto de árboles.
+
+        Permite repartir los árboles entre varios hilos y reducir después
+        las sumas parciales (ver `model.inference`).
+
+        Parameters
+        ----------
+        X : np.ndarray
+            Matriz `(n_filas, n_features)` en el orden de entrenamiento.
+        trees : slice
+            Árboles a evaluar, por posición.
+
+        Returns
+        -------
+        np.ndarray
+            Suma de las predicciones de esos árboles para cada fila.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        roots = self.roots[trees]
+        sums = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], self.block_rows):
+            stop = start + self.block_rows
+            sums[start:stop] = self._predict_block(X[start:stop], roots)
+        return sums
+
+    def _predict_block(self, X: np.ndarray, roots: np.ndarray) -> np.ndarray:
+        """
+        Recorre nivel a nivel los árboles de `roots` para un bloque de filas.
+
+        `nodes` guarda el nodo actual de cada par (árbol, fila). En cada
+        nivel se lee la feature de cada fila desde la matriz traspuesta y
+        aplanada, y el hijo se obtiene de `children` con el índice
+        `2 * nodo + (valor > umbral)`. Devuelve la suma por fila de los
+        valores de hoja.
+        """
+        n_rows = X.shape[0]
+        columns_first = np.ascontiguousarray(X.T).ravel()
+        columns = np.arange(n_rows, dtype=np.int32)
+        children = self.children.reshape(-1)
+        nodes = np.repeat(roots[:, None], n_rows, axis=1)
+
+        for _ in range(self.max_depth):
+            values = columns_first.take(self.feature.take(nodes) * np.int32(n_rows) + columns)
+            nodes = children.take(2 * nodes + (values > self.threshold.take(nodes)))
+        return self.value.take(nodes).sum(axis=0, dtype=np.float64)
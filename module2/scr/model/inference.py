@@ -0,0 +1,158 @@
+"""
+Ejecutor de inferencia en paralelo con un pool de hilos persistente.
+
+Este módulo contiene `InferenceExecutor`, que reparte la evaluación de un
+lote grande entre los hilos de un pool creado una única vez (en
+`ModelService.load_model`), en lugar de depender del `n_jobs` con el que
+se guardó el bosque, que en cada llamada despacha de nuevo con joblib.
+El recorrido de los árboles libera el GIL (tanto en los árboles Cython de
+scikit-learn como en las operaciones vectorizadas de `FlatForest`), por lo
+que los hilos se ejecutan realmente en paralelo.
+
+El lote se reparte de una de dos formas (`model_settings.inference_split`):
+- `rows`: bloques de filas; cada hilo evalúa el bosque completo sobre su
+  bloque.
+- `trees`: subconjuntos de árboles; cada hilo suma las predicciones de sus
+  árboles sobre todas las filas y las sumas parciales se reducen al final.
+  Conviene con pocos lotes muy grandes y bosques con muchos árboles.
+
+Los lotes con menos de `model_settings.inference_parallel_min_rows` filas
+se evalúan en el hilo que llama, sin coste de despacho.
+"""
+
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
+
+import numpy as np
+from loguru import logger
+
+from model.flat_forest import FlatForest
+
+
+class InferenceExecutor:
+    """
+    Reparte la predicción de lotes grandes entre un pool de hilos persistente.
+
+    Attributes
+    ----------
+    workers : int
+        Hilos que evalúan un lote, incluido el que llama.
+    min_rows : int
+        Filas a partir de las cuales un lote se reparte.
+    split : str
+        Reparto del lote: `rows` o `trees`.
+    """
+
+    def __init__(
+            self,
+            workers: int,
+            min_rows: int,
+            split: Literal['rows', 'trees'] = 'rows',
+        ) -> None:
+        """
+        Inicializa el ejecutor y su pool de hilos.
+
+        Parameters
+        ----------
+        workers : int
+            Hilos que evalúan un lote, incluido el que llama. Con 1 no se
+            crea ningún pool.
+        min_rows : int
+            Umbral de filas a partir del cual se reparte un lote.
+        split : {'rows', 'trees'}, default='rows'
+            Reparto del lote entre los hilos.
+        """
+        self.workers = max(1, workers)
+        self.min_rows = min_rows
+        self.split = split
+        # El hilo que llama evalúa una de las partes, así que el pool solo
+        # necesita `workers - 1` hilos.
+        self._pool = (
+            ThreadPoolExecutor(max_workers=self.workers - 1, thread_name_prefix='inference')
+            if self.workers > 1 else None
+        )
+        logger.info(
+            f'Inference executor with {self.workers} workers, '
+            f'split by {split} from {min_rows} rows'
+        )
+
+    @staticmethod
+    def prepare(model: object) -> None:
+        """
+        Desactiva el paralelismo propio del modelo antes de publicarlo.
+
+        Un `RandomForestRegressor` guardado con `n_jobs` distinto de 1 lanza
+        un despacho de joblib en cada `predict`, incluso para una sola fila;
+        el paralelismo lo aporta este ejecutor.
+        """
+        if getattr(model, 'n_jobs', None) not in (None, 1):
+            model.n_jobs = None
+
+    def predict(self, model: object, matrix: np.ndarray) -> np.ndarray:
+        """
+        Evalúa un modelo sobre una matriz, en paralelo si es suficientemente grande.
+
+        Parameters
+        ----------
+        model : RandomForestRegressor | FlatForest
+            Modelo a evaluar.
+        matrix : np.ndarray
+            Matriz float32 contigua en el orden de features del modelo.
+
+        Returns
+        -------
+        np.ndarray
+            Predicción por fila.
+        """
+        n_rows = matrix.shape[0]
+        if self._pool is None or n_rows < self.min_rows:
+            return model.predict(matrix)
+        if self.split == 'trees' and self._tree_count(model) >= self.workers:
+            return self._predict_by_trees(model, matrix)
+        return self._predict_by_rows(model, matrix)
+
+    def shutdown(self) -> None:
+        """Detiene los hilos del pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _map(self, function, parts: list) -> list:
+        """Evalúa `function` sobre cada parte; la primera, en el hilo que llama."""
+        futures = [self._pool.submit(function, part) for part in parts[1:]]
+        return [function(parts[0]), *(future.result() for future in futures)]
+
+    def _predict_by_rows(self, model: object, matrix: np.ndarray) -> np.ndarray:
+        """Evalúa el bosque completo sobre bloques de filas contiguos."""
+        blocks = np.array_split(matrix, min(self.workers, max(1, matrix.shape[0] // 256)))
+        return np.concatenate(self._map(model.predict, blocks))
+
+    def _predict_by_trees(self, model: object, matrix: np.ndarray) -> np.ndarray:
+        """Suma en cada hilo un subconjunto de árboles y reduce las sumas parciales."""
+        n_trees = self._tree_count(model)
+        bounds = np.linspace(0, n_trees, self.workers + 1).astype(int)
+        groups = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+        if isinstance(model, FlatForest):
+            def partial_sum(trees: slice) -> np.ndarray:
+                return model.partial_sum(matrix, trees)
+        else:
+            def partial_sum(trees: slice) -> np.ndarray:
+                total = np.zeros(matrix.shape[0], dtype=np.float64)
+                for tree in model.estimators_[trees]:
+                    total += tree.predict(matrix, check_input=False)
+                return total
+
+        return np.sum(self._map(partial_sum, groups), axis=0) / n_trees
+
+    @staticmethod
+    def _tree_count(model: object) -> int:
+        """Número de árboles del modelo, o 0 si no es un bosque de regresión conocido."""
+        if isinstance(model, FlatForest):
+            return model.n_trees
+        # Un bosque de scikit-learn solo puede existir si sklearn ya está importado.
+        ensemble = sys.modules.get('sklearn.ensemble')
+        if ensemble is not None and isinstance(model, ensemble.RandomForestRegressor):
+            return len(model.estimators_)
+        return 0
@@ -0,0 +1,427 @@
+"""
+Instrumentación ligera del pipeline y de la inferencia.
+
+Este módulo contiene un registro de métricas en memoria, seguro entre
+hilos y sin dependencias externas, con tres series por etapa:
+- `rent_stage_duration_seconds`: histograma de latencia de cada llamada.
+- `rent_stage_rows_total`: filas procesadas.
+- `rent_stage_errors_total`: llamadas que terminaron con una excepción.
+
+Las etapas se instrumentan con el decorador `instrumented` o con el
+context manager `timed`, y las métricas se exportan en el formato de texto
+de Prometheus con `metrics.render()`, en el endpoint `GET /metrics/prometheus`
+del servidor o en `instrumentation_settings.metrics_file` al terminar el
+proceso (por ejemplo, para el textfile collector de node_exporter).
+
+Además, `profiling` envuelve una ejecución completa con el profiler
+configurado en `instrumentation_settings.profiler` (`cprofile` o
+`sampling`) y guarda el perfil en `profile_dir`.
+
+Uso típico:
+    >>> @instrumented('predict_batch', rows=len)
+    ... def predict_batch(self, features): ...
+    >>> with timed('train_model') as stage:
+    ...     stage.rows = len(X_train)
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from loguru import logger
+
+from config import instrumentation_settings
+
+# Límites superiores de los buckets del histograma de latencia, en
+# segundos: desde predicciones de menos de un milisegundo hasta
+# entrenamientos de varios minutos.
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 900.0,
+)
+
+
+class _StageMetrics:
+    """Histograma de latencia y contadores de una etapa."""
+
+    __slots__ = ('buckets', 'seconds', 'calls', 'rows', 'errors')
+
+    def __init__(self, n_buckets: int) -> None:
+        self.buckets = [0] * (n_buckets + 1)
+        self.seconds = 0.0
+        self.calls = 0
+        self.rows = 0
+        self.errors = 0
+
+
+class MetricsRegistry:
+    """
+    Registro en memoria de las métricas de las etapas instrumentadas.
+
+    Attributes
+    ----------
+    buckets : tuple[float, ...]
+        Límites superiores de los buckets del histograma de latencia.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """
+        Inicializa un registro vacío.
+
+        Parameters
+        ----------
+        buckets : tuple[float, ...], default=LATENCY_BUCKETS
+            Límites superiores, crecientes, de los buckets de latencia.
+        """
+        self.buckets = tuple(buckets)
+        self._stages: dict[str, _StageMetrics] = {}
+        self._values: dict[str, tuple[float, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, rows: int = 0, error: bool = False) -> None:
+        """
+        Registra una llamada a una etapa.
+
+        Parameters
+        ----------
+        stage : str
+            Nombre de la etapa.
+        seconds : float
+            Duración de la llamada.
+        rows : int, default=0
+            Filas procesadas por la llamada.
+        error : bool, default=False
+            Si la llamada terminó con una excepción.
+        """
+        bucket = bisect_left(self.buckets, seconds)
+        with self._lock:
+            metrics = self._stages.get(stage)
+            if metrics is None:
+                metrics = self._stages[stage] = _StageMetrics(len(self.buckets))
+            metrics.buckets[bucket] += 1
+            metrics.seconds += seconds
+            metrics.calls += 1
+            metrics.rows += rows
+            metrics.errors += error
+
+    def set_gauge(self, name: str, value: float, help_text: str = '') -> None:
+        """
+        Fija el valor actual de un gauge (ej. la profundidad de la cola).
+
+        Parameters
+        ----------
+        name : str
+            Nombre de la métrica, sin el prefijo `rent_`.
+        value : float
+            Valor actual.
+        help_text : str, default=''
+            Descripción exportada en la línea `# HELP`.
+        """
+        with self._lock:
+            self._values[name] = (float(value), help_text, 'gauge')
+
+    def set_counter(self, name: str, value: float, help_text: str = '') -> None:
+        """
+        Fija el total acumulado de un contador mantenido fuera del registro
+        (ej. las peticiones servidas por el micro-batcher).
+
+        Parameters
+        ----------
+        name : str
+            Nombre de la métrica, sin el prefijo `rent_` ni el sufijo `_total`.
+        value : float
+            Total acumulado; no debe decrecer salvo al reiniciar el proceso.
+        help_text : str, default=''
+            Descripción exportada en la línea `# HELP`.
+        """
+        with self._lock:
+            self._values[f'{name}_total'] = (float(value), help_text, 'counter')
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Devuelve llamadas, filas, errores y duración media por etapa.
+
+        Returns
+        -------
+        dict[str, dict]
+            Resumen por etapa, apto para serializar a JSON.
+        """
+        with self._lock:
+            return {
+                stage: {
+                    'calls': metrics.calls,
+                    'rows': metrics.rows,
+                    'errors': metrics.errors,
+                    'mean_ms': 1000 * metrics.seconds / metrics.calls if metrics.calls else None,
+                }
+                for stage, metrics in self._stages.items()
+            }
+
+    def render(self) -> str:
+        """
+        Serializa las métricas en el formato de texto de Prometheus (0.0.4).
+
+        Returns
+        -------
+        str
+            Exposición completa, terminada en salto de línea.
+        """
+        with self._lock:
+            stages = sorted(self._stages.items())
+            values = sorted(self._values.items())
+            lines = [
+                '# HELP rent_stage_duration_seconds Duration of instrumented stages.',
+                '# TYPE rent_stage_duration_seconds histogram',
+            ]
+            for stage, metrics in stages:
+                cumulative = 0
+                for bound, count in zip((*self.buckets, '+Inf'), metrics.buckets):
+                    cumulative += count
+                    lines.append(
+                        f'rent_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}'
+                    )
+                lines.append(f'rent_stage_duration_seconds_sum{{stage="{stage}"}} {metrics.seconds!r}')
+                lines.append(f'rent_stage_duration_seconds_count{{stage="{stage}"}} {metrics.calls}')
+
+            for name, attribute, help_text in (
+                    ('rows', 'rows', 'Rows processed by instrumented stages.'),
+                    ('errors', 'errors', 'Calls to instrumented stages that raised.'),
+                ):
+                lines.append(f'# HELP rent_stage_{name}_total {help_text}')
+                lines.append(f'# TYPE rent_stage_{name}_total counter')
+                for stage, metrics in stages:
+                    lines.append(
+                        f'rent_stage_{name}_total{{stage="{stage}"}} {getattr(metrics, attribute)}'
+                    )
+
+            for name, (value, help_text, kind) in values:
+                if help_text:
+                    lines.append(f'# HELP rent_{name} {help_text}')
+                lines.append(f'# TYPE rent_{name} {kind}')
+                lines.append(f'rent_{name} {value!r}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str | Path) -> None:
+        """
+        Escribe la exposición en un archivo de forma atómica.
+
+        Parameters
+        ----------
+        path : str | Path
+            Archivo de destino (ej. `<dir>/rent.prom` del textfile collector).
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        tmp_path.write_text(self.render())
+        os.replace(tmp_path, path)
+
+    def reset(self) -> None:
+        """Elimina todas las métricas registradas."""
+        with self._lock:
+            self._stages.clear()
+            self._values.clear()
+
+
+metrics = MetricsRegistry()
+
+
+class _Stage:
+    """Llamada en curso a una etapa; `rows` puede fijarse dentro del bloque."""
+
+    __slots__ = ('rows',)
+
+    def __init__(self) -> None:
+        self.rows = 0
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[_Stage]:
+    """
+    Mide un bloque de código como una llamada a `stage`.
+
+    Parameters
+    ----------
+    stage : str
+        Nombre de la etapa.
+
+    Yields
+    ------
+    _Stage
+        Objeto cuyo atributo `rows` se registra como filas procesadas.
+    """
+    current = _Stage()
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        metrics.observe(stage, time.perf_counter() - start, current.rows, error=True)
+        raise
+    metrics.observe(stage, time.perf_counter() - start, current.rows)
+
+
+def instrumented(stage: str, rows: Callable[[object], int] | None = None) -> Callable:
+    """
+    Decora una función para registrar su latencia, filas y errores.
+
+    Si `instrumentation_settings.metrics_enabled` es `False` la función se
+    devuelve sin envolver, sin ningún coste por llamada.
+
+    Parameters
+    ----------
+    stage : str
+        Nombre de la etapa.
+    rows : Callable[[object], int] | None, default=None
+        Función que obtiene del resultado el número de filas procesadas
+        (ej. `len`).
+
+    Returns
+    -------
+    Callable
+        Decorador.
+    """
+    def decorator(function: Callable) -> Callable:
+        if not instrumentation_settings.metrics_enabled:
+            return function
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            except BaseException:
+                metrics.observe(stage, time.perf_counter() - start, error=True)
+                raise
+            elapsed = time.perf_counter() - start
+            metrics.observe(stage, elapsed, rows(result) if rows is not None else 0)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def export_metrics(path: str | Path | None = None) -> Path | None:
+    """
+    Escribe las métricas en `path` o en `instrumentation_settings.metrics_file`.
+
+    Returns
+    -------
+    Path | None
+        Archivo escrito, o `None` si no hay destino configurado.
+    """
+    path = path or instrumentation_settings.metrics_file
+    if path is None:
+        return None
+    metrics.write(path)
+    logger.info(f'Metrics exported to {path}')
+    return Path(path)
+
+
+if instrumentation_settings.metrics_enabled and instrumentation_settings.metrics_file:
+    atexit.register(export_metrics)
+
+
+class _SamplingProfiler:
+    """
+    Profiler por muestreo: registra las pilas de todos los hilos cada intervalo.
+
+    Su sobrecarga no depende del número de llamadas del programa, por lo que
+    puede activarse en producción. Las pilas se guardan en formato
+    "folded" (una pila por línea con su número de muestras), que aceptan
+    flamegraph.pl, speedscope o py-spy.
+    """
+
+    def __init__(self, interval_seconds: float) -> None:
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f'{Path(code.co_filename).name}:{code.co_name}')
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def top(self, limit: int) -> list[tuple[str, int]]:
+        """Funciones con más muestras propias (en la cima de la pila)."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+
+@contextmanager
+def profiling(name: str) -> Iterator[None]:
+    """
+    Perfila un bloque con el profiler de `instrumentation_settings.profiler`.
+
+    Con `cprofile` se guarda `<profile_dir>/<name>-<pid>.prof` (legible con
+    `pstats` o snakeviz); con `sampling`, `<profile_dir>/<name>-<pid>.folded`.
+    En ambos casos se muestran en el log las funciones más costosas. Con
+    `none` el bloque se ejecuta sin coste adicional.
+
+    Parameters
+    ----------
+    name : str
+        Nombre de la ejecución, usado en el nombre del archivo del perfil.
+    """
+    mode = instrumentation_settings.profiler
+    if mode == 'none':
+        yield
+        return
+
+    profile_dir = Path(instrumentation_settings.profile_dir)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    top = instrumentation_settings.profile_top
+    if mode == 'cprofile':
+        import cProfile
+        import io
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path = profile_dir / f'{name}-{os.getpid()}.prof'
+            profiler.dump_stats(path)
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(top)
+            logger.info(f'cProfile of {name} saved to {path}\n{report.getvalue()}')
+        return
+
+    sampler = _SamplingProfiler(instrumentation_settings.profile_interval_ms / 1000)
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        path = profile_dir / f'{name}-{os.getpid()}.folded'
+        path.write_text(''.join(f'{stack} {count}\n' for stack, count in sampler.stacks.items()))
+        report = '\n'.join(f'{count:8d}  {function}' for function, count in sampler.top(top))
+        logger.info(f'Sampling profile of {name} saved to {path}\n{report}')
@@ -5,16 +5,67 @@ Este módulo contiene la clase `ModelService`, que encapsula la lógica para
 cargar, construir y utilizar modelos de ML para realizar predicciones.
 Simplifica la interacción con el modelo, manejando su ciclo de vida desde
 la carga desde el disco hasta la ejecución de inferencias.
+
+El módulo solo importa lo necesario para servir un modelo ya entrenado:
+pandas, scikit-learn y el pipeline de entrenamiento se cargan únicamente
+cuando se reciben DataFrames, se deserializa un pickle o hay que construir
+el modelo.
 """
 
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+import hashlib
+from functools import partial
+from operator import itemgetter
 from pathlib import Path
 import pickle as pk
-from sklearn.ensemble import RandomForestRegressor
+import sys
+import threading
+from typing import TYPE_CHECKING, NamedTuple
+import warnings
+
+import numpy as np
     
 from loguru import logger
 
 from config import model_settings
-from model.pipeline.model import build_model
+from config.logger import request_logger
+from model.cache import PredictionCache
+from model.artifact import artifact_path_for, convert_pickle, load_artifact
+from model.build_coordinator import BuildCoordinator
+from model.flat_forest import FlatForest
+from model.inference import InferenceExecutor
+from model.instrumentation import instrumented
+from model.preprocessing import PREPROCESSOR_SUFFIX, RentPreprocessor
+from model.pipeline.resources import available_cpus
+from model.schema import FEATURE_NAMES
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+
+# Las matrices de inferencia ya se validan contra `feature_names` antes de
+# llegar al modelo, así que el aviso de scikit-learn por recibir un array
+# sin nombres de columna es redundante.
+warnings.filterwarnings(
+    'ignore', message='X does not have valid feature names', category=UserWarning,
+)
+
+
+class LoadedModel(NamedTuple):
+    """
+    Modelo cargado junto con los datos que deben cambiar a la vez que él.
+
+    `ModelService` publica cada modelo como una única instancia inmutable,
+    de modo que sustituirlo es una sola asignación y cada predicción usa
+    un modelo, un hash y un preprocesador coherentes entre sí.
+    """
+
+    model: RandomForestRegressor | FlatForest
+    model_hash: str
+    preprocessor: RentPreprocessor
+    path: Path
 
     
 class ModelService:
@@ -26,46 +77,203 @@ class ModelService:
 
     Attributes
     ----------
-    model : RandomForestRegressor | None
-        Instancia del modelo de Machine Learning cargado en memoria.
+    loaded : LoadedModel | None
+        Modelo publicado actualmente. Se sustituye de forma atómica al
+        recargar; las predicciones en curso terminan con el anterior.
+    model : RandomForestRegressor | FlatForest | None
+        Instancia del modelo de Machine Learning cargado en memoria. Es un
+        `FlatForest` si `model_settings.inference_engine` es `flat`.
         Es `None` si no se ha cargado ningún modelo.
+    model_hash : str | None
+        Hash SHA-256 del contenido del archivo del modelo cargado.
+    cache : PredictionCache | None
+        Caché de predicciones opcional. Se invalida automáticamente al
+        cargar un modelo con distinto contenido.
+    preprocessor : RentPreprocessor | None
+        Transformador de registros crudos guardado junto al modelo.
+    executor : InferenceExecutor | None
+        Pool de hilos persistente que reparte los lotes grandes. Se crea
+        en la primera llamada a `load_model` y se mantiene al recargar.
     """
 
-    def __init__(self) -> None:
-        """Inicializa una instancia de ModelService."""
-        self.model: RandomForestRegressor | None = None
+    def __init__(self, cache: PredictionCache | None = None) -> None:
+        """
+        Inicializa una instancia de ModelService.
+
+        Parameters
+        ----------
+        cache : PredictionCache | None, default=None
+            Caché de predicciones a utilizar. Si es `None` y
+            `model_settings.prediction_cache_enabled` está activo, se crea
+            una con los límites configurados.
+        """
+        self.loaded: LoadedModel | None = None
+        self.executor: InferenceExecutor | None = None
+        if cache is None and model_settings.prediction_cache_enabled:
+            cache = PredictionCache(
+                max_entries=model_settings.prediction_cache_max_entries,
+                max_bytes=model_settings.prediction_cache_max_bytes,
+                ttl_seconds=model_settings.prediction_cache_ttl_seconds,
+            )
+        self.cache = cache
 
+    @instrumented('load_model')
     def load_model(self, model_name: str) -> None:
         """
         Carga un modelo de machine learning desde un archivo.
 
-        Si el archivo del modelo no existe en la ruta especificada, se invoca
-        a la función `build_model` para entrenar y guardar un nuevo modelo.
+        Si el archivo del modelo no existe en la ruta especificada, su
+        construcción se delega en `BuildCoordinator`, que entrena el modelo
+        en un proceso en segundo plano (uno solo aunque varios procesos lo
+        soliciten a la vez). Mientras tanto se espera a que termine o, si
+        `model_settings.fallback_model_name` está configurado, se sirve ese
+        modelo y el nuevo se carga en cuanto está listo.
+
+        Con `model_settings.inference_engine == 'flat'` se carga el
+        artefacto sin pickle `<model_name>.forest` mapeado en memoria; si
+        solo existe el pickle, se convierte antes de cargarlo. Con
+        `model_settings.model_variant == 'fast'` se carga siempre con el
+        motor `flat` la variante comprimida `<model_name>.fast.forest` (ver
+        `model.pipeline.compression`), o el artefacto completo si el modelo
+        no tiene variante.
 
         Parameters
         ----------
         model_name : str
             Nombre del archivo del modelo a cargar (ej. 'model.pkl').
+
+        Raises
+        ------
+        RuntimeError
+            Si la construcción del modelo falla.
+        TimeoutError
+            Si el modelo no se construye en
+            `model_settings.model_build_wait_seconds`.
         """
         model_path = Path(model_settings.model_path) / model_name
+        artifact_path = artifact_path_for(model_path)
+        variant = model_settings.model_variant
+        use_artifact = model_settings.inference_engine == 'flat' or variant == 'fast'
+        if self.executor is None:
+            self.executor = InferenceExecutor(
+                workers=model_settings.inference_workers or available_cpus(),
+                min_rows=model_settings.inference_parallel_min_rows,
+                split=model_settings.inference_split,
+            )
 
         logger.info(
             'Verificando la existencia del archivo del modelo en %s',
             model_path,
         )
 
-        if not model_path.exists():
-            logger.warning(
-                'El modelo no fue encontrado en %s. Construyendo el modelo.',
-                model_path,
+        if use_artifact and not artifact_path.exists() and model_path.exists():
+            logger.warning(f'No existe el artefacto {artifact_path}. Convirtiendo el modelo pickle.')
+            convert_pickle(model_path, artifact_path)
+        elif not (artifact_path if use_artifact else model_path).exists():
+            coordinator = BuildCoordinator(model_path)
+            fallback_path = self._fallback_path(model_path, use_artifact)
+            if fallback_path is not None:
+                logger.warning(
+                    f'Model {model_path} not found; serving {fallback_path} while it is built'
+                )
+                coordinator.start_build()
+                self._swap(read_model(fallback_path, use_artifact, variant))
+                threading.Thread(
+                    target=self._load_when_built,
+                    args=(coordinator, model_name),
+                    name='model-build-wait',
+                    daemon=True,
+                ).start()
+                return
+            logger.warning(f'Model {model_path} not found; waiting for it to be built')
+            coordinator.wait(
+                timeout=model_settings.model_build_wait_seconds,
+                poll_seconds=model_settings.model_build_poll_seconds,
             )
-            build_model()
 
-        logger.info('Cargando el modelo desde %s', model_path)
+        self._swap(read_model(model_path, use_artifact, variant))
+
+    def reload_model(self, model_name: str, warmup_rows: int = 0) -> bool:
+        """
+        Vuelve a leer el modelo de disco y lo publica de forma atómica.
+
+        El modelo nuevo se lee y se calienta sin bloquear las predicciones,
+        que siguen usando el modelo anterior hasta la sustitución; las que
+        ya están en curso terminan con él.
+
+        Parameters
+        ----------
+        model_name : str
+            Nombre del archivo del modelo a cargar.
+        warmup_rows : int, default=0
+            Filas de prueba evaluadas con el modelo nuevo antes de
+            publicarlo.
 
-        with model_path.open("rb") as file:
-            self.model = pk.load(file)
+        Returns
+        -------
+        bool
+            `True` si se publicó un modelo con contenido distinto.
 
+        Raises
+        ------
+        ValueError
+            Si el calentamiento produce predicciones no finitas.
+        """
+        model_path = Path(model_settings.model_path) / model_name
+        variant = model_settings.model_variant
+        loaded = read_model(
+            model_path,
+            model_settings.inference_engine == 'flat' or variant == 'fast',
+            variant,
+        )
+        if loaded.model_hash == self.model_hash:
+            return False
+        if warmup_rows:
+            warmup = np.zeros((warmup_rows, len(_feature_names_of(loaded.model))), dtype=np.float32)
+            if not np.isfinite(loaded.model.predict(warmup)).all():
+                raise ValueError(f'El modelo {model_path} produce predicciones no finitas.')
+        self._swap(loaded)
+        return True
+
+    @property
+    def model(self) -> RandomForestRegressor | FlatForest | None:
+        """Modelo publicado, o `None` si no se ha cargado ninguno."""
+        return None if self.loaded is None else self.loaded.model
+
+    @property
+    def model_hash(self) -> str | None:
+        """Hash de contenido del modelo publicado."""
+        return None if self.loaded is None else self.loaded.model_hash
+
+    @property
+    def preprocessor(self) -> RentPreprocessor | None:
+        """Preprocesador del modelo publicado."""
+        return None if self.loaded is None else self.loaded.preprocessor
+
+    def _swap(self, loaded: LoadedModel) -> None:
+        """Publica un modelo ya cargado y reinicia la caché si cambió."""
+        self.loaded = loaded
+        if self.cache is not None:
+            self.cache.bind(loaded.model_hash)
+
+    def _fallback_path(self, model_path: Path, use_artifact: bool) -> Path | None:
+        """Ruta del modelo de respaldo configurado, si existe en disco."""
+        if model_settings.fallback_model_name is None:
+            return None
+        fallback_path = model_path.with_name(model_settings.fallback_model_name)
+        required = artifact_path_for(fallback_path) if use_artifact else fallback_path
+        return fallback_path if required.exists() else None
+
+    def _load_when_built(self, coordinator: BuildCoordinator, model_name: str) -> None:
+        """Espera a la construcción en segundo plano y sustituye el modelo de respaldo."""
+        try:
+            coordinator.wait(poll_seconds=model_settings.model_build_poll_seconds)
+            self.load_model(model_name)
+            logger.info(f'Swapped in the freshly built model {model_name}')
+        except Exception:
+            logger.exception(f'Could not load the built model {model_name}; keeping the fallback')
+
+    @instrumented('predict', rows=len)
     def predict(self, input_parameters: list) -> list:
         """
         Realiza una predicción utilizando el modelo cargado.
@@ -85,10 +293,308 @@ class ModelService:
         RuntimeError
             Si se intenta predecir sin haber cargado un modelo previamente.
         """
-        if self.model is None:
+        loaded = self._require_loaded()
+
+        request_logger.info('Realizando predicción')
+        if self.cache is not None:
+            return self.predict_batch(np.asarray([input_parameters], dtype=np.float32))
+        return loaded.model.predict([input_parameters])
+
+    @instrumented('predict_batch', rows=len)
+    def predict_batch(
+            self,
+            features: np.ndarray | pd.DataFrame | Sequence[Mapping],
+            chunk_size: int | None = None,
+        ) -> np.ndarray:
+        """
+        Realiza predicciones vectorizadas sobre un lote de observaciones.
+
+        El esquema de entrada se valida una única vez por lote contra el
+        orden de features con el que se entrenó el modelo, y todas las filas
+        se evalúan en una sola llamada a `predict` por bloque de
+        `chunk_size` filas.
+
+        Parameters
+        ----------
+        features : np.ndarray | pd.DataFrame | Sequence[Mapping]
+            Lote de observaciones. Puede ser un array 2-D con las columnas
+            en el orden de entrenamiento, un DataFrame con (al menos) las
+            columnas de entrenamiento o una lista de diccionarios
+            `{feature: valor}`.
+        chunk_size : int | None, default=None
+            Número máximo de filas por llamada al modelo. Si es `None` se
+            utiliza `model_settings.predict_chunk_size`.
+
+        Returns
+        -------
+        np.ndarray
+            Array 1-D con una predicción por fila, en el orden de entrada.
+
+        Raises
+        ------
+        RuntimeError
+            Si se intenta predecir sin haber cargado un modelo previamente.
+        ValueError
+            Si el lote no cumple el esquema de features del modelo.
+        """
+        loaded = self._require_loaded()
+        matrix = self._to_feature_matrix(features, _feature_names_of(loaded.model))
+        chunk_size = chunk_size or model_settings.predict_chunk_size
+
+        request_logger.info(f'Realizando predicción por lotes de {matrix.shape[0]} filas')
+        if self.cache is not None:
+            return self._predict_cached(loaded, matrix, chunk_size)
+        return self._predict_matrix(loaded.model, matrix, chunk_size)
+
+    @instrumented('predict_records', rows=len)
+    def predict_records(
+            self,
+            records: pd.DataFrame | Sequence[Mapping],
+            chunk_size: int | None = None,
+        ) -> np.ndarray:
+        """
+        Realiza predicciones sobre registros crudos de RentApartments.
+
+        Los registros se transforman con el preprocesador del modelo en una
+        única pasada vectorizada y se evalúan por lotes, sin volver a
+        validar el esquema (ya comprobado en `load_model`).
+
+        Parameters
+        ----------
+        records : pd.DataFrame | Sequence[Mapping]
+            Registros crudos (`area`, `garden`, `balcony`, ...).
+        chunk_size : int | None, default=None
+            Número máximo de filas por llamada al modelo. Si es `None` se
+            utiliza `model_settings.predict_chunk_size`.
+
+        Returns
+        -------
+        np.ndarray
+            Array 1-D con una predicción por registro.
+
+        Raises
+        ------
+        RuntimeError
+            Si se intenta predecir sin haber cargado un modelo previamente.
+        """
+        loaded = self._require_loaded()
+        matrix = loaded.preprocessor.transform(records)
+        chunk_size = chunk_size or model_settings.predict_chunk_size
+
+        request_logger.info(f'Realizando predicción de {matrix.shape[0]} registros crudos')
+        if self.cache is not None:
+            return self._predict_cached(loaded, matrix, chunk_size)
+        return self._predict_matrix(loaded.model, matrix, chunk_size)
+
+    def _require_loaded(self) -> LoadedModel:
+        """Devuelve el modelo publicado, que se usará durante toda la predicción."""
+        loaded = self.loaded
+        if loaded is None:
             raise RuntimeError(
                 'El modelo no está cargado. Ejecute `load_model` antes de predecir.'
             )
+        return loaded
+
+    def _predict_matrix(
+            self,
+            model: RandomForestRegressor | FlatForest,
+            matrix: np.ndarray,
+            chunk_size: int,
+        ) -> np.ndarray:
+        """Evalúa el modelo sobre una matriz validada, por bloques y con el ejecutor."""
+        predict = model.predict if self.executor is None else partial(self.executor.predict, model)
+        n_rows = matrix.shape[0]
+        if n_rows <= chunk_size:
+            return predict(matrix)
+
+        predictions = np.empty(n_rows, dtype=np.float64)
+        for start in range(0, n_rows, chunk_size):
+            stop = start + chunk_size
+            predictions[start:stop] = predict(matrix[start:stop])
+        return predictions
+
+    def _predict_cached(
+            self,
+            loaded: LoadedModel,
+            matrix: np.ndarray,
+            chunk_size: int,
+        ) -> np.ndarray:
+        """
+        Evalúa el modelo solo sobre las filas que no están en la caché.
+
+        Si el modelo se sustituye durante la predicción, las entradas de la
+        caché de un modelo no se mezclan con las del otro.
+
+        Parameters
+        ----------
+        loaded : LoadedModel
+            Modelo con el que se evalúa el lote completo.
+        matrix : np.ndarray
+            Matriz de features validada.
+        chunk_size : int
+            Número máximo de filas por llamada al modelo.
+
+        Returns
+        -------
+        np.ndarray
+            Predicción por fila, combinando aciertos de caché y modelo.
+        """
+        keys = self.cache.keys_for(matrix)
+        cached = self.cache.get_many(keys, model_hash=loaded.model_hash)
+        misses = [i for i, value in enumerate(cached) if value is None]
+
+        predictions = np.array(
+            [np.nan if value is None else value for value in cached],
+            dtype=np.float64,
+        )
+        if misses:
+            computed = self._predict_matrix(loaded.model, matrix[misses], chunk_size)
+            predictions[misses] = computed
+            self.cache.put_many(
+                [keys[i] for i in misses], computed, model_hash=loaded.model_hash,
+            )
+        return predictions
+
+    @property
+    def feature_names(self) -> list[str]:
+        """Orden de features con el que se entrenó el modelo."""
+        return _feature_names_of(self.model)
 
-        logger.info('Realizando predicción')
-        return self.model.predict([input_parameters])
+    @staticmethod
+    def _to_feature_matrix(
+            features: np.ndarray | pd.DataFrame | Sequence[Mapping],
+            feature_names: list[str],
+        ) -> np.ndarray:
+        """
+        Valida el esquema de un lote y lo convierte en una matriz float32.
+
+        Parameters
+        ----------
+        features : np.ndarray | pd.DataFrame | Sequence[Mapping]
+            Lote de observaciones recibido por `predict_batch`.
+        feature_names : list[str]
+            Orden de features del modelo con el que se evaluará el lote.
+
+        Returns
+        -------
+        np.ndarray
+            Matriz contigua `(n_filas, n_features)` en el orden de
+            entrenamiento.
+
+        Raises
+        ------
+        ValueError
+            Si faltan columnas o la dimensión del lote no es la esperada.
+        """
+        # Un DataFrame solo puede recibirse si pandas ya está importado.
+        pandas = sys.modules.get('pandas')
+
+        if pandas is not None and isinstance(features, pandas.DataFrame):
+            missing = [col for col in feature_names if col not in features.columns]
+            if missing:
+                raise ValueError(f'Faltan features en el lote: {missing}')
+            matrix = features[feature_names].to_numpy(dtype=np.float32)
+        elif isinstance(features, np.ndarray):
+            matrix = features.astype(np.float32, copy=False)
+        else:
+            if features and not isinstance(features[0], Mapping):
+                raise ValueError(
+                    'Los lotes en forma de lista deben contener diccionarios.'
+                )
+            missing = [col for col in feature_names if features and col not in features[0]]
+            if missing:
+                raise ValueError(f'Faltan features en el lote: {missing}')
+            getter = itemgetter(*feature_names)
+            try:
+                matrix = np.array(
+                    [getter(record) for record in features],
+                    dtype=np.float32,
+                ).reshape(-1, len(feature_names))
+            except KeyError as error:
+                raise ValueError(f'Falta la feature {error} en el lote') from error
+
+        if matrix.ndim != 2 or matrix.shape[1] != len(feature_names):
+            raise ValueError(
+                f'Se esperaba una matriz 2-D con {len(feature_names)} columnas '
+                f'({feature_names}) y se recibió la forma {matrix.shape}.'
+            )
+        return np.ascontiguousarray(matrix)
+
+
+def _feature_names_of(model: RandomForestRegressor | FlatForest | None) -> list[str]:
+    """Orden de features de un modelo, o el esquema declarado si no lo guarda."""
+    names = getattr(model, 'feature_names_in_', None)
+    return [str(name) for name in names] if names is not None else list(FEATURE_NAMES)
+
+
+def read_model(
+        model_path: Path,
+        use_artifact: bool,
+        variant: str | None = None,
+    ) -> LoadedModel:
+    """
+    Lee de disco un modelo, su hash y su preprocesador, sin publicarlos.
+
+    Parameters
+    ----------
+    model_path : Path
+        Ruta del pickle del modelo (el artefacto se busca junto a él).
+    use_artifact : bool
+        Si es `True` se carga el artefacto `FlatForest` en lugar del pickle.
+    variant : str | None, default=None
+        Variante del artefacto (`accurate` o `fast`). Si la variante no
+        existe se carga el artefacto completo.
+
+    Returns
+    -------
+    LoadedModel
+        Modelo listo para publicarse.
+    """
+    if use_artifact:
+        artifact_path = artifact_path_for(model_path, variant)
+        if not artifact_path.exists() and artifact_path != artifact_path_for(model_path):
+            logger.warning(f'No existe la variante {variant} de {model_path}; se carga el artefacto completo')
+            artifact_path = artifact_path_for(model_path)
+        logger.info(f'Cargando el artefacto desde {artifact_path}')
+        model, manifest = load_artifact(artifact_path)
+        model_hash = manifest['content_hash']
+    else:
+        logger.info(f'Cargando el modelo desde {model_path}')
+        payload = model_path.read_bytes()
+        model_hash = hashlib.sha256(payload).hexdigest()
+        model = pk.loads(payload)
+    InferenceExecutor.prepare(model)
+    preprocessor = _load_preprocessor(model_path, _feature_names_of(model))
+    return LoadedModel(model, model_hash, preprocessor, model_path)
+
+
+def _load_preprocessor(
+        model_path: Path,
+        feature_names: list[str],
+    ) -> RentPreprocessor:
+    """
+    Carga el preprocesador del modelo y valida su esquema una sola vez.
+
+    Si el modelo se entrenó antes de que existiera el preprocesador
+    serializado, se utiliza uno con el vocabulario declarado.
+
+    Parameters
+    ----------
+    model_path : Path
+        Ruta del modelo cargado.
+    feature_names : list[str]
+        Orden de features con el que se entrenó el modelo.
+
+    Returns
+    -------
+    RentPreprocessor
+        Preprocesador compatible con el modelo cargado.
+    """
+    preprocessor_path = model_path.with_name(model_path.name + PREPROCESSOR_SUFFIX)
+    if preprocessor_path.exists():
+        preprocessor = RentPreprocessor.load(preprocessor_path)
+    else:
+        logger.warning(f'No existe el preprocesador {preprocessor_path}. Usando el vocabulario declarado.')
+        preprocessor = RentPreprocessor()
+    preprocessor.check_compatible(feature_names)
+    return preprocessor
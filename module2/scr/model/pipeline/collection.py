@@ -6,19 +6,42 @@ Este módulo contiene utilidades para extraer información de la tabla
 para su posterior análisis o procesamiento.
 
 La conexión a la base de datos se obtiene desde la configuración de la
-aplicación y se utiliza el motor (`engine`) definido globalmente.
+aplicación y se utiliza el motor compartido del proceso (`get_engine()`).
+Además de la extracción completa, ofrece un modo en streaming que
+selecciona solo las columnas que usa el pipeline y devuelve bloques
+tipados de un `pandas.DataFrame` mediante un cursor del lado del servidor,
+manteniendo la memoria acotada al tamaño del bloque.
 El módulo también incorpora logging para facilitar el seguimiento del
 proceso de extracción de datos.
 """
 
+from collections.abc import Iterator
+
 import pandas as pd
 from loguru import logger
-from sqlalchemy import select
+from sqlalchemy import literal_column, select
 
-from config import engine
+from config import db_settings, get_engine
 from db.db_model import RentApartments
+from model.instrumentation import instrumented
+
+# Columnas que consume el pipeline de preparación y entrenamiento, con el
+# tipo compacto con el que se materializa cada una.
+PIPELINE_COLUMNS: dict[str, str] = {
+    'area': 'float32',
+    'constraction_year': 'Int16',
+    'bedrooms': 'Int8',
+    'garden': 'string',
+    'balcony': 'string',
+    'parking': 'string',
+    'furnished': 'string',
+    'garage': 'string',
+    'storage': 'string',
+    'rent': 'Int32',
+}
 
 
+@instrumented('load_data_from_db', rows=len)
 def load_data_from_db() -> pd.DataFrame:
     """
     Extraemos la tabla completa de RentApartments desde la base de datos.
@@ -31,6 +54,78 @@ def load_data_from_db() -> pd.DataFrame:
     query = select(RentApartments)
     return pd.read_sql(
         query, 
-        engine,
+        get_engine(),
+        )
+
+
+
+def stream_data_from_db(
+        chunksize: int | None = None,
+        columns: dict[str, str] | None = None,
+        watermark_column: str | None = None,
+        since: object | None = None,
+        key_column: str | None = None,
+    ) -> Iterator[pd.DataFrame]:
+    """
+    Extrae la tabla RentApartments en bloques tipados.
+
+    Solo se seleccionan las columnas indicadas y la consulta se ejecuta con
+    `stream_results`, de modo que el driver entrega las filas con un cursor
+    del lado del servidor en lugar de materializar la tabla completa.
+
+    Args:
+        chunksize (int | None): Filas por bloque. Por defecto,
+            `db_settings.db_chunksize`.
+        columns (dict[str, str] | None): Columnas a extraer y su dtype.
+            Por defecto, `PIPELINE_COLUMNS`.
+        watermark_column (str | None): Columna de marca de agua a incluir
+            en el resultado (ej. `rowid` o un timestamp de ingesta). Las
+            filas se ordenan por ella.
+        since (object | None): Si se indica, solo se extraen las filas con
+            `watermark_column` estrictamente mayor que este valor.
+        key_column (str | None): Columna que identifica cada fila (ej.
+            `rowid`) a incluir en el resultado.
+
+    Yields:
+    -------
+        pd.DataFrame: Bloque de como máximo `chunksize` filas.
+    """
+    chunksize = chunksize or db_settings.db_chunksize
+    columns = columns or PIPELINE_COLUMNS
+    logger.info(f'streaming {list(columns)} from database in chunks of {chunksize} rows')
+
+    query = select(*(getattr(RentApartments, name) for name in columns))
+    if key_column is not None and key_column != watermark_column:
+        query = query.add_columns(_watermark_expression(key_column))
+    if watermark_column is not None:
+        watermark = _watermark_expression(watermark_column)
+        query = query.add_columns(watermark).order_by(watermark)
+        if since is not None:
+            query = query.where(watermark > since)
+    with get_engine().connect().execution_options(
+        stream_results=True,
+        max_row_buffer=chunksize,
+    ) as connection:
+        yield from pd.read_sql(
+            query,
+            connection,
+            chunksize=chunksize,
+            dtype=columns,
         )
 
+
+def _watermark_expression(column: str):
+    """
+    Devuelve la expresión SQL de una columna de marca de agua o de clave.
+
+    Args:
+        column (str): Nombre de una columna mapeada en RentApartments o de
+            una pseudo-columna del motor (ej. `rowid` en SQLite).
+
+    Returns:
+    -------
+        Expresión etiquetada con el nombre de la columna.
+    """
+    if hasattr(RentApartments, column):
+        return getattr(RentApartments, column).label(column)
+    return literal_column(column).label(column)
@@ -0,0 +1,338 @@
+"""
+Compresión del bosque entrenado en una variante rápida para serving.
+
+Este módulo genera, a partir del `FlatForest` del modelo entrenado, una
+variante `fast` más pequeña y con menor latencia, a cambio de una pérdida
+de R² acotada sobre el conjunto de test:
+- Truncado de árboles: se conservan los primeros árboles del bosque (que
+  son intercambiables, cada uno entrenado sobre su propio bootstrap), en
+  el menor número a partir del cual el R² del promedio no pierde más de
+  `training_settings.compression_max_r2_loss` respecto al bosque completo.
+- Poda de subárboles casi constantes: un nodo cuyas hojas difieren como
+  mucho `compression_prune_tolerance` (en unidades del alquiler) se
+  convierte en hoja con su propio valor (la media de entrenamiento del
+  nodo).
+- Eliminación de subárboles duplicados: los nodos idénticos (misma
+  partición e hijos, o misma hoja) se comparten entre todos los árboles, y
+  una partición con ambos hijos iguales se sustituye por su hijo.
+- Precisión reducida: umbrales y valores en float32. Los umbrales se
+  redondean hacia abajo, de modo que las decisiones sobre las features
+  float32 son exactamente las del bosque original.
+
+La variante se guarda como artefacto `<model_name>.fast.forest` y
+`ModelService` la carga con `model_settings.model_variant = 'fast'`.
+
+`build_model` guarda además el conjunto de test en
+`<model_name>.holdout.npz`, de modo que la variante de un modelo ya
+entrenado se recalcula sobre exactamente las mismas filas, con cualquier
+modo de partición (por defecto, compacto, por fragmentos o incremental).
+
+Uso típico (para un modelo ya entrenado):
+    >>> python -m model.pipeline.compression rf_db_v2
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from config import model_settings, training_settings
+from model.artifact import artifact_path_for, load_artifact, save_artifact
+from model.flat_forest import FlatForest
+
+FAST_VARIANT = 'fast'
+HOLDOUT_SUFFIX = '.holdout.npz'
+
+
+def compress_forest(
+        forest: FlatForest,
+        X_holdout: np.ndarray,
+        y_holdout: np.ndarray,
+        max_r2_loss: float,
+        prune_tolerance: float,
+        use_float32: bool = True,
+    ) -> tuple[FlatForest, dict]:
+    """
+    Genera la variante comprimida de un bosque aplanado.
+
+    Parameters
+    ----------
+    forest : FlatForest
+        Bosque completo exportado con `export_flat_forest`.
+    X_holdout : np.ndarray
+        Features del conjunto de test, en el orden de entrenamiento.
+    y_holdout : np.ndarray
+        Variable objetivo del conjunto de test.
+    max_r2_loss : float
+        Pérdida máxima de R² admitida al truncar árboles.
+    prune_tolerance : float
+        Diferencia máxima entre hojas de un subárbol para colapsarlo.
+    use_float32 : bool, default=True
+        Guarda umbrales y valores en float32.
+
+    Returns
+    -------
+    tuple[FlatForest, dict]
+        Bosque comprimido e informe de la compresión (árboles, nodos,
+        bytes y R² antes y después).
+    """
+    X_holdout = np.ascontiguousarray(X_holdout, dtype=np.float32)
+    y_holdout = np.asarray(y_holdout, dtype=np.float64)
+
+    per_tree = np.stack([
+        forest.partial_sum(X_holdout, slice(tree, tree + 1)) for tree in range(forest.n_trees)
+    ])
+    cumulative = np.cumsum(per_tree, axis=0) / np.arange(1, forest.n_trees + 1)[:, None]
+    r2_by_size = np.array([_r2(y_holdout, predictions) for predictions in cumulative])
+    r2_full = r2_by_size[-1]
+    # Primer tamaño a partir del cual ningún prefijo pierde más de la
+    # tolerancia: un prefijo pequeño que la cumpla por azar sobreajustaría
+    # el conjunto de test.
+    below = np.flatnonzero(r2_by_size < r2_full - max_r2_loss)
+    n_kept = int(below[-1]) + 2 if len(below) else 1
+
+    compressed = _rebuild(forest, forest.roots[:n_kept], prune_tolerance, use_float32)
+    report = {
+        'trees_before': forest.n_trees,
+        'trees_after': compressed.n_trees,
+        'nodes_before': forest.n_nodes,
+        'nodes_after': compressed.n_nodes,
+        'bytes_before': _nbytes(forest),
+        'bytes_after': _nbytes(compressed),
+        'r2_full': float(r2_full),
+        'r2_fast': float(_r2(y_holdout, compressed.predict(X_holdout))),
+        'max_r2_loss': max_r2_loss,
+        'prune_tolerance': prune_tolerance,
+        'float32': use_float32,
+    }
+    logger.info(
+        f'Compressed forest: {report["trees_before"]} -> {report["trees_after"]} trees, '
+        f'{report["nodes_before"]} -> {report["nodes_after"]} nodes, '
+        f'R2 {report["r2_full"]:.4f} -> {report["r2_fast"]:.4f}'
+    )
+    return compressed, report
+
+
+def save_fast_variant(
+        forest: FlatForest,
+        model_path: str | Path,
+        X_holdout: np.ndarray,
+        y_holdout: np.ndarray,
+        hyperparameters: dict | None = None,
+    ) -> dict:
+    """
+    Comprime un bosque con la configuración de entrenamiento y lo guarda como variante `fast`.
+
+    Parameters
+    ----------
+    forest : FlatForest
+        Bosque completo.
+    model_path : str | Path
+        Ruta del pickle del modelo; la variante se guarda junto a él.
+    X_holdout, y_holdout : np.ndarray
+        Conjunto de test con el que se elige el truncado.
+    hyperparameters : dict | None, default=None
+        Hiperparámetros del modelo original.
+
+    Returns
+    -------
+    dict
+        Informe de la compresión, también guardado en el manifiesto.
+    """
+    compressed, report = compress_forest(
+        forest,
+        X_holdout,
+        y_holdout,
+        max_r2_loss=training_settings.compression_max_r2_loss,
+        prune_tolerance=training_settings.compression_prune_tolerance,
+        use_float32=training_settings.compression_float32,
+    )
+    save_artifact(
+        compressed,
+        artifact_path_for(model_path, FAST_VARIANT),
+        hyperparameters=hyperparameters,
+        r2_score=report['r2_fast'],
+        extra={'variant': FAST_VARIANT, 'compression': report},
+    )
+    return report
+
+
+def save_holdout(model_path: str | Path, X_holdout: np.ndarray, y_holdout: np.ndarray) -> Path:
+    """
+    Guarda el conjunto de test de un modelo junto a él.
+
+    Parameters
+    ----------
+    model_path : str | Path
+        Ruta del pickle del modelo.
+    X_holdout, y_holdout : np.ndarray
+        Conjunto de test con el que se evaluó el modelo.
+
+    Returns
+    -------
+    Path
+        Ruta del archivo `<model_name>.holdout.npz`.
+    """
+    path = _holdout_path(model_path)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.npz')
+    np.savez(
+        tmp_path,
+        X=np.ascontiguousarray(X_holdout, dtype=np.float32),
+        y=np.asarray(y_holdout, dtype=np.float64),
+    )
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_holdout(model_path: str | Path) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lee el conjunto de test guardado por `build_model` para un modelo.
+
+    Raises
+    ------
+    FileNotFoundError
+        Si el modelo se entrenó sin guardar su conjunto de test.
+    """
+    path = _holdout_path(model_path)
+    if not path.exists():
+        raise FileNotFoundError(
+            f'No existe el conjunto de test {path}; vuelva a entrenar el modelo para '
+            'generarlo. Reconstruirlo desde la base de datos no garantiza excluir '
+            'filas de entrenamiento.'
+        )
+    with np.load(path) as holdout:
+        return holdout['X'], holdout['y']
+
+
+def _holdout_path(model_path: str | Path) -> Path:
+    """Ruta del conjunto de test asociado a un modelo."""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.name + HOLDOUT_SUFFIX)
+
+
+def _rebuild(
+        forest: FlatForest,
+        roots: np.ndarray,
+        prune_tolerance: float,
+        use_float32: bool,
+    ) -> FlatForest:
+    """
+    Reconstruye los árboles de `roots` podando y compartiendo nodos idénticos.
+
+    Los nodos se recorren en postorden; cada nodo resultante se identifica
+    por su contenido (`hash-consing`), de modo que dos subárboles iguales,
+    en el mismo árbol o en árboles distintos, se guardan una sola vez.
+    """
+    feature = forest.feature.tolist()
+    left = forest.children_left.tolist()
+    right = forest.children_right.tolist()
+    threshold = _round_thresholds_down(forest.threshold) if use_float32 else forest.threshold
+    threshold = threshold.tolist()
+    value = (forest.value.astype(np.float32) if use_float32 else forest.value).tolist()
+
+    new_feature, new_threshold, new_left, new_right, new_value, new_height = [], [], [], [], [], []
+    interned: dict[tuple, int] = {}
+
+    def intern(key: tuple, node_feature: int, node_threshold: float, children: tuple | None,
+               node_value: float, height: int) -> int:
+        node = interned.get(key)
+        if node is None:
+            node = interned[key] = len(new_value)
+            new_feature.append(node_feature)
+            new_threshold.append(node_threshold)
+            new_left.append(node if children is None else children[0])
+            new_right.append(node if children is None else children[1])
+            new_value.append(node_value)
+            new_height.append(height)
+        return node
+
+    # Por nodo original: (nodo nuevo, hoja mínima, hoja máxima).
+    rebuilt: dict[int, tuple[int, float, float]] = {}
+    new_roots = []
+    for root in roots.tolist():
+        stack = [root]
+        while stack:
+            node = stack[-1]
+            if node in rebuilt:
+                stack.pop()
+                continue
+            if left[node] == node:
+                stack.pop()
+                leaf = intern(('leaf', value[node]), 0, np.inf, None, value[node], 0)
+                rebuilt[node] = (leaf, value[node], value[node])
+                continue
+            pending = [child for child in (left[node], right[node]) if child not in rebuilt]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            new_l, low_l, high_l = rebuilt[left[node]]
+            new_r, low_r, high_r = rebuilt[right[node]]
+            low, high = min(low_l, low_r), max(high_l, high_r)
+            if high - low <= prune_tolerance:
+                new_node = intern(('leaf', value[node]), 0, np.inf, None, value[node], 0)
+            elif new_l == new_r:
+                new_node = new_l
+            else:
+                key = ('split', feature[node], threshold[node], new_l, new_r)
+                height = 1 + max(new_height[new_l], new_height[new_r])
+                new_node = intern(key, feature[node], threshold[node], (new_l, new_r), value[node], height)
+            rebuilt[node] = (new_node, low, high)
+        new_roots.append(rebuilt[root][0])
+
+    dtype = np.float32 if use_float32 else np.float64
+    return FlatForest(
+        feature=np.asarray(new_feature, dtype=np.int32),
+        threshold=np.asarray(new_threshold, dtype=dtype),
+        children=np.column_stack([new_left, new_right]).astype(np.int32),
+        value=np.asarray(new_value, dtype=dtype),
+        roots=np.asarray(new_roots, dtype=np.int32),
+        max_depth=max(new_height[root] for root in new_roots),
+        feature_names_in_=forest.feature_names_in_,
+    )
+
+
+def _round_thresholds_down(threshold: np.ndarray) -> np.ndarray:
+    """
+    Convierte los umbrales a float32 sin cambiar ninguna decisión.
+
+    Para una feature float32 `x`, `x > t` equivale a `x > t32` si `t32` es
+    el mayor float32 que no supera `t`.
+    """
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def _r2(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    """Coeficiente de determinación R²."""
+    residual = np.sum((y_true - y_pred) ** 2)
+    total = np.sum((y_true - y_true.mean()) ** 2)
+    return 1 - residual / total if total else 0.0
+
+
+def _nbytes(forest: FlatForest) -> int:
+    """Bytes ocupados por los arrays del bosque."""
+    return sum(
+        getattr(forest, name).nbytes for name in ('feature', 'threshold', 'children', 'value', 'roots')
+    )
+
+
+def main() -> None:
+    """Genera la variante `fast` de un modelo ya entrenado con su conjunto de test guardado."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('model_name', nargs='?', default=model_settings.model_name)
+    args = parser.parse_args()
+
+    model_path = Path(model_settings.model_path) / args.model_name
+    forest, manifest = load_artifact(artifact_path_for(model_path), mmap=False)
+    X_test, y_test = load_holdout(model_path)
+    report = save_fast_variant(forest, model_path, X_test, y_test, manifest['hyperparameters'])
+    logger.info(f'Compression report for {model_path}: {report}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Validación cruzada con folds fijos, datos compartidos y caché de resultados.
+
+Este módulo implementa la búsqueda `grid` de `model.pipeline.training`
+sin `GridSearchCV`:
+- Los índices de los folds se calculan una única vez (`KFold` sin
+  barajar, igual que `GridSearchCV` con `cv=<int>`) y se guardan junto a
+  los datos.
+- La matriz de features y la variable objetivo se escriben una vez en
+  archivos `.npy` que cada proceso abre con `mmap_mode='r'`: los workers
+  reciben solo rutas y números de fold, no una copia serializada de los
+  datos, y todos comparten las mismas páginas en la page cache. La
+  lectura no es de copia cero: cada ajuste extrae las filas de su fold con
+  indexación avanzada (`X[train_idx]`), que crea una copia privada del
+  tamaño del fold mientras dura el ajuste.
+- Cada ajuste (candidato, fold) se entrena con una semilla fija
+  (`training_settings.cv_random_state`) y su R² se guarda en disco bajo
+  una clave formada por el hash de los datos y de los folds, los
+  parámetros y la versión de scikit-learn. Cada worker escribe su
+  resultado al terminar el ajuste, de modo que una búsqueda interrumpida
+  conserva los ajustes completados. Al repetir la búsqueda con los
+  mismos datos, solo se entrenan los candidatos que no están en la caché
+  (por ejemplo, los puntos nuevos de la rejilla).
+
+La caché vive en `training_settings.cv_cache_dir` y no se purga
+automáticamente: puede borrarse en cualquier momento.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import sklearn
+from joblib import Parallel, delayed
+from loguru import logger
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold
+
+from config import training_settings
+from model.pipeline.resources import peak_rss_mb, reset_fit_peak_rss
+
+
+def cached_grid_search(
+        X_train: pd.DataFrame | np.ndarray,
+        y_train: pd.Series | np.ndarray,
+        grid_space: dict[str, list],
+        n_jobs: int,
+    ) -> dict:
+    """
+    Evalúa la rejilla completa con validación cruzada reutilizando la caché.
+
+    Parameters
+    ----------
+    X_train : pd.DataFrame | np.ndarray
+        Variables independientes del conjunto de entrenamiento.
+    y_train : pd.Series | np.ndarray
+        Variable objetivo del conjunto de entrenamiento.
+    grid_space : dict[str, list]
+        Rejilla de hiperparámetros.
+    n_jobs : int
+        Procesos en los que se reparten los ajustes pendientes.
+
+    Returns
+    -------
+    dict
+        Mejores parámetros según el R² medio de validación; en caso de
+        empate, el primero de la rejilla (como `GridSearchCV`).
+    """
+    # Los árboles de scikit-learn trabajan en float32: convertir aquí no
+    # cambia ninguna partición y fija la representación que se hashea.
+    X = np.ascontiguousarray(X_train, dtype=np.float32)
+    y = np.ascontiguousarray(y_train, dtype=np.float64)
+    folds = list(KFold(n_splits=training_settings.cv_folds).split(X))
+    data_key = _data_key(X, y, folds)
+    cache_dir = Path(training_settings.cv_cache_dir) / data_key
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    candidates = [
+        dict(zip(grid_space, values)) for values in product(*grid_space.values())
+    ]
+    scores: dict[tuple[int, int], float] = {}
+    pending = []
+    for (index, params), fold in product(enumerate(candidates), range(len(folds))):
+        cached = _read_result(_result_path(cache_dir, params, fold))
+        if cached is None:
+            pending.append((index, fold))
+        else:
+            scores[index, fold] = cached['score']
+    logger.info(
+        f'Cross-validation cache {data_key[:12]}: '
+        f'{len(scores)} fits cached, {len(pending)} to run'
+    )
+
+    if pending:
+        with tempfile.TemporaryDirectory(prefix='cv-', dir=cache_dir) as data_dir:
+            data_dir = Path(data_dir)
+            np.save(data_dir / 'X.npy', X, allow_pickle=False)
+            np.save(data_dir / 'y.npy', y, allow_pickle=False)
+            np.savez(
+                data_dir / 'folds.npz',
+                **{f'train_{fold}': train for fold, (train, _) in enumerate(folds)},
+                **{f'test_{fold}': test for fold, (_, test) in enumerate(folds)},
+            )
+            results = Parallel(n_jobs=n_jobs)(
+                delayed(_fit_fold)(
+                    data_dir, candidates[index], fold, _result_path(cache_dir, candidates[index], fold)
+                )
+                for index, fold in pending
+            )
+        for (index, fold), result in zip(pending, results):
+            scores[index, fold] = result['score']
+
+    mean_scores = [
+        np.mean([scores[index, fold] for fold in range(len(folds))])
+        for index in range(len(candidates))
+    ]
+    for params, score in zip(candidates, mean_scores):
+        logger.info(f'Candidate {params}: mean R2 {score:.4f}')
+    return candidates[int(np.argmax(mean_scores))]
+
+
+def _fit_fold(data_dir: Path, params: dict, fold: int, result_path: Path) -> dict:
+    """
+    Entrena un candidato en un fold leyendo los datos mapeados en memoria.
+
+    Las filas del fold se copian desde el memmap (indexación avanzada) y
+    el resultado se guarda en `result_path` antes de devolverlo.
+    """
+    X = np.load(data_dir / 'X.npy', mmap_mode='r')
+    y = np.load(data_dir / 'y.npy', mmap_mode='r')
+    with np.load(data_dir / 'folds.npz') as indices:
+        train_idx, test_idx = indices[f'train_{fold}'], indices[f'test_{fold}']
+
+    reset_fit_peak_rss()
+    start = time.perf_counter()
+    forest = RandomForestRegressor(
+        **params,
+        random_state=training_settings.cv_random_state,
+        n_jobs=training_settings.forest_n_jobs,
+    ).fit(X[train_idx], y[train_idx])
+    fit_time = time.perf_counter() - start
+    score = r2_score(y[test_idx], forest.predict(X[test_idx]))
+    logger.info(
+        f'Fitted candidate {params} on fold {fold} in {fit_time:.2f}s, '
+        f'R2 {score:.4f}, peak RSS {peak_rss_mb():.0f} MiB'
+    )
+    result = {'params': params, 'fold': fold, 'score': float(score), 'fit_time': fit_time}
+    _write_result(result_path, result)
+    return result
+
+
+def _data_key(X: np.ndarray, y: np.ndarray, folds: list) -> str:
+    """Hash de los datos, los folds y la versión de scikit-learn."""
+    digest = hashlib.sha256()
+    digest.update(f'{X.shape}|{y.shape}|{sklearn.__version__}'.encode())
+    digest.update(memoryview(X).cast('B'))
+    digest.update(memoryview(y).cast('B'))
+    for _, test in folds:
+        digest.update(np.ascontiguousarray(test).tobytes())
+    return digest.hexdigest()
+
+
+def _result_path(cache_dir: Path, params: dict, fold: int) -> Path:
+    """Archivo de resultado de un candidato en un fold."""
+    key = json.dumps(
+        {'params': params, 'random_state': training_settings.cv_random_state},
+        sort_keys=True,
+    )
+    return cache_dir / f'{hashlib.sha256(key.encode()).hexdigest()[:24]}.fold{fold}.json'
+
+
+def _read_result(path: Path) -> dict | None:
+    """Lee un resultado cacheado, o `None` si no existe o está corrupto."""
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning(f'Ignoring unreadable cross-validation result {path}')
+        return None
+
+
+def _write_result(path: Path, result: dict) -> None:
+    """Escribe un resultado de forma atómica (temporal y renombrado)."""
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}')
+    tmp_path.write_text(json.dumps(result))
+    tmp_path.replace(path)
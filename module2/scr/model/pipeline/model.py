@@ -6,9 +6,13 @@ Este módulo implementa el flujo completo de machine learning para entrenar un m
 `RandomForestRegressor`, incluyendo:
 - Preparación de los datos.
 - Separación en conjuntos de entrenamiento y prueba.
-- Búsqueda de hiperparámetros mediante `GridSearchCV`.
+- Búsqueda de hiperparámetros configurable (`GridSearchCV`, successive
+  halving o warm start) en paralelo, ver `model.pipeline.training`.
 - Evaluación del modelo usando la métrica R².
-- Persistencia del modelo entrenado en disco.
+- Persistencia del modelo entrenado en disco, como pickle y como artefacto
+  sin pickle mapeable en memoria (ver `model.artifact`).
+- Exportación del bosque entrenado a arrays planos (`FlatForest`) para
+  inferencia vectorizada.
 
 La configuración de rutas y nombres del modelo se obtiene desde el módulo `config`,
 y la preparación de los datos se delega al pipeline de preprocesamiento.
@@ -21,16 +25,28 @@ Dependencias principales:
 Uso típico:
     >>> build_model()
 """
+import numpy as np
+import os
 import pandas as pd
 import pickle as pk
 import warnings
 
 from loguru import logger
-from sklearn.model_selection import GridSearchCV, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 
-from config import model_settings
+from config import db_settings, model_settings, training_settings
+from model.artifact import artifact_path_for, save_artifact
+from model.flat_forest import FlatForest
+from model.instrumentation import instrumented, timed
+from model.pipeline.compression import save_fast_variant, save_holdout
 from model.pipeline.preparation import prepare_data
+from model.pipeline.resources import track_stage
+from model.pipeline.sharded import train_sharded
+from model.pipeline.snapshot import load_incremental_data
+from model.pipeline.training import search_hyperparameters
+from model.preprocessing import PREPROCESSOR_SUFFIX, RentPreprocessor
+from model.schema import FEATURE_NAMES, TARGET_NAME
 
 warnings.filterwarnings('ignore')
 
@@ -39,12 +55,20 @@ def build_model() -> None:
     Ejecuta el pipeline completo de entrenamiento, evaluación y guardado del modelo.
 
     La función realiza de forma secuencial los siguientes pasos:
-    1. Obtiene y prepara el dataset mediante el pipeline de preprocesamiento.
+    1. Obtiene y prepara el dataset mediante el pipeline de preprocesamiento
+       (de forma incremental si `db_settings.incremental_extraction` está
+       activo). Con `training_settings.sharded_training` los pasos 1 a 4 se
+       sustituyen por el entrenamiento por fragmentos de `train_sharded`.
     2. Separa las variables independientes (X) y la variable objetivo (y).
     3. Divide los datos en conjuntos de entrenamiento y prueba.
-    4. Entrena un modelo de Random Forest optimizando hiperparámetros con GridSearchCV.
+    4. Entrena un modelo de Random Forest optimizando hiperparámetros con la
+       estrategia de búsqueda configurada.
     5. Evalúa el modelo utilizando la métrica R² sobre el conjunto de test.
-    6. Guarda el modelo entrenado en la ruta configurada.
+    6. Guarda el modelo entrenado en la ruta configurada, en pickle y como
+       artefacto aplanado, junto con el preprocesador ajustado y, con
+       `training_settings.compression_enabled`, la variante comprimida
+       `fast` y el conjunto de test con el que se elige (ver
+       `model.pipeline.compression`).
 
     Returns
     -------
@@ -52,41 +76,67 @@ def build_model() -> None:
         La función no retorna ningún valor. El modelo entrenado se persiste en disco.
     """
 
-    df = prepare_data()
-    feature_names = [
-        'area', 
-        'constraction_year', 
-        'bedrooms', 
-        'garden', 
-        'balcony_yes', 
-        'parking_yes', 
-        'furnished_yes', 
-        'garage_yes', 
-        'storage_yes'
-    ]
-    X, y = _get_x_y(
-        df,
-        col_x= feature_names)
-    X_train, X_test, y_train, y_test = _split_train_test(
-        X,
-        y,
-    )
-    model = _train_model(
-        X_train,
-        y_train,
-    )
-    score = _evaluate_model(
-        model,
-        X_test,
-        y_test,
-    )
+    preprocessor = RentPreprocessor()
+    memory_efficient = training_settings.memory_efficient
+    if training_settings.sharded_training:
+        with track_stage('train'):
+            model, X_test, y_test = train_sharded(preprocessor)
+    else:
+        with track_stage('prepare'):
+            if db_settings.incremental_extraction:
+                df = load_incremental_data(preprocessor=preprocessor)
+            else:
+                df = prepare_data(preprocessor, streaming=memory_efficient)
+        with track_stage('split'):
+            if memory_efficient:
+                X_train, X_test, y_train, y_test = _split_compact(
+                    df,
+                    col_x= list(FEATURE_NAMES))
+                del df
+            else:
+                X, y = _get_x_y(
+                    df,
+                    col_x= list(FEATURE_NAMES))
+                X_train, X_test, y_train, y_test = _split_train_test(
+                    X,
+                    y,
+                )
+        with track_stage('train'):
+            model = _train_model(
+                X_train,
+                y_train,
+            )
+    if memory_efficient and not training_settings.sharded_training:
+        model.feature_names_in_ = np.asarray(FEATURE_NAMES, dtype=object)
+    with track_stage('evaluate'):
+        score = _evaluate_model(
+            model,
+            X_test,
+            y_test,
+        )
     logger.info(f'Model R2 score: {score}')
-    _save_model(model, path= f'{model_settings.model_path}/{model_settings.model_name}')
+    model_path = f'{model_settings.model_path}/{model_settings.model_name}'
+    with track_stage('save'):
+        # El pickle se escribe el último: su existencia indica a
+        # `ModelService` y al coordinador que el modelo está completo.
+        preprocessor.save(f'{model_path}{PREPROCESSOR_SUFFIX}')
+        forest = export_flat_forest(model)
+        save_artifact(
+            forest,
+            artifact_path_for(model_path),
+            hyperparameters=model.get_params(),
+            r2_score=score,
+        )
+        save_holdout(model_path, X_test, y_test)
+        if training_settings.compression_enabled:
+            with timed('compress_model'):
+                save_fast_variant(forest, model_path, X_test, y_test, model.get_params())
+        _save_model(model, path= model_path)
 
 def _get_x_y(
         data: pd.DataFrame,
         col_x: list[str],
-        col_y: str = 'rent'
+        col_y: str = TARGET_NAME
     ) -> tuple[pd.DataFrame, pd.Series]:
     """
     Separa el dataset en variables explicativas (X) y variable objetivo (y).
@@ -136,6 +186,52 @@ def _split_train_test(
     return X_train, X_test, y_train, y_test
 
 
+def _split_compact(
+        data: pd.DataFrame,
+        col_x: list[str],
+        col_y: str = TARGET_NAME,
+        test_size: float = 0.2,
+        random_state: int = 42,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Construye una matriz float32 contigua y la divide en vistas train/test.
+
+    Las filas se copian una sola vez, columna a columna y ya permutadas,
+    en una matriz C-ordenada float32 (el dtype que utilizan internamente
+    los árboles de scikit-learn). Así el conjunto de test son las primeras
+    filas y el de entrenamiento el resto, ambos como vistas sin copia.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Dataset completo con features y variable objetivo.
+    col_x : list[str]
+        Columnas que se utilizarán como variables independientes.
+    col_y : str, default='rent'
+        Nombre de la columna objetivo.
+    test_size : float, default=0.2
+        Proporción de filas del conjunto de test.
+    random_state : int, default=42
+        Semilla de la permutación.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        X_train, X_test, y_train, y_test.
+    """
+    logger.info('Building a compact float32 matrix and splitting it ...')
+    n_rows = len(data)
+    order = np.random.default_rng(random_state).permutation(n_rows)
+
+    features = np.empty((n_rows, len(col_x)), dtype=np.float32, order='C')
+    for position, column in enumerate(col_x):
+        features[:, position] = data[column].to_numpy(dtype=np.float32, na_value=np.nan)[order]
+    target = data[col_y].to_numpy(dtype=np.float64, na_value=np.nan)[order]
+
+    n_test = int(np.ceil(n_rows * test_size))
+    return features[n_test:], features[:n_test], target[n_test:], target[:n_test]
+
+
 def _train_model(
         X_train: pd.DataFrame,
         y_train: pd.Series,
@@ -143,8 +239,10 @@ def _train_model(
     """
     Entrena un modelo RandomForestRegressor optimizando hiperparámetros.
 
-    Se utiliza GridSearchCV para seleccionar la mejor combinación de
-    hiperparámetros en función de la métrica R².
+    La búsqueda se delega en `search_hyperparameters`, que aplica la
+    estrategia configurada en `training_settings.training_search`
+    (GridSearchCV, successive halving o warm start) seleccionando la mejor
+    combinación de hiperparámetros en función de la métrica R².
 
     Parameters
     ----------
@@ -163,21 +261,14 @@ def _train_model(
         'n_estimators': [100, 200, 300], 
         'max_depth': [3, 6, 9, 12],
     }
-    
-    grid = GridSearchCV(
-        RandomForestRegressor(), 
-        param_grid=grid_space, 
-        cv=5, 
-        scoring = 'r2',
-    )
 
-    model_grid = grid.fit(
-        X_train,
-        y_train,
+    with timed('train_model') as stage:
+        stage.rows = len(X_train)
+        return search_hyperparameters(
+            X_train,
+            y_train,
+            grid_space,
         )
-    model = model_grid.best_estimator_
-
-    return model
 
 def _evaluate_model(
         model: RandomForestRegressor, 
@@ -207,10 +298,14 @@ def _evaluate_model(
         y_test,
         )
 
+@instrumented('save_model')
 def _save_model(model: RandomForestRegressor, path: str)-> None:
     """
     Persiste el modelo entrenado en disco utilizando pickle.
 
+    El pickle se escribe en un archivo temporal y se renombra al final, de
+    modo que los lectores nunca ven un modelo a medio escribir.
+
     Parameters
     ----------
     model : object
@@ -224,5 +319,59 @@ def _save_model(model: RandomForestRegressor, path: str)-> None:
         La función no retorna ningún valor.
     """
     logger.info(f'saving the model to a directory: {path}')
-    with open(path, 'wb') as model_file:
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as model_file:
         pk.dump(model, model_file)
+    os.replace(tmp_path, path)
+
+def export_flat_forest(model: RandomForestRegressor) -> FlatForest:
+    """
+    Aplana los árboles de un RandomForestRegressor en arrays contiguos.
+
+    Concatena los nodos de todos los árboles en arrays únicos de feature,
+    umbral, hijos izquierdo/derecho y valor, con índices globales. Las hojas
+    se convierten en nodos que apuntan a sí mismos con umbral +inf, de modo
+    que el motor de `FlatForest` puede recorrerlos sin distinguir casos.
+
+    Parameters
+    ----------
+    model : RandomForestRegressor
+        Modelo entrenado (por ejemplo, `best_estimator_` de la búsqueda).
+
+    Returns
+    -------
+    FlatForest
+        Bosque aplanado equivalente al modelo.
+
+    Raises
+    ------
+    ValueError
+        Si el modelo tiene más de una variable objetivo.
+    """
+    if model.n_outputs_ != 1:
+        raise ValueError('Solo se pueden aplanar bosques de una única salida.')
+
+    logger.info(f'Flattening {len(model.estimators_)} trees into arrays ...')
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+
+    feature, threshold, left, right, value = [], [], [], [], []
+    for offset, tree in zip(offsets, trees):
+        is_leaf = tree.children_left == -1
+        own = np.arange(tree.node_count) + offset
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+        left.append(np.where(is_leaf, own, tree.children_left + offset))
+        right.append(np.where(is_leaf, own, tree.children_right + offset))
+        value.append(tree.value[:, 0, 0])
+
+    feature_names = getattr(model, 'feature_names_in_', None)
+    return FlatForest(
+        feature=np.concatenate(feature).astype(np.int32),
+        threshold=np.concatenate(threshold).astype(np.float64),
+        children=np.column_stack([np.concatenate(left), np.concatenate(right)]).astype(np.int32),
+        value=np.concatenate(value).astype(np.float64),
+        roots=offsets[:-1].astype(np.int32),
+        max_depth=max(tree.max_depth for tree in trees),
+        feature_names_in_=None if feature_names is None else np.asarray(feature_names, dtype=str),
+    )
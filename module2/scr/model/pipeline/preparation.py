@@ -4,23 +4,28 @@ Preparación y transformación de datos de apartamentos en alquiler.
 Este módulo contiene funciones auxiliares para preparar el conjunto de
 datos de apartamentos en alquiler antes de su uso en análisis o modelos
 de machine learning. Incluye la carga de datos desde la base de datos,
-la codificación de variables categóricas y la transformación de columnas
-específicas a formatos numéricos.
+la codificación de variables categóricas con un vocabulario fijo y la
+transformación de columnas específicas a formatos numéricos, ambas
+vectorizadas.
 
 Las funciones aquí definidas operan principalmente sobre objetos
 `pandas.DataFrame` y forman parte del pipeline de preprocesamiento
 de datos de la aplicación.
 """
 
-import re
-
 import pandas as pd
 from loguru import logger
 
-from model.pipeline.collection import load_data_from_db
+from model.instrumentation import instrumented
+from model.pipeline.collection import load_data_from_db, stream_data_from_db
+from model.preprocessing import RentPreprocessor, encode_categories, parse_garden
+from model.schema import CATEGORY_VOCABULARY
 
 
-def prepare_data() -> pd.DataFrame:
+def prepare_data(
+        preprocessor: RentPreprocessor | None = None,
+        streaming: bool = False,
+    ) -> pd.DataFrame:
     """
     Prepara el conjunto de datos de apartamentos en alquiler.
 
@@ -28,26 +33,70 @@ def prepare_data() -> pd.DataFrame:
     de datos, codificando las variables categóricas relevantes y
     transformando la columna `garden` a un formato numérico.
 
+    Args:
+        preprocessor (RentPreprocessor | None): Transformador a ajustar con
+            los datos crudos, para reutilizarlo en serving.
+        streaming (bool): Si es `True` la tabla se extrae por bloques con
+            solo las columnas del pipeline y dtypes compactos, y cada
+            bloque se prepara antes de extraer el siguiente.
+
     Returns:
         pd.DataFrame: DataFrame con los datos procesados y listos para su
         uso en análisis o modelos de machine learning.
     """
         
     logger.info('starting up processing pipeline')
+    if streaming:
+        return pd.concat(
+            [prepare_frame(chunk, preprocessor) for chunk in stream_data_from_db()],
+            ignore_index=True,
+        )
     dataframe = load_data_from_db()
+    return prepare_frame(dataframe, preprocessor)
+
+
+def prepare_frame(
+        dataframe: pd.DataFrame,
+        preprocessor: RentPreprocessor | None = None,
+    ) -> pd.DataFrame:
+    """
+    Aplica las transformaciones del pipeline a un DataFrame ya extraído.
+
+    Codifica las variables categóricas y transforma la columna `garden` a
+    formato numérico. Permite preparar tanto la tabla completa como
+    bloques parciales (por ejemplo, las filas nuevas de una extracción
+    incremental).
+
+    Args:
+        dataframe (pd.DataFrame): Datos crudos de la tabla RentApartments.
+        preprocessor (RentPreprocessor | None): Transformador a ajustar con
+            este bloque si todavía no está ajustado.
+
+    Returns:
+        pd.DataFrame: DataFrame con los datos procesados.
+    """
+    if preprocessor is not None and preprocessor.input_dtypes_ is None:
+        preprocessor.fit(dataframe)
+
     data_encoded = _enconde_cat_cols(dataframe) 
 
     data_encoded['garden'] = _parse_garden_col(data_encoded['garden'])
     return data_encoded
 
 
+@instrumented('encode_cat_cols', rows=len)
 def _enconde_cat_cols(data: pd.DataFrame) -> pd.DataFrame:
     """
     Codifica columnas categóricas del conjunto de datos.
 
-    Transforma las columnas categóricas especificadas en variables
-    numéricas mediante codificación one-hot, eliminando la primera
-    categoría para evitar multicolinealidad.
+    Transforma las columnas categóricas declaradas en
+    `CATEGORY_VOCABULARY` en variables indicadoras `uint8`, omitiendo la
+    primera categoría de cada vocabulario para evitar multicolinealidad.
+    Como el vocabulario es fijo, el conjunto de columnas resultante no
+    depende de los valores presentes en los datos; los valores fuera del
+    vocabulario (o nulos) se codifican como la categoría omitida.
+
+    Las columnas se codifican sobre el propio DataFrame, sin copiarlo.
 
     Args:
         data (pd.DataFrame): DataFrame de entrada con columnas
@@ -56,22 +105,23 @@ def _enconde_cat_cols(data: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame con las columnas categóricas codificadas.
     """
-    columns = ['balcony', 'parking', 'furnished', 'garage', 'storage']
+    columns = list(CATEGORY_VOCABULARY)
     logger.info(f'Encoding caregorical columns {columns}')
 
-    return pd.get_dummies(
-        data, 
-        columns=columns,
-        drop_first=True)
+    return encode_categories(data, CATEGORY_VOCABULARY)
 
 
+@instrumented('parse_garden_col', rows=len)
 def _parse_garden_col(dataframe: pd.DataFrame) -> pd.DataFrame:
     """
     Normaliza la columna `garden` a un formato numérico.
 
-    Convierte los valores de la columna `garden` en enteros, extrayendo
-    cantidades numéricas cuando están presentes y asignando el valor
-    cero cuando el jardín no está disponible.
+    Extrae de forma vectorizada la primera cantidad numérica de cada valor
+    (los metros cuadrados en 'Present (20 m²)') como entero `Int16`,
+    asignando el valor cero cuando el jardín no está disponible o no indica
+    superficie. Como la columna tiene pocos valores distintos, la
+    extracción con `str.extract` se hace sobre los valores únicos y el
+    resultado se expande con sus códigos.
 
     Args:
         data (pd.DataFrame): Serie o columna del DataFrame que representa
@@ -82,6 +132,4 @@ def _parse_garden_col(dataframe: pd.DataFrame) -> pd.DataFrame:
     """
 
     logger.info(f'Parsing column garden')
-    dataframe = dataframe.apply(lambda x: int(re.findall(r'\d+', x)[0]) if x != 'Not present' else 0)
-
-    return dataframe
+    return parse_garden(dataframe)
@@ -0,0 +1,213 @@
+"""
+Utilidades para dimensionar y medir el uso de recursos del entrenamiento.
+
+Este módulo contiene funciones para conocer los núcleos de CPU disponibles
+para el proceso (respetando la afinidad de CPU y los límites del
+contenedor) y para medir el pico de memoria residente (RSS), de forma que
+la paralelización del entrenamiento no sobresuscriba la máquina y el
+consumo de cada etapa pueda registrarse con `track_stage`. Otros
+componentes (por ejemplo, el coordinador de construcción del modelo)
+pueden seguir el avance de las etapas con `add_stage_listener`.
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from loguru import logger
+
+_PROC_STATUS = Path('/proc/self/status')
+_PROC_CLEAR_REFS = Path('/proc/self/clear_refs')
+
+# Funciones notificadas al empezar (`elapsed=None`) y terminar cada etapa.
+_stage_listeners: list[Callable[[str, float | None], None]] = []
+# Etapas de `track_stage` en curso en este proceso.
+_active_stages = 0
+
+
+def available_cpus() -> int:
+    """
+    Devuelve el número de CPUs que puede utilizar el proceso actual.
+
+    Returns
+    -------
+    int
+        CPUs según la afinidad del proceso o, si no está disponible,
+        `os.cpu_count()`.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reinicia el contador de pico de RSS del proceso (solo Linux).
+
+    Returns
+    -------
+    bool
+        `True` si el contador se reinició; `False` si la plataforma no lo
+        permite, en cuyo caso `peak_rss_mb` devuelve el pico de toda la
+        vida del proceso.
+    """
+    try:
+        _PROC_CLEAR_REFS.write_text('5')
+    except OSError:
+        return False
+    return True
+
+
+def reset_fit_peak_rss() -> None:
+    """
+    Reinicia el pico de RSS antes de un ajuste individual.
+
+    Dentro de `track_stage` no hace nada: el pico de la etapa debe abarcar
+    todos sus ajustes, no solo el último.
+    """
+    if not _active_stages:
+        reset_peak_rss()
+
+
+def peak_rss_mb() -> float:
+    """
+    Devuelve el pico de memoria residente del proceso en MiB.
+
+    Returns
+    -------
+    float
+        Pico de RSS desde el inicio del proceso o desde el último
+        `reset_peak_rss`.
+    """
+    try:
+        for line in _PROC_STATUS.read_text().splitlines():
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+def add_stage_listener(listener: Callable[[str, float | None], None]) -> None:
+    """
+    Registra una función a la que `track_stage` notifica cada etapa.
+
+    Parameters
+    ----------
+    listener : Callable[[str, float | None], None]
+        Recibe el nombre de la etapa y `None` al empezar o su duración en
+        segundos al terminar.
+    """
+    _stage_listeners.append(listener)
+
+
+class _ChildrenRssMonitor(threading.Thread):
+    """
+    Muestrea la RSS conjunta de los procesos hijos durante una etapa.
+
+    Los ajustes de la búsqueda se ejecutan en procesos de joblib que
+    persisten entre llamadas, por lo que su memoria no aparece en el pico
+    del proceso ni en `RUSAGE_CHILDREN` hasta que terminan. Solo Linux.
+    """
+
+    def __init__(self, interval: float = 0.1) -> None:
+        super().__init__(name='children-rss', daemon=True)
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.is_set():
+            self.peak_mb = max(self.peak_mb, _children_rss_mb())
+            self._stop_event.wait(self.interval)
+
+    def stop(self) -> float:
+        """Detiene el muestreo y devuelve el pico observado en MiB."""
+        self._stop_event.set()
+        self.join()
+        return max(self.peak_mb, _children_rss_mb())
+
+
+def _children_rss_mb() -> float:
+    """RSS actual, en MiB, de todos los descendientes del proceso."""
+    parents: dict[int, list[int]] = {}
+    try:
+        for entry in Path('/proc').iterdir():
+            if entry.name.isdigit():
+                try:
+                    stat = (entry / 'stat').read_text()
+                except OSError:
+                    continue
+                ppid = int(stat.rsplit(')', 1)[1].split()[1])
+                parents.setdefault(ppid, []).append(int(entry.name))
+    except OSError:
+        return 0.0
+
+    total_kb = 0
+    pending = list(parents.get(os.getpid(), []))
+    while pending:
+        pid = pending.pop()
+        pending.extend(parents.get(pid, []))
+        try:
+            for line in Path(f'/proc/{pid}/status').read_text().splitlines():
+                if line.startswith('VmRSS:'):
+                    total_kb += int(line.split()[1])
+                    break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def _reaped_children_peak_mb() -> float:
+    """Pico de RSS del mayor hijo ya terminado, en MiB."""
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 1024
+
+
+@contextmanager
+def track_stage(name: str) -> Iterator[None]:
+    """
+    Registra la duración y el pico de RSS de una etapa del pipeline.
+
+    El pico se informa para el propio proceso y para sus procesos hijos
+    (los workers de la búsqueda de hiperparámetros): cuánto supera su RSS
+    conjunta, muestreada durante la etapa, a la que tenían al empezarla
+    (los workers de joblib persisten entre etapas), o el pico de un hijo
+    terminado durante ella si es mayor.
+
+    Parameters
+    ----------
+    name : str
+        Nombre de la etapa a mostrar en el log.
+    """
+    global _active_stages
+    for listener in _stage_listeners:
+        listener(name, None)
+    reset_peak_rss()
+    reaped_before = _reaped_children_peak_mb()
+    children_before = _children_rss_mb()
+    monitor = _ChildrenRssMonitor()
+    monitor.start()
+    _active_stages += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _active_stages -= 1
+        children_peak = max(0.0, monitor.stop() - children_before)
+    elapsed = time.perf_counter() - start
+    reaped = _reaped_children_peak_mb()
+    if reaped > reaped_before:
+        children_peak = max(children_peak, reaped)
+    logger.info(
+        f'Stage {name} finished in {elapsed:.2f}s, '
+        f'peak RSS {peak_rss_mb():.0f} MiB, children peak RSS +{children_peak:.0f} MiB'
+    )
+    for listener in _stage_listeners:
+        listener(name, elapsed)
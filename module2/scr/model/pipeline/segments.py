@@ -0,0 +1,138 @@
+"""
+Entrenamiento de modelos por segmento para `ModelRegistry`.
+
+Entrena un `RandomForestRegressor` por cada valor de
+`model_settings.segment_column` con al menos
+`training_settings.segment_min_rows` filas, y lo guarda con la misma
+estructura que el modelo principal (preprocesador, artefacto y pickle, en
+ese orden) en `<model_path>/<segment_models_dir>/<segmento>/<model_name>`.
+Los segmentos con menos filas no tienen modelo propio y se sirven con el
+modelo principal.
+
+Todos los segmentos comparten el mismo preprocesador, ajustado con la
+tabla completa, de modo que sus matrices de features tienen las mismas
+columnas que las del modelo principal.
+
+Uso típico:
+    >>> python -m model.pipeline.segments
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.model_selection import train_test_split
+
+from config import model_settings, training_settings
+from model.artifact import artifact_path_for, save_artifact
+from model.pipeline.collection import PIPELINE_COLUMNS, stream_data_from_db
+from model.pipeline.model import _save_model, export_flat_forest
+from model.pipeline.resources import track_stage
+from model.preprocessing import PREPROCESSOR_SUFFIX, RentPreprocessor
+from model.registry import segment_slug
+from model.schema import TARGET_NAME
+
+
+def build_segment_models() -> dict[str, float]:
+    """
+    Entrena y guarda un modelo por cada segmento con filas suficientes.
+
+    Returns
+    -------
+    dict[str, float]
+        Score R² sobre el conjunto de test de cada segmento entrenado,
+        indexado por el nombre de su directorio.
+    """
+    segment_column = model_settings.segment_column
+    with track_stage('prepare'):
+        data = pd.concat(
+            list(stream_data_from_db(columns={**PIPELINE_COLUMNS, segment_column: 'string'})),
+            ignore_index=True,
+        )
+        data = data[data[segment_column].notna() & data[TARGET_NAME].notna()]
+        preprocessor = RentPreprocessor().fit(data)
+        features = preprocessor.transform(data)
+        target = data[TARGET_NAME].to_numpy(dtype=np.float64)
+        feature_names = np.asarray(preprocessor.feature_names, dtype=object)
+
+    sizes = data[segment_column].value_counts()
+    eligible = sizes[sizes >= training_settings.segment_min_rows].index
+    logger.info(
+        f'Training {len(eligible)} of {len(sizes)} {segment_column} segments '
+        f'with at least {training_settings.segment_min_rows} rows'
+    )
+
+    models_dir = Path(model_settings.model_path) / model_settings.segment_models_dir
+    segments = data[segment_column].to_numpy()
+    scores = {}
+    with track_stage('train'):
+        for segment in eligible:
+            rows = np.flatnonzero(segments == segment)
+            slug = segment_slug(segment)
+            scores[slug] = _build_segment(
+                features[rows],
+                target[rows],
+                feature_names,
+                preprocessor,
+                models_dir / slug / model_settings.model_name,
+            )
+    return scores
+
+
+def _build_segment(
+        features: np.ndarray,
+        target: np.ndarray,
+        feature_names: np.ndarray,
+        preprocessor: RentPreprocessor,
+        model_path: Path,
+    ) -> float:
+    """
+    Entrena, evalúa y guarda el modelo de un segmento.
+
+    Parameters
+    ----------
+    features : np.ndarray
+        Matriz de features de las filas del segmento.
+    target : np.ndarray
+        Variable objetivo de las filas del segmento.
+    feature_names : np.ndarray
+        Orden de features, guardado en el modelo como `feature_names_in_`.
+    preprocessor : RentPreprocessor
+        Preprocesador ajustado con la tabla completa.
+    model_path : Path
+        Ruta del pickle del modelo del segmento.
+
+    Returns
+    -------
+    float
+        Score R² sobre el conjunto de test del segmento.
+    """
+    X_train, X_test, y_train, y_test = train_test_split(
+        features, target, test_size=0.2, random_state=42,
+    )
+    model = RandomForestRegressor(
+        n_estimators=training_settings.segment_n_estimators,
+        max_depth=training_settings.segment_max_depth,
+        n_jobs=training_settings.forest_n_jobs,
+        random_state=42,
+    ).fit(X_train, y_train)
+    model.feature_names_in_ = feature_names
+    score = model.score(X_test, y_test)
+    logger.info(f'Segment {model_path.parent.name}: {len(features)} rows, R2 {score:.3f}')
+
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    preprocessor.save(f'{model_path}{PREPROCESSOR_SUFFIX}')
+    save_artifact(
+        export_flat_forest(model),
+        artifact_path_for(model_path),
+        hyperparameters=model.get_params(),
+        r2_score=score,
+    )
+    _save_model(model, path=str(model_path))
+    return score
+
+
+if __name__ == '__main__':
+    build_segment_models()
@@ -0,0 +1,172 @@
+"""
+Entrenamiento out-of-core por fragmentos para tablas que no caben en RAM.
+
+Este módulo recorre la tabla `RentApartments` en streaming por fragmentos
+de `training_settings.shard_rows` filas. Cada fragmento se transforma con
+el preprocesador compartido y se divide de forma aleatoria en filas de
+entrenamiento y de test:
+- Las filas de entrenamiento se envían a un pool de procesos, que ajusta
+  un sub-bosque por fragmento.
+- Las filas de test alimentan una muestra por reservoir sampling de
+  tamaño acotado, usada después por `_evaluate_model`. Las filas de test
+  que no entran en la muestra, o que salen de ella al llegar otras, se
+  entrenan con el siguiente fragmento, de modo que en tablas grandes
+  ninguna fila se descarta: el test son exactamente las filas que quedan
+  en la muestra al final.
+
+Al terminar, los `estimators_` de todos los sub-bosques se combinan en un
+único `RandomForestRegressor`. La memoria de entrenamiento escala así con
+el tamaño del fragmento (por el número de procesos) y no con la tabla.
+"""
+
+import copy
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+import numpy as np
+from loguru import logger
+from sklearn.ensemble import RandomForestRegressor
+
+from config import training_settings
+from model.pipeline.collection import stream_data_from_db
+from model.pipeline.resources import available_cpus
+from model.preprocessing import RentPreprocessor
+from model.schema import FEATURE_NAMES, TARGET_NAME
+
+
+class _Reservoir:
+    """Muestra uniforme de tamaño fijo de un flujo de filas (algoritmo R)."""
+
+    def __init__(self, capacity: int, n_features: int, seed: int) -> None:
+        """Inicializa una muestra vacía con capacidad para `capacity` filas."""
+        self.capacity = capacity
+        self.seen = 0
+        self.X = np.empty((capacity, n_features), dtype=np.float32)
+        self.y = np.empty(capacity, dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, X: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Incorpora un bloque de filas a la muestra.
+
+        Devuelve las filas que quedan fuera: las del bloque que no entran
+        y las que la muestra desplaza.
+        """
+        positions = np.arange(self.seen, self.seen + len(y))
+        free = positions < self.capacity
+        self.X[positions[free]] = X[free]
+        self.y[positions[free]] = y[free]
+
+        candidates = ~free
+        slots = self._rng.integers(0, positions[candidates] + 1)
+        keep = slots < self.capacity
+        rows, slots = np.flatnonzero(candidates)[keep], slots[keep]
+        # Si varias filas del bloque caen en el mismo hueco, se queda la última.
+        _, last = np.unique(slots[::-1], return_index=True)
+        rows, slots = rows[len(rows) - 1 - last], slots[len(slots) - 1 - last]
+        evicted_X, evicted_y = self.X[slots].copy(), self.y[slots].copy()
+        self.X[slots] = X[rows]
+        self.y[slots] = y[rows]
+        self.seen += len(y)
+
+        out = np.ones(len(y), dtype=bool)
+        out[free] = False
+        out[rows] = False
+        return np.concatenate([X[out], evicted_X]), np.concatenate([y[out], evicted_y])
+
+    def sample(self) -> tuple[np.ndarray, np.ndarray]:
+        """Devuelve las filas muestreadas."""
+        size = min(self.seen, self.capacity)
+        return self.X[:size], self.y[:size]
+
+
+def train_sharded(
+        preprocessor: RentPreprocessor,
+        random_state: int = 42,
+    ) -> tuple[RandomForestRegressor, np.ndarray, np.ndarray]:
+    """
+    Entrena un bosque combinando sub-bosques ajustados por fragmento.
+
+    Parameters
+    ----------
+    preprocessor : RentPreprocessor
+        Transformador de registros crudos; se ajusta con el primer
+        fragmento si todavía no lo está.
+    random_state : int, default=42
+        Semilla de la partición train/test y de los sub-bosques.
+
+    Returns
+    -------
+    tuple[RandomForestRegressor, np.ndarray, np.ndarray]
+        Bosque combinado y muestra de test (X_test, y_test).
+
+    Raises
+    ------
+    ValueError
+        Si la tabla no contiene filas de entrenamiento.
+    """
+    n_workers = max(1, available_cpus() // training_settings.forest_n_jobs)
+    rng = np.random.default_rng(random_state)
+    reservoir = _Reservoir(
+        training_settings.holdout_max_rows, len(FEATURE_NAMES), random_state,
+    )
+    logger.info(
+        f'Training sharded forest: {training_settings.shard_rows} rows per shard, '
+        f'{training_settings.shard_n_estimators} trees per shard, {n_workers} workers'
+    )
+
+    forests: list[RandomForestRegressor] = []
+    pending: set[Future] = set()
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        for shard, chunk in enumerate(stream_data_from_db(chunksize=training_settings.shard_rows)):
+            if preprocessor.input_dtypes_ is None:
+                preprocessor.fit(chunk)
+            X = preprocessor.transform(chunk)
+            y = chunk[TARGET_NAME].to_numpy(dtype=np.float64, na_value=np.nan)
+            del chunk
+
+            holdout = rng.random(len(y)) < training_settings.holdout_fraction
+            overflow_X, overflow_y = reservoir.add(X[holdout], y[holdout])
+            X = np.concatenate([X[~holdout], overflow_X])
+            y = np.concatenate([y[~holdout], overflow_y])
+            if not len(y):
+                continue
+
+            if len(pending) >= n_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                forests.extend(future.result() for future in done)
+            pending.add(pool.submit(_fit_shard, X, y, random_state + shard))
+            logger.info(f'Submitted shard {shard} with {len(y)} training rows')
+
+        forests.extend(future.result() for future in pending)
+
+    if not forests:
+        raise ValueError('La tabla no contiene filas suficientes para entrenar.')
+
+    X_test, y_test = reservoir.sample()
+    logger.info(f'Merging {len(forests)} sub-forests; hold-out sample of {len(y_test)} rows')
+    return _merge_forests(forests), X_test, y_test
+
+
+def _fit_shard(X: np.ndarray, y: np.ndarray, seed: int) -> RandomForestRegressor:
+    """Ajusta el sub-bosque de un fragmento (se ejecuta en un proceso del pool)."""
+    return RandomForestRegressor(
+        n_estimators=training_settings.shard_n_estimators,
+        max_depth=training_settings.shard_max_depth,
+        n_jobs=training_settings.forest_n_jobs,
+        random_state=seed,
+    ).fit(X, y)
+
+
+def _merge_forests(forests: list[RandomForestRegressor]) -> RandomForestRegressor:
+    """
+    Combina varios sub-bosques en un único `RandomForestRegressor`.
+
+    La predicción del bosque combinado es la media de todos los árboles,
+    igual que si se hubieran ajustado en un único bosque.
+    """
+    merged = copy.deepcopy(forests[0])
+    merged.estimators_ = [tree for forest in forests for tree in forest.estimators_]
+    merged.n_estimators = len(merged.estimators_)
+    merged.feature_names_in_ = np.asarray(FEATURE_NAMES, dtype=object)
+    merged.set_params(n_jobs=None)
+    return merged
@@ -0,0 +1,246 @@
+"""
+Extracción incremental con instantánea local en Parquet.
+
+Este módulo mantiene una instantánea local de los datos ya preparados de la
+tabla `RentApartments` junto con una marca de agua (el valor máximo de
+`db_settings.watermark_column` ya extraído). En cada ejecución solo se
+extraen y preparan las filas con una marca de agua posterior, que se
+guardan como una nueva parte de la instantánea. Al leer, las partes se
+combinan y, si una fila aparece en varias partes (porque fue actualizada),
+prevalece su versión más reciente; las filas cuya clave
+(`db_settings.snapshot_key_column`) ya no está en la tabla se descartan,
+de modo que los borrados también se reflejan.
+
+Para detectar filas actualizadas, la marca de agua debe cambiar al
+actualizar una fila: por defecto es `updated_at`, que `ingest.py`
+mantiene en cada inserción o upsert. `rowid` se rechaza como marca de
+agua porque un `ON CONFLICT DO UPDATE` conserva el `rowid` de la fila y
+la versión nueva no se extraería nunca.
+
+Estructura en disco (`<snapshot_dir>/<tabla>/`):
+- `part-000001.parquet`, `part-000002.parquet`, ...: datos preparados.
+- `watermark.json`: columna y valor de la marca de agua, filas, partes y
+  número de la siguiente parte.
+
+Uso típico:
+    >>> df = load_incremental_data()
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+from loguru import logger
+from sqlalchemy import inspect, literal_column, select
+
+from config import db_settings, get_engine
+from db.db_model import RentApartments
+from model.pipeline.collection import PIPELINE_COLUMNS, stream_data_from_db
+from model.pipeline.preparation import prepare_frame
+from model.preprocessing import RentPreprocessor
+
+WATERMARK_FILE = 'watermark.json'
+
+
+def load_incremental_data(
+        refresh: bool = False,
+        preprocessor: RentPreprocessor | None = None,
+    ) -> pd.DataFrame:
+    """
+    Devuelve los datos preparados, extrayendo solo las filas nuevas.
+
+    Parameters
+    ----------
+    refresh : bool, default=False
+        Si es `True` se descarta la instantánea y se reconstruye desde una
+        extracción completa.
+    preprocessor : RentPreprocessor | None, default=None
+        Transformador a ajustar con las filas crudas extraídas. Si no hay
+        filas nuevas se ajusta con el esquema de `PIPELINE_COLUMNS`.
+
+    Returns
+    -------
+    pd.DataFrame
+        Datos preparados de la tabla completa (instantánea + filas nuevas).
+
+    Raises
+    ------
+    ValueError
+        Si la marca de agua es `rowid`, no existe en la tabla o no coincide
+        con la de la instantánea.
+    """
+    _check_watermark_column()
+    snapshot_dir = Path(db_settings.snapshot_dir) / db_settings.rent_apartment_table_name
+    if refresh and snapshot_dir.exists():
+        logger.info(f'Discarding snapshot {snapshot_dir}')
+        shutil.rmtree(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+    state = _read_watermark(snapshot_dir)
+    if state is not None and state['column'] != db_settings.watermark_column:
+        raise ValueError(
+            f'La instantánea {snapshot_dir} usa la marca de agua '
+            f'{state["column"]!r}; utilice refresh=True para reconstruirla.'
+        )
+    since = None if state is None else state['value']
+    logger.info(f'Extracting rows with {db_settings.watermark_column} > {since}')
+
+    new_rows = _extract_new_rows(since, preprocessor)
+    if preprocessor is not None and preprocessor.input_dtypes_ is None:
+        preprocessor.fit(pd.DataFrame({
+            column: pd.Series(dtype=dtype) for column, dtype in PIPELINE_COLUMNS.items()
+        }))
+    if new_rows is not None:
+        next_part = _next_part(state)
+        part_name = _part_name(next_part)
+        _write_atomic(new_rows, snapshot_dir / part_name)
+        state = {
+            'column': db_settings.watermark_column,
+            'value': _to_json_scalar(new_rows[db_settings.watermark_column].max()),
+            'parts': (state['parts'] if state else []) + [part_name],
+            'next_part': next_part + 1,
+        }
+        logger.info(f'Appended {len(new_rows)} rows to snapshot as {part_name}')
+    elif state is None:
+        logger.warning('The table is empty; no snapshot was written')
+        return pd.DataFrame()
+
+    data = _drop_deleted_rows(_read_snapshot(snapshot_dir, state['parts']))
+    if len(state['parts']) > db_settings.snapshot_max_parts:
+        next_part = _next_part(state)
+        state['parts'] = _compact(snapshot_dir, data, state['parts'], next_part)
+        state['next_part'] = next_part + 1
+
+    state['rows'] = len(data)
+    _write_watermark(snapshot_dir, state)
+    return data
+
+
+def _extract_new_rows(
+        since: object | None,
+        preprocessor: RentPreprocessor | None = None,
+    ) -> pd.DataFrame | None:
+    """Extrae y prepara las filas posteriores a la marca de agua."""
+    chunks = [
+        prepare_frame(chunk, preprocessor)
+        for chunk in stream_data_from_db(
+            watermark_column=db_settings.watermark_column,
+            since=since,
+            key_column=db_settings.snapshot_key_column,
+        )
+        if not chunk.empty
+    ]
+    if not chunks:
+        return None
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _check_watermark_column() -> None:
+    """Comprueba que la marca de agua detecta filas nuevas y actualizadas."""
+    column = db_settings.watermark_column
+    if column.lower() == 'rowid':
+        raise ValueError(
+            'La marca de agua rowid no cambia cuando un upsert actualiza una fila, por lo que '
+            'la instantánea no recogería las versiones nuevas; utilice una columna de '
+            'actualización como updated_at (la mantiene ingest.py).'
+        )
+    table = db_settings.rent_apartment_table_name
+    if column not in {info['name'] for info in inspect(get_engine()).get_columns(table)}:
+        raise ValueError(
+            f'La tabla {table} no tiene la columna de marca de agua {column!r}; '
+            'ingest.py la crea y la mantiene en cada carga.'
+        )
+
+
+def _drop_deleted_rows(data: pd.DataFrame) -> pd.DataFrame:
+    """Descarta las filas cuya clave ya no existe en la tabla."""
+    key = db_settings.snapshot_key_column
+    with get_engine().connect() as connection:
+        query = select(literal_column(key).label(key)).select_from(RentApartments)
+        live_keys = pd.read_sql(query, connection)[key]
+    deleted = ~data[key].isin(live_keys)
+    if deleted.any():
+        logger.info(f'Dropping {int(deleted.sum())} snapshot rows deleted from the table')
+        data = data[~deleted].reset_index(drop=True)
+    return data
+
+
+def _read_snapshot(snapshot_dir: Path, parts: list[str]) -> pd.DataFrame:
+    """Lee las partes de la instantánea quedándose con la última versión."""
+    frames = [pd.read_parquet(snapshot_dir / part) for part in parts]
+    data = pd.concat(frames, ignore_index=True)
+
+    key = db_settings.snapshot_key_column
+    if len(frames) > 1 and key in data.columns:
+        data = data.drop_duplicates(subset=key, keep='last', ignore_index=True)
+    return data
+
+
+def _compact(
+        snapshot_dir: Path,
+        data: pd.DataFrame,
+        parts: list[str],
+        part: int,
+    ) -> list[str]:
+    """Reescribe la instantánea como una única parte con el número `part`."""
+    logger.info(f'Compacting {len(parts)} snapshot parts')
+    part_name = _part_name(part)
+    _write_atomic(data, snapshot_dir / part_name)
+    for old_part in parts:
+        if old_part != part_name:
+            (snapshot_dir / old_part).unlink(missing_ok=True)
+    return [part_name]
+
+
+def _next_part(state: dict | None) -> int:
+    """
+    Número de la siguiente parte de la instantánea.
+
+    El contador `next_part` solo crece, de modo que una parte nueva o
+    compactada nunca reutiliza el nombre de una existente. Las instantáneas
+    escritas sin contador lo derivan de la parte más alta.
+    """
+    if state is None:
+        return 1
+    if 'next_part' in state:
+        return state['next_part']
+    return 1 + max(int(part[len('part-'):-len('.parquet')]) for part in state['parts'])
+
+
+def _part_name(part: int) -> str:
+    """Nombre del archivo de una parte de la instantánea."""
+    return f'part-{part:06d}.parquet'
+
+
+def _write_atomic(data: pd.DataFrame, path: Path) -> None:
+    """Escribe un Parquet en un archivo temporal y lo renombra al destino."""
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    data.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _read_watermark(snapshot_dir: Path) -> dict | None:
+    """Lee el estado de la marca de agua, o `None` si no existe."""
+    path = snapshot_dir / WATERMARK_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def _write_watermark(snapshot_dir: Path, state: dict) -> None:
+    """Persiste de forma atómica el estado de la marca de agua."""
+    path = snapshot_dir / WATERMARK_FILE
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(json.dumps(state, indent=2))
+    os.replace(tmp_path, path)
+
+
+def _to_json_scalar(value: object) -> object:
+    """Convierte el valor de la marca de agua a un tipo serializable."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
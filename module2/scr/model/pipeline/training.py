@@ -0,0 +1,225 @@
+"""
+Motor de búsqueda de hiperparámetros para el modelo de alquileres.
+
+Este módulo implementa las estrategias de búsqueda configurables mediante
+`training_settings.training_search`:
+- `grid`: validación cruzada sobre toda la rejilla. Con
+  `training_settings.cv_cache_enabled` se usa `cached_grid_search` (folds
+  fijos, datos mapeados en memoria y resultados cacheados en disco, ver
+  `model.pipeline.cv`); si no, `GridSearchCV`.
+- `halving`: successive halving (`HalvingGridSearchCV`) usando
+  `n_estimators` como recurso, de modo que solo los mejores candidatos
+  llegan a entrenar bosques grandes.
+- `warm_start`: para cada `max_depth` y fold se crece un único bosque con
+  `warm_start=True` a lo largo de los valores de `n_estimators`, evaluando
+  cada tamaño sin reentrenar los árboles ya construidos.
+
+En todos los casos la búsqueda se reparte en procesos dimensionados según
+las CPUs disponibles y los hilos de cada bosque, y se registra el tiempo
+y el pico de RSS de cada ajuste para poder dimensionar los nodos de
+entrenamiento.
+"""
+
+import time
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from loguru import logger
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import r2_score
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, KFold
+
+from config import training_settings
+from model.pipeline.cv import cached_grid_search
+from model.pipeline.resources import available_cpus, peak_rss_mb, reset_fit_peak_rss
+
+
+class _ProfiledForest(RandomForestRegressor):
+    """`RandomForestRegressor` que registra tiempo y pico de RSS de cada ajuste."""
+
+    def fit(self, X, y, sample_weight=None):
+        """Ajusta el bosque registrando su coste en el log."""
+        reset_fit_peak_rss()
+        start = time.perf_counter()
+        super().fit(X, y, sample_weight=sample_weight)
+        logger.info(
+            f'Fitted candidate n_estimators={self.n_estimators} '
+            f'max_depth={self.max_depth} on {len(y)} rows in '
+            f'{time.perf_counter() - start:.2f}s, peak RSS {peak_rss_mb():.0f} MiB'
+        )
+        return self
+
+
+def search_hyperparameters(
+        X_train: pd.DataFrame | np.ndarray,
+        y_train: pd.Series | np.ndarray,
+        grid_space: dict[str, list],
+    ) -> RandomForestRegressor:
+    """
+    Busca los mejores hiperparámetros y reentrena el modelo final.
+
+    Parameters
+    ----------
+    X_train : pd.DataFrame | np.ndarray
+        Variables independientes del conjunto de entrenamiento.
+    y_train : pd.Series | np.ndarray
+        Variable objetivo del conjunto de entrenamiento.
+    grid_space : dict[str, list]
+        Rejilla con los valores de `n_estimators` y `max_depth`.
+
+    Returns
+    -------
+    RandomForestRegressor
+        Modelo reentrenado sobre todo `X_train` con los mejores
+        hiperparámetros encontrados.
+    """
+    strategy = training_settings.training_search
+    n_candidates = int(np.prod([len(values) for values in grid_space.values()]))
+    n_jobs = _search_n_jobs(n_candidates * training_settings.cv_folds)
+    logger.info(
+        f'Searching {n_candidates} candidates with strategy {strategy!r} '
+        f'on {n_jobs} processes x {training_settings.forest_n_jobs} threads'
+    )
+
+    start = time.perf_counter()
+    if strategy == 'warm_start':
+        best_params = _warm_start_search(X_train, y_train, grid_space, n_jobs)
+    elif strategy == 'grid' and training_settings.cv_cache_enabled:
+        best_params = cached_grid_search(X_train, y_train, grid_space, n_jobs)
+    else:
+        best_params = _sklearn_search(X_train, y_train, grid_space, n_jobs, strategy)
+    logger.info(f'Search finished in {time.perf_counter() - start:.1f}s, best params {best_params}')
+
+    reset_fit_peak_rss()
+    start = time.perf_counter()
+    model = RandomForestRegressor(**best_params, n_jobs=-1).fit(X_train, y_train)
+    logger.info(
+        f'Refitted best model in {time.perf_counter() - start:.2f}s, '
+        f'peak RSS {peak_rss_mb():.0f} MiB'
+    )
+    return model.set_params(n_jobs=None)
+
+
+def _search_n_jobs(n_fits: int) -> int:
+    """Procesos de la búsqueda sin sobresuscribir los hilos de cada bosque."""
+    if training_settings.training_n_jobs is not None:
+        return training_settings.training_n_jobs
+    return max(1, min(n_fits, available_cpus() // training_settings.forest_n_jobs))
+
+
+def _sklearn_search(
+        X_train: pd.DataFrame | np.ndarray,
+        y_train: pd.Series | np.ndarray,
+        grid_space: dict[str, list],
+        n_jobs: int,
+        strategy: str,
+    ) -> dict:
+    """Ejecuta `GridSearchCV` o `HalvingGridSearchCV` y devuelve los mejores parámetros."""
+    estimator = _ProfiledForest(n_jobs=training_settings.forest_n_jobs)
+    if strategy == 'halving':
+        n_estimators = sorted(grid_space['n_estimators'])
+        search = HalvingGridSearchCV(
+            estimator,
+            param_grid={k: v for k, v in grid_space.items() if k != 'n_estimators'},
+            resource='n_estimators',
+            min_resources=n_estimators[0],
+            max_resources=n_estimators[-1],
+            factor=training_settings.halving_factor,
+            cv=training_settings.cv_folds,
+            scoring='r2',
+            refit=False,
+            n_jobs=n_jobs,
+        )
+    else:
+        search = GridSearchCV(
+            estimator,
+            param_grid=grid_space,
+            cv=training_settings.cv_folds,
+            scoring='r2',
+            refit=False,
+            n_jobs=n_jobs,
+        )
+
+    search.fit(X_train, y_train)
+    results = search.cv_results_
+    for params, fit_time, score in zip(
+            results['params'], results['mean_fit_time'], results['mean_test_score']):
+        logger.info(f'Candidate {params}: mean fit time {fit_time:.2f}s, mean R2 {score:.4f}')
+
+    best_params = dict(search.best_params_)
+    if strategy == 'halving':
+        best_params['n_estimators'] = int(results['n_resources'][search.best_index_])
+    return best_params
+
+
+def _warm_start_search(
+        X_train: pd.DataFrame | np.ndarray,
+        y_train: pd.Series | np.ndarray,
+        grid_space: dict[str, list],
+        n_jobs: int,
+    ) -> dict:
+    """
+    Busca hiperparámetros creciendo cada bosque con `warm_start`.
+
+    Para cada combinación de `max_depth` y fold se ajusta un único bosque
+    que se amplía hasta cada valor de `n_estimators`, puntuando el R² en
+    el fold de validación tras cada ampliación.
+
+    Returns
+    -------
+    dict
+        Mejores `max_depth` y `n_estimators` según el R² medio.
+    """
+    X = np.asarray(X_train)
+    y = np.asarray(y_train)
+    n_estimators = sorted(grid_space['n_estimators'])
+    folds = list(KFold(n_splits=training_settings.cv_folds).split(X))
+
+    tasks = list(product(grid_space['max_depth'], range(len(folds))))
+    scores = Parallel(n_jobs=n_jobs)(
+        delayed(_grow_forest)(X, y, folds[fold], max_depth, n_estimators)
+        for max_depth, fold in tasks
+    )
+
+    by_candidate: dict[tuple[int, int], list[float]] = {}
+    for (max_depth, _), fold_scores in zip(tasks, scores):
+        for n_trees, score in zip(n_estimators, fold_scores):
+            by_candidate.setdefault((max_depth, n_trees), []).append(score)
+
+    for (max_depth, n_trees), fold_scores in sorted(by_candidate.items()):
+        logger.info(
+            f'Candidate max_depth={max_depth} n_estimators={n_trees}: '
+            f'mean R2 {np.mean(fold_scores):.4f}'
+        )
+    max_depth, n_trees = max(by_candidate, key=lambda key: np.mean(by_candidate[key]))
+    return {'max_depth': max_depth, 'n_estimators': n_trees}
+
+
+def _grow_forest(
+        X: np.ndarray,
+        y: np.ndarray,
+        fold: tuple[np.ndarray, np.ndarray],
+        max_depth: int,
+        n_estimators: list[int],
+    ) -> list[float]:
+    """Crece un bosque en un fold y devuelve el R² de validación por tamaño."""
+    train_idx, test_idx = fold
+    forest = RandomForestRegressor(
+        max_depth=max_depth,
+        warm_start=True,
+        n_jobs=training_settings.forest_n_jobs,
+    )
+    scores = []
+    for n_trees in n_estimators:
+        reset_fit_peak_rss()
+        start = time.perf_counter()
+        forest.set_params(n_estimators=n_trees).fit(X[train_idx], y[train_idx])
+        scores.append(r2_score(y[test_idx], forest.predict(X[test_idx])))
+        logger.info(
+            f'Grew forest max_depth={max_depth} to {n_trees} trees in '
+            f'{time.perf_counter() - start:.2f}s, peak RSS {peak_rss_mb():.0f} MiB'
+        )
+    return scores
@@ -0,0 +1,326 @@
+"""
+Transformador de preprocesamiento compartido por entrenamiento y serving.
+
+Este módulo contiene las transformaciones vectorizadas de las columnas
+crudas de `RentApartments` (codificación de categóricas con vocabulario
+fijo y extracción de la superficie del jardín) y la clase
+`RentPreprocessor`, que las agrupa en un transformador ajustable y
+serializable a JSON. El transformador se ajusta durante `build_model`, se
+guarda junto al modelo y `ModelService` lo utiliza para puntuar registros
+crudos sin duplicar la lógica de codificación.
+
+pandas se importa solo al transformar, de modo que cargar el transformador
+en un servidor de inferencia no arrastra su coste de importación.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+from loguru import logger
+
+from model.schema import CATEGORY_VOCABULARY, FEATURE_NAMES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+PREPROCESSOR_SUFFIX = '.preprocessor.json'
+
+
+def encode_categories(
+        data: pd.DataFrame,
+        vocabulary: Mapping[str, Sequence[str]],
+    ) -> pd.DataFrame:
+    """
+    Codifica columnas categóricas como indicadores `uint8`, en el sitio.
+
+    Por cada columna se genera `<columna>_<categoría>` para todas las
+    categorías del vocabulario salvo la primera (la de referencia). Los
+    valores fuera del vocabulario o nulos se codifican como la referencia.
+
+    Args:
+        data (pd.DataFrame): DataFrame con las columnas a codificar. Las
+            columnas originales se eliminan.
+        vocabulary (Mapping[str, Sequence[str]]): Categorías de cada
+            columna, empezando por la de referencia.
+
+    Returns:
+        pd.DataFrame: El mismo DataFrame con las columnas codificadas.
+    """
+    for column, categories in vocabulary.items():
+        values = data.pop(column)
+        for category in categories[1:]:
+            data[f'{column}_{category}'] = values.eq(category).to_numpy(
+                dtype=np.uint8, na_value=0,
+            )
+    return data
+
+
+def parse_garden(series: pd.Series) -> pd.Series:
+    """
+    Extrae la superficie del jardín como entero `Int16`.
+
+    La extracción con `str.extract` se hace sobre los valores únicos y el
+    resultado se expande con sus códigos, ya que la columna tiene pocos
+    valores distintos. 'Not present', los nulos y los valores sin número
+    se convierten en cero.
+
+    Args:
+        series (pd.Series): Columna `garden` cruda.
+
+    Returns:
+        pd.Series: Superficie del jardín en m².
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series)
+    sizes = (
+        pd.Series(uniques, dtype='string')
+        .str.extract(r'(\d+)', expand=False)
+        .astype('Int16')
+        .fillna(0)
+        .to_numpy(dtype=np.int16)
+    )
+    parsed = np.append(sizes, np.int16(0))[codes]
+    return pd.Series(parsed, index=series.index, name=series.name, dtype='Int16')
+
+
+class RentPreprocessor:
+    """
+    Transforma registros crudos de RentApartments en la matriz de features.
+
+    Attributes
+    ----------
+    category_vocabulary : dict[str, tuple[str, ...]]
+        Vocabulario de cada columna categórica; la primera categoría es la
+        de referencia.
+    garden_column : str
+        Columna cuyo texto se convierte en superficie de jardín.
+    feature_names : list[str]
+        Orden de las columnas de salida.
+    input_dtypes_ : dict[str, str] | None
+        Dtypes de las columnas crudas observadas en `fit`. `None` si el
+        transformador no se ha ajustado.
+    """
+
+    def __init__(
+            self,
+            category_vocabulary: Mapping[str, Sequence[str]] | None = None,
+            garden_column: str = 'garden',
+            feature_names: Sequence[str] = FEATURE_NAMES,
+            input_dtypes: Mapping[str, str] | None = None,
+        ) -> None:
+        """
+        Inicializa el transformador y compila su plan de columnas.
+
+        Parameters
+        ----------
+        category_vocabulary : Mapping[str, Sequence[str]] | None, default=None
+            Vocabulario de las columnas categóricas. Por defecto,
+            `CATEGORY_VOCABULARY`.
+        garden_column : str, default='garden'
+            Columna de jardín a convertir.
+        feature_names : Sequence[str], default=FEATURE_NAMES
+            Orden de las columnas de salida.
+        input_dtypes : Mapping[str, str] | None, default=None
+            Dtypes crudos aprendidos en un ajuste previo.
+
+        Raises
+        ------
+        ValueError
+            Si alguna feature de salida no puede derivarse de las columnas
+            de entrada.
+        """
+        vocabulary = CATEGORY_VOCABULARY if category_vocabulary is None else category_vocabulary
+        self.category_vocabulary = {col: tuple(cats) for col, cats in vocabulary.items()}
+        self.garden_column = garden_column
+        self.feature_names = list(feature_names)
+        self.input_dtypes_ = None if input_dtypes is None else dict(input_dtypes)
+        self._plan = self._compile_plan()
+
+    @property
+    def input_columns(self) -> list[str]:
+        """Columnas crudas necesarias para generar las features."""
+        return list(dict.fromkeys(source for _, source, _ in self._plan))
+
+    def fit(self, data: pd.DataFrame) -> 'RentPreprocessor':
+        """
+        Ajusta el transformador a los datos crudos de entrenamiento.
+
+        Registra el dtype de cada columna cruda utilizada y avisa de las
+        categorías observadas que no forman parte del vocabulario (que se
+        codificarán como la categoría de referencia).
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            Datos crudos de entrenamiento.
+
+        Returns
+        -------
+        RentPreprocessor
+            El propio transformador, ajustado.
+        """
+        missing = [col for col in self.input_columns if col not in data.columns]
+        if missing:
+            raise ValueError(f'Faltan columnas crudas para ajustar el preprocesador: {missing}')
+
+        for column, categories in self.category_vocabulary.items():
+            unknown = set(data[column].dropna().unique()) - set(categories)
+            if unknown:
+                logger.warning(f'Categories {sorted(unknown)} of {column} are outside the vocabulary')
+        self.input_dtypes_ = {col: str(data[col].dtype) for col in self.input_columns}
+        return self
+
+    def transform(self, records: pd.DataFrame | Sequence[Mapping]) -> np.ndarray:
+        """
+        Convierte un lote de registros crudos en la matriz de features.
+
+        No se valida el esquema por lote: el orden y los tipos de salida
+        se fijan al construir el plan y se comprueban con
+        `check_compatible` al cargar el modelo.
+
+        Parameters
+        ----------
+        records : pd.DataFrame | Sequence[Mapping]
+            Registros con la forma de RentApartments.
+
+        Returns
+        -------
+        np.ndarray
+            Matriz float32 contigua `(n_registros, n_features)`.
+        """
+        import pandas as pd
+
+        if not isinstance(records, pd.DataFrame):
+            records = pd.DataFrame.from_records(records, columns=self.input_columns)
+
+        matrix = np.empty((len(records), len(self._plan)), dtype=np.float32)
+        for position, (kind, source, category) in enumerate(self._plan):
+            column = records[source]
+            if kind == 'category':
+                matrix[:, position] = column.eq(category).to_numpy(dtype=np.float32, na_value=0)
+            elif kind == 'garden':
+                matrix[:, position] = parse_garden(column).to_numpy(dtype=np.float32)
+            else:
+                matrix[:, position] = column.to_numpy(dtype=np.float32, na_value=np.nan)
+        return matrix
+
+    def check_compatible(self, feature_names: Sequence[str]) -> None:
+        """
+        Comprueba que la salida coincide con las features del modelo.
+
+        Parameters
+        ----------
+        feature_names : Sequence[str]
+            Orden de features con el que se entrenó el modelo.
+
+        Raises
+        ------
+        ValueError
+            Si el orden de columnas no coincide o alguna columna cruda
+            numérica fue ajustada con un dtype no numérico.
+        """
+        if list(feature_names) != self.feature_names:
+            raise ValueError(
+                f'El preprocesador genera {self.feature_names} pero el modelo '
+                f'espera {list(feature_names)}.'
+            )
+        for kind, source, _ in self._plan:
+            dtype = (self.input_dtypes_ or {}).get(source)
+            if kind == 'numeric' and dtype is not None and not _is_numeric_dtype(dtype):
+                raise ValueError(f'La columna {source} se ajustó con dtype no numérico {dtype}.')
+
+    def to_dict(self) -> dict:
+        """Devuelve el estado del transformador como diccionario JSON."""
+        return {
+            'category_vocabulary': {col: list(cats) for col, cats in self.category_vocabulary.items()},
+            'garden_column': self.garden_column,
+            'feature_names': self.feature_names,
+            'input_dtypes': self.input_dtypes_,
+        }
+
+    def save(self, path: str | Path) -> None:
+        """
+        Guarda el transformador como JSON, de forma atómica.
+
+        Parameters
+        ----------
+        path : str | Path
+            Ruta del archivo destino.
+        """
+        logger.info(f'saving the preprocessor to: {path}')
+        path = Path(path)
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        tmp_path.write_text(json.dumps(self.to_dict(), indent=2))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> 'RentPreprocessor':
+        """
+        Carga un transformador guardado con `save`.
+
+        Parameters
+        ----------
+        path : str | Path
+            Ruta del archivo JSON.
+
+        Returns
+        -------
+        RentPreprocessor
+            Transformador reconstruido.
+        """
+        state = json.loads(Path(path).read_text())
+        return cls(
+            category_vocabulary=state['category_vocabulary'],
+            garden_column=state['garden_column'],
+            feature_names=state['feature_names'],
+            input_dtypes=state['input_dtypes'],
+        )
+
+    def _compile_plan(self) -> list[tuple[str, str, str | None]]:
+        """
+        Resuelve de qué columna cruda y cómo se obtiene cada feature.
+
+        Returns
+        -------
+        list[tuple[str, str, str | None]]
+            Por feature, `(tipo, columna_cruda, categoría)` con tipo
+            `numeric`, `garden` o `category`.
+        """
+        indicators = {
+            f'{column}_{category}': (column, category)
+            for column, categories in self.category_vocabulary.items()
+            for category in categories[1:]
+        }
+        plan = []
+        for name in self.feature_names:
+            if name in indicators:
+                plan.append(('category', *indicators[name]))
+            elif name == self.garden_column:
+                plan.append(('garden', name, None))
+            elif name in self.category_vocabulary:
+                raise ValueError(f'La feature {name} es categórica y no tiene indicador.')
+            else:
+                plan.append(('numeric', name, None))
+        return plan
+
+
+def _is_numeric_dtype(dtype: str) -> bool:
+    """
+    Indica si el nombre de un dtype de pandas/numpy es numérico.
+
+    Los dtypes numéricos anulables de pandas (`Int16`, `Float32`) son los de
+    numpy en mayúsculas, así que solo se importa pandas para el resto.
+    """
+    try:
+        return np.dtype(dtype.lower()).kind in 'biuf'
+    except TypeError:
+        import pandas as pd
+
+        return pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype))
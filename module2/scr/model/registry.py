@@ -0,0 +1,331 @@
+"""
+Registro de modelos por segmento con residencia acotada en memoria.
+
+Este módulo contiene `ModelRegistry`, que enruta cada predicción al modelo
+del segmento (`neighborhood` o `zip`, según
+`model_settings.segment_column`) de su fila. Los modelos de segmento se
+guardan con la misma estructura que el modelo principal (pickle, artefacto
+y preprocesador) en:
+
+    <model_path>/<segment_models_dir>/<segmento>/<model_name>
+
+donde `<segmento>` es `segment_slug` del valor del segmento. Cada modelo
+se carga la primera vez que se usa y permanece residente bajo una
+política LRU con un presupuesto de bytes (`registry_max_bytes`). Las
+filas cuyo segmento no tiene modelo propio se evalúan con el modelo
+principal del `ModelService`.
+
+Un lote con segmentos mezclados se agrupa por modelo, de modo que cada
+modelo evalúa todas sus filas en una única llamada vectorizada.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+from config import model_settings
+from model.artifact import artifact_path_for
+from model.model_service import LoadedModel, ModelService, read_model
+
+
+def segment_slug(segment: str) -> str:
+    """
+    Convierte el valor de un segmento en un nombre de directorio.
+
+    Parameters
+    ----------
+    segment : str
+        Valor del segmento (ej. 'Cornelis Schuytbuurt' o '1071 HN').
+
+    Returns
+    -------
+    str
+        Nombre en minúsculas con solo letras, dígitos y guiones bajos.
+    """
+    return re.sub(r'[^0-9a-z]+', '_', str(segment).lower()).strip('_')
+
+
+class ModelRegistry:
+    """
+    Enruta predicciones a modelos por segmento cargados bajo demanda.
+
+    Expone la misma interfaz de predicción que `ModelService`
+    (`predict_batch`, `predict_records`, `feature_names`, `model_hash`),
+    por lo que puede sustituirlo en `MicroBatcher`.
+
+    Attributes
+    ----------
+    default : ModelService
+        Servicio con el modelo principal, usado para los segmentos sin
+        modelo propio.
+    segment_column : str
+        Campo de cada registro que identifica su segmento.
+    models_dir : Path
+        Directorio con un subdirectorio por segmento.
+    max_bytes : int
+        Presupuesto de memoria de los modelos de segmento residentes.
+    loads, hits, evictions : int
+        Contadores de cargas, aciertos y desalojos del LRU.
+    """
+
+    def __init__(
+            self,
+            default: ModelService,
+            segment_column: str | None = None,
+            models_dir: str | Path | None = None,
+            max_bytes: int | None = None,
+        ) -> None:
+        """
+        Inicializa un registro vacío; ningún modelo de segmento se carga aún.
+
+        Parameters
+        ----------
+        default : ModelService
+            Servicio con el modelo principal ya cargado.
+        segment_column : str | None, default=None
+            Por defecto, `model_settings.segment_column`.
+        models_dir : str | Path | None, default=None
+            Por defecto, `<model_path>/<segment_models_dir>`.
+        max_bytes : int | None, default=None
+            Por defecto, `model_settings.registry_max_bytes`.
+        """
+        self.default = default
+        self.segment_column = segment_column or model_settings.segment_column
+        self.models_dir = Path(
+            models_dir or Path(model_settings.model_path) / model_settings.segment_models_dir
+        )
+        self.max_bytes = max_bytes or model_settings.registry_max_bytes
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self._resident: OrderedDict[str, tuple[LoadedModel, int]] = OrderedDict()
+        self._resident_bytes = 0
+        self._missing: set[str] = set()
+        self._lock = threading.Lock()
+        self._segment_locks: dict[str, threading.Lock] = {}
+
+    @property
+    def feature_names(self) -> list[str]:
+        """Orden de features del modelo principal (común a todos los segmentos)."""
+        return self.default.feature_names
+
+    @property
+    def model_hash(self) -> str | None:
+        """Hash del modelo principal."""
+        return self.default.model_hash
+
+    def get(self, segment: str | None) -> LoadedModel | None:
+        """
+        Devuelve el modelo de un segmento, cargándolo si no está residente.
+
+        Parameters
+        ----------
+        segment : str | None
+            Valor del segmento.
+
+        Returns
+        -------
+        LoadedModel | None
+            Modelo del segmento, o `None` si el segmento no tiene modelo
+            propio y debe usarse el principal.
+        """
+        if segment is None:
+            return None
+        slug = segment_slug(segment)
+        with self._lock:
+            if slug in self._missing:
+                return None
+            resident = self._resident.get(slug)
+            if resident is not None:
+                self._resident.move_to_end(slug)
+                self.hits += 1
+                return resident[0]
+            segment_lock = self._segment_locks.setdefault(slug, threading.Lock())
+
+        # Solo un hilo carga cada segmento; el resto espera y lo reutiliza.
+        with segment_lock:
+            with self._lock:
+                if slug in self._resident:
+                    self.hits += 1
+                    return self._resident[slug][0]
+            return self._load(slug)
+
+    def refresh(self) -> None:
+        """Olvida los segmentos sin modelo para volver a buscarlos en disco."""
+        with self._lock:
+            self._missing.clear()
+
+    def predict_batch(
+            self,
+            features: Sequence[Mapping],
+            segments: Sequence[str | None] | None = None,
+            chunk_size: int | None = None,
+        ) -> np.ndarray:
+        """
+        Realiza predicciones de un lote con segmentos mezclados.
+
+        Parameters
+        ----------
+        features : Sequence[Mapping]
+            Observaciones como diccionarios `{feature: valor}`.
+        segments : Sequence[str | None] | None, default=None
+            Segmento de cada observación. Por defecto se lee el campo
+            `segment_column` de cada diccionario.
+        chunk_size : int | None, default=None
+            Número máximo de filas por llamada a cada modelo.
+
+        Returns
+        -------
+        np.ndarray
+            Array 1-D con una predicción por observación, en el orden de
+            entrada.
+        """
+        if segments is None:
+            segments = [record.get(self.segment_column) for record in features]
+        feature_names = self.feature_names
+        chunk_size = chunk_size or model_settings.predict_chunk_size
+
+        def score(loaded: LoadedModel | None, rows: np.ndarray) -> np.ndarray:
+            subset = [features[row] for row in rows]
+            if loaded is None:
+                return self.default.predict_batch(subset, chunk_size)
+            matrix = ModelService._to_feature_matrix(subset, feature_names)
+            return self.default._predict_matrix(loaded.model, matrix, chunk_size)
+
+        return self._predict_grouped(segments, score)
+
+    def predict_records(
+            self,
+            records: Sequence[Mapping],
+            chunk_size: int | None = None,
+        ) -> np.ndarray:
+        """
+        Realiza predicciones sobre registros crudos de RentApartments.
+
+        Cada registro debe incluir el campo `segment_column`; cada grupo se
+        transforma con el preprocesador de su propio modelo.
+
+        Parameters
+        ----------
+        records : Sequence[Mapping] | pd.DataFrame
+            Registros crudos con la columna de segmento.
+        chunk_size : int | None, default=None
+            Número máximo de filas por llamada a cada modelo.
+
+        Returns
+        -------
+        np.ndarray
+            Array 1-D con una predicción por registro.
+        """
+        chunk_size = chunk_size or model_settings.predict_chunk_size
+        is_frame = hasattr(records, 'iloc')
+        if is_frame:
+            segments = records[self.segment_column].tolist()
+        else:
+            segments = [record.get(self.segment_column) for record in records]
+
+        def score(loaded: LoadedModel | None, rows: np.ndarray) -> np.ndarray:
+            subset = records.iloc[rows] if is_frame else [records[row] for row in rows]
+            if loaded is None:
+                return self.default.predict_records(subset, chunk_size)
+            matrix = loaded.preprocessor.transform(subset)
+            return self.default._predict_matrix(loaded.model, matrix, chunk_size)
+
+        return self._predict_grouped(segments, score)
+
+    def stats(self) -> dict:
+        """
+        Devuelve el estado del LRU de modelos de segmento.
+
+        Returns
+        -------
+        dict
+            Modelos y bytes residentes, presupuesto y contadores.
+        """
+        with self._lock:
+            return {
+                'resident_models': len(self._resident),
+                'resident_bytes': self._resident_bytes,
+                'max_bytes': self.max_bytes,
+                'segments_without_model': len(self._missing),
+                'loads': self.loads,
+                'hits': self.hits,
+                'evictions': self.evictions,
+            }
+
+    def _predict_grouped(self, segments: Sequence[str | None], score) -> np.ndarray:
+        """
+        Agrupa las filas por modelo y evalúa cada grupo con una sola llamada.
+
+        Parameters
+        ----------
+        segments : Sequence[str | None]
+            Segmento de cada fila.
+        score : Callable[[LoadedModel | None, np.ndarray], np.ndarray]
+            Evalúa las filas indicadas con un modelo (`None` = principal).
+
+        Returns
+        -------
+        np.ndarray
+            Predicción por fila, en el orden de entrada.
+        """
+        codes: dict[str | None, list[int]] = {}
+        for row, segment in enumerate(segments):
+            codes.setdefault(segment, []).append(row)
+
+        groups: dict[Path | None, tuple[LoadedModel | None, list[int]]] = {}
+        for segment, rows in codes.items():
+            loaded = self.get(segment)
+            key = None if loaded is None else loaded.path
+            groups.setdefault(key, (loaded, []))[1].extend(rows)
+
+        predictions = np.empty(len(segments), dtype=np.float64)
+        for loaded, rows in groups.values():
+            rows = np.asarray(rows)
+            predictions[rows] = score(loaded, rows)
+        return predictions
+
+    def _load(self, slug: str) -> LoadedModel | None:
+        """Carga de disco el modelo de un segmento y lo hace residente."""
+        model_path = self.models_dir / slug / model_settings.model_name
+        use_artifact = model_settings.inference_engine == 'flat'
+        if not (artifact_path_for(model_path) if use_artifact else model_path).exists():
+            with self._lock:
+                self._missing.add(slug)
+            return None
+
+        loaded = read_model(model_path, use_artifact)
+        size = _footprint(model_path, use_artifact)
+        with self._lock:
+            self.loads += 1
+            self._resident[slug] = (loaded, size)
+            self._resident_bytes += size
+            self._evict(keep=slug)
+        logger.info(f'Loaded segment model {slug} ({size / 2**20:.1f} MiB)')
+        return loaded
+
+    def _evict(self, keep: str) -> None:
+        """Desaloja los modelos menos usados hasta cumplir el presupuesto."""
+        while self._resident_bytes > self.max_bytes and len(self._resident) > 1:
+            slug, (_, size) = next(iter(self._resident.items()))
+            if slug == keep:
+                self._resident.move_to_end(slug)
+                continue
+            del self._resident[slug]
+            self._resident_bytes -= size
+            self.evictions += 1
+            logger.info(f'Evicted segment model {slug}')
+        if self._resident_bytes > self.max_bytes:
+            logger.warning(f'Segment model {keep} alone exceeds the registry budget of {self.max_bytes} bytes')
+
+
+def _footprint(model_path: Path, use_artifact: bool) -> int:
+    """Tamaño en disco del modelo, como aproximación de su memoria residente."""
+    if use_artifact:
+        return sum(path.stat().st_size for path in artifact_path_for(model_path).iterdir())
+    return model_path.stat().st_size
@@ -0,0 +1,178 @@
+"""
+Recarga en caliente del modelo servido.
+
+Este módulo contiene `ModelWatcher`, que vigila en un hilo en segundo plano
+el archivo del modelo configurado (el pickle o, con el motor `flat`, el
+manifiesto del artefacto). Cuando cambia su inodo, su fecha de
+modificación o su tamaño, el modelo se vuelve a leer y a calentar con
+`ModelService.reload_model` y se publica con una única asignación, sin
+reiniciar el proceso ni descartar peticiones: los lotes en curso terminan
+con el modelo anterior.
+
+Como `build_model` y `save_artifact` escriben en un temporal y renombran,
+el vigilante nunca observa un modelo a medio escribir. Si el contenido no
+cambia (mismo hash) no se sustituye nada.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from config import model_settings
+from model.artifact import MANIFEST_NAME, artifact_path_for
+from model.model_service import ModelService
+
+
+class ModelWatcher:
+    """
+    Vigila el archivo del modelo y recarga las versiones nuevas.
+
+    Attributes
+    ----------
+    service : ModelService
+        Servicio cuyo modelo se sustituye.
+    model_name : str
+        Nombre del modelo vigilado.
+    interval_seconds : float
+        Intervalo entre comprobaciones.
+    warmup_rows : int
+        Filas de prueba evaluadas antes de publicar un modelo nuevo.
+    reloads : int
+        Modelos nuevos publicados.
+    reload_failures : int
+        Recargas fallidas; el modelo anterior sigue en servicio.
+    last_reload_ms : float | None
+        Duración de la última recarga publicada (lectura, calentamiento y
+        sustitución).
+    """
+
+    def __init__(
+            self,
+            service: ModelService,
+            model_name: str,
+            interval_seconds: float = 5.0,
+            warmup_rows: int = 8,
+        ) -> None:
+        """
+        Inicializa el vigilante tomando como referencia el archivo actual.
+
+        Parameters
+        ----------
+        service : ModelService
+            Servicio con el modelo ya cargado.
+        model_name : str
+            Nombre del modelo a vigilar.
+        interval_seconds : float, default=5.0
+            Intervalo entre comprobaciones.
+        warmup_rows : int, default=8
+            Filas de prueba evaluadas antes de publicar un modelo nuevo.
+        """
+        self.service = service
+        self.model_name = model_name
+        self.interval_seconds = interval_seconds
+        self.warmup_rows = warmup_rows
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_reload_ms: float | None = None
+        self.last_reload_at: float | None = None
+        self.last_error: str | None = None
+        self._signature = self._current_signature()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def watched_path(self) -> Path:
+        """Archivo cuya sustitución indica un modelo nuevo."""
+        model_path = Path(model_settings.model_path) / self.model_name
+        if model_settings.model_variant == 'fast':
+            return artifact_path_for(model_path, 'fast') / MANIFEST_NAME
+        if model_settings.inference_engine == 'flat':
+            return artifact_path_for(model_path) / MANIFEST_NAME
+        return model_path
+
+    def start(self) -> None:
+        """Arranca el hilo de vigilancia."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+            self._thread.start()
+            logger.info(f'Watching {self.watched_path} every {self.interval_seconds}s')
+
+    def stop(self) -> None:
+        """Detiene el hilo de vigilancia."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> bool:
+        """
+        Comprueba el archivo del modelo y lo recarga si ha cambiado.
+
+        Returns
+        -------
+        bool
+            `True` si se publicó un modelo nuevo.
+        """
+        signature = self._current_signature()
+        if signature is None or signature == self._signature:
+            return False
+
+        start = time.perf_counter()
+        try:
+            swapped = self.service.reload_model(self.model_name, warmup_rows=self.warmup_rows)
+        except Exception as error:
+            # El archivo se da por visto para no reintentar en bucle una
+            # versión defectuosa; la siguiente versión se volverá a probar.
+            self._signature = signature
+            self.reload_failures += 1
+            self.last_error = repr(error)
+            logger.exception(f'Could not reload {self.watched_path}; keeping the current model')
+            return False
+
+        self._signature = signature
+        if not swapped:
+            logger.info(f'{self.watched_path} changed but its content is the same; not reloading')
+            return False
+        self.reloads += 1
+        self.last_reload_ms = (time.perf_counter() - start) * 1000
+        self.last_reload_at = time.time()
+        self.last_error = None
+        logger.info(
+            f'Reloaded model {self.service.model_hash} in {self.last_reload_ms:.1f} ms'
+        )
+        return True
+
+    def metrics(self) -> dict:
+        """
+        Devuelve la versión activa del modelo y las métricas de recarga.
+
+        Returns
+        -------
+        dict
+            Hash del modelo activo, recargas publicadas y fallidas, y
+            duración y momento de la última recarga.
+        """
+        return {
+            'model_hash': self.service.model_hash,
+            'reloads': self.reloads,
+            'reload_failures': self.reload_failures,
+            'last_reload_ms': self.last_reload_ms,
+            'last_reload_at': self.last_reload_at,
+            'last_error': self.last_error,
+        }
+
+    def _current_signature(self) -> tuple[int, int, int] | None:
+        """Inodo, fecha de modificación y tamaño del archivo vigilado."""
+        try:
+            stat = self.watched_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _run(self) -> None:
+        """Bucle del hilo: comprueba el archivo en cada intervalo."""
+        while not self._stop.wait(self.interval_seconds):
+            self.poll()
@@ -0,0 +1,32 @@
+"""
+Esquema de features utilizado por el modelo de alquileres.
+
+Este módulo centraliza el orden de las variables independientes con el que
+se entrena el modelo y el vocabulario de las columnas categóricas, de forma
+que el pipeline de entrenamiento y el servicio de inferencia compartan una
+única definición.
+"""
+
+FEATURE_NAMES: tuple[str, ...] = (
+    'area',
+    'constraction_year',
+    'bedrooms',
+    'garden',
+    'balcony_yes',
+    'parking_yes',
+    'furnished_yes',
+    'garage_yes',
+    'storage_yes',
+)
+
+TARGET_NAME: str = 'rent'
+
+# Vocabulario declarado de cada columna categórica. La primera categoría
+# es la de referencia y no genera columna indicadora.
+CATEGORY_VOCABULARY: dict[str, tuple[str, ...]] = {
+    'balcony': ('no', 'yes'),
+    'parking': ('no', 'yes'),
+    'furnished': ('no', 'yes'),
+    'garage': ('no', 'yes'),
+    'storage': ('no', 'yes'),
+}
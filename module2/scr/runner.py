@@ -5,7 +5,8 @@ Punto de entrada para la carga y ejecución de predicciones del modelo entrenado
 Este módulo actúa como script principal para:
 - Inicializar el servicio de modelo (`ModelService`).
 - Cargar un modelo previamente entrenado desde la ruta configurada.
-- Ejecutar una predicción de ejemplo utilizando un conjunto fijo de features.
+- Ejecutar una predicción de ejemplo a partir de un registro crudo con la
+  forma de `RentApartments`, preprocesado por el propio servicio.
 - Registrar el resultado de la predicción mediante logging.
 
 Está pensado para validaciones rápidas, pruebas locales o ejecuciones manuales
@@ -17,6 +18,7 @@ Uso típico:
 
 from loguru import logger
 
+from model.instrumentation import profiling
 from model.model_service import ModelService
 from config import model_settings
 
@@ -26,28 +28,29 @@ def main()-> None:
     Carga un modelo entrenado y ejecuta una predicción de ejemplo.
 
     La función inicializa el servicio de modelo, carga el modelo previamente
-    entrenado desde la ruta configurada y realiza una predicción utilizando
-    un conjunto fijo de features. El resultado de la predicción se registra
+    entrenado desde la ruta configurada y realiza una predicción a partir de
+    un registro crudo de ejemplo. El resultado de la predicción se registra
     mediante el sistema de logging.
     """
     logger.info('running the application...')
-    ml_svc = ModelService()
-    ml_svc.load_model(model_name=model_settings.model_name)
-
-    feature_values = {
-        'area': 50,
-        'constraction_year': 2000,
-        'bedrooms': 2,
-        'garden': 10,
-        'balcony_yes': 1,
-        'parking_yes': 0,
-        'furnished_yes': 1,
-        'garage_yes': 0,
-        'storage_yes': 1,
-    }
-
-    predict = ml_svc.predict(list(feature_values.values()))
-    logger.warning(f'Prediction: {predict}')
+    with profiling('runner'):
+        ml_svc = ModelService()
+        ml_svc.load_model(model_name=model_settings.model_name)
+
+        apartment = {
+            'area': 50,
+            'constraction_year': 2000,
+            'bedrooms': 2,
+            'garden': 'Present (10 m²)',
+            'balcony': 'yes',
+            'parking': 'no',
+            'furnished': 'yes',
+            'garage': 'no',
+            'storage': 'yes',
+        }
+
+        predict = ml_svc.predict_records([apartment])
+        logger.warning(f'Prediction: {predict}')
 
 
 if __name__ == "__main__":
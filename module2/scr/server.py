@@ -0,0 +1,351 @@
+
+"""
+Punto de entrada del servidor de inferencia con micro-batching.
+
+Este módulo levanta un servidor asyncio que recibe peticiones concurrentes
+de una sola fila y las agrupa mediante `MicroBatcher` para evaluar el
+modelo por lotes. Admite dos transportes:
+- `http`: servidor HTTP/1.1 mínimo con los endpoints `POST /predict` y
+  `GET /metrics`.
+- `stdio`: una petición JSON por línea en stdin y una respuesta JSON por
+  línea en stdout, útil para integraciones por pipes.
+
+Con `model_settings.model_reload_enabled` el servidor vigila el archivo del
+modelo y recarga en caliente las versiones nuevas (ver `model.reload`). Con
+`model_settings.segment_routing_enabled` cada fila se evalúa con el modelo
+del segmento indicado en su campo `segment_column` (ver `model.registry`).
+`GET /metrics/prometheus` exporta los tiempos de las etapas instrumentadas
+y el estado del micro-batcher en formato de texto de Prometheus.
+
+Uso típico:
+    >>> python server.py --mode http
+    >>> echo '{"id": 1, "features": {...}}' | python server.py --mode stdio
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+
+from loguru import logger
+
+from config import model_settings, serving_settings
+from model.batching import MicroBatcher
+from model.instrumentation import metrics as stage_metrics, profiling
+from model.model_service import ModelService
+from model.registry import ModelRegistry
+from model.reload import ModelWatcher
+
+_STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    413: 'Content Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class _BadRequest(Exception):
+    """Petición HTTP mal delimitada; se responde con `status` y se cierra la conexión."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _validate(features: object, feature_names: list[str]) -> dict:
+    """
+    Valida que una petición contenga todas las features del modelo con valores numéricos.
+
+    Las features se convierten aquí a `float`, de modo que una petición
+    inválida se rechaza antes de entrar en un micro-lote.
+
+    Parameters
+    ----------
+    features : object
+        Cuerpo de la petición ya decodificado.
+    feature_names : list[str]
+        Features esperadas por el modelo.
+
+    Returns
+    -------
+    dict
+        Las features de la petición, con las del modelo convertidas a
+        `float`; el resto de claves (ej. la columna de segmento) se
+        conservan.
+
+    Raises
+    ------
+    ValueError
+        Si la petición no es un objeto JSON, le faltan features o alguna
+        no es un número finito.
+    """
+    if not isinstance(features, dict):
+        raise ValueError('Las features deben enviarse como un objeto JSON.')
+    missing = [name for name in feature_names if name not in features]
+    if missing:
+        raise ValueError(f'Faltan features en la petición: {missing}')
+    values = {}
+    invalid = []
+    for name in feature_names:
+        try:
+            values[name] = float(features[name])
+        except (TypeError, ValueError):
+            invalid.append(name)
+            continue
+        if not math.isfinite(values[name]):
+            invalid.append(name)
+    if invalid:
+        raise ValueError(f'Features no numéricas o no finitas en la petición: {invalid}')
+    return {**features, **values}
+
+
+async def _respond(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: dict | str,
+        close: bool = False,
+    ) -> None:
+    """Escribe una respuesta HTTP con cuerpo JSON, o de texto si `payload` es `str`."""
+    if isinstance(payload, str):
+        body, content_type = payload.encode(), 'text/plain; version=0.0.4'
+    else:
+        body, content_type = json.dumps(payload).encode(), 'application/json'
+    head = (
+        f'HTTP/1.1 {status} {_STATUS_TEXT[status]}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        + ('Connection: close\r\n' if close else '')
+        + '\r\n'
+    ).encode()
+    writer.write(head + body)
+    await writer.drain()
+
+
+def _metrics(batcher: MicroBatcher, watcher: ModelWatcher | None) -> dict:
+    """Combina las métricas del micro-batcher con las del modelo activo."""
+    model = watcher.metrics() if watcher is not None else {'model_hash': batcher.service.model_hash}
+    metrics = {**batcher.metrics(), 'model': model, 'stages': stage_metrics.summary()}
+    if isinstance(batcher.service, ModelRegistry):
+        metrics['segments'] = batcher.service.stats()
+    return metrics
+
+
+def _prometheus_metrics(batcher: MicroBatcher) -> str:
+    """Exporta las etapas instrumentadas y el estado del micro-batcher para Prometheus."""
+    batch = batcher.metrics()
+    stage_metrics.set_gauge('serving_queue_depth', batch['queue_depth'], 'Requests waiting in the queue.')
+    stage_metrics.set_counter('serving_requests', batch['requests'], 'Requests served since startup.')
+    stage_metrics.set_counter('serving_batches', batch['batches'], 'Micro-batches evaluated since startup.')
+    for name, value in batch['latency_ms'].items():
+        stage_metrics.set_gauge(
+            f'serving_latency_{name}_ms', value, f'Request latency {name} over the recent window.',
+        )
+    return stage_metrics.render()
+
+
+async def _read_request(
+        reader: asyncio.StreamReader,
+    ) -> tuple[str, str, dict[str, str], bytes] | None:
+    """
+    Lee una petición HTTP completa de la conexión.
+
+    Parameters
+    ----------
+    reader : asyncio.StreamReader
+        Flujo de entrada de la conexión.
+
+    Returns
+    -------
+    tuple[str, str, dict[str, str], bytes] | None
+        Método, ruta, cabeceras (en minúsculas) y cuerpo, o `None` si el
+        cliente cerró la conexión.
+
+    Raises
+    ------
+    _BadRequest
+        Si la línea de petición, una cabecera o `Content-Length` están mal
+        formadas (400), o si el cuerpo supera
+        `serving_settings.max_body_bytes` (413).
+    """
+    try:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, path, _ = request_line.decode().split(' ', 2)
+
+        headers = {}
+        while (line := await reader.readline()) not in (b'\r\n', b'\n', b''):
+            name, _, value = line.decode().partition(':')
+            headers[name.strip().lower()] = value.strip()
+    except ValueError as error:
+        # Incluye las líneas que superan el límite del `StreamReader`.
+        raise _BadRequest(400, f'malformed request: {error}') from None
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise _BadRequest(400, f'invalid Content-Length: {headers["content-length"]!r}')
+    if length > serving_settings.max_body_bytes:
+        raise _BadRequest(413, f'body larger than {serving_settings.max_body_bytes} bytes')
+    return method, path, headers, await reader.readexactly(length)
+
+
+async def _handle_http(
+        batcher: MicroBatcher,
+        watcher: ModelWatcher | None,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+    """Atiende una conexión HTTP, con soporte de keep-alive."""
+    try:
+        while True:
+            try:
+                request = await _read_request(reader)
+            except _BadRequest as error:
+                await _respond(writer, error.status, {'error': str(error)}, close=True)
+                break
+            if request is None:
+                break
+            method, path, headers, body = request
+
+            if method == 'GET' and path == '/metrics':
+                await _respond(writer, 200, _metrics(batcher, watcher))
+            elif method == 'GET' and path == '/metrics/prometheus':
+                await _respond(writer, 200, _prometheus_metrics(batcher))
+            elif method == 'POST' and path == '/predict':
+                try:
+                    features = _validate(json.loads(body), batcher.service.feature_names)
+                except ValueError as error:
+                    await _respond(writer, 400, {'error': str(error)})
+                else:
+                    try:
+                        prediction = await batcher.submit(features)
+                    except Exception as error:
+                        await _respond(writer, 500, {'error': str(error)})
+                    else:
+                        await _respond(writer, 200, {'prediction': prediction})
+            else:
+                await _respond(writer, 404, {'error': f'{method} {path}'})
+
+            if headers.get('connection', '').lower() == 'close':
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    except Exception:
+        logger.exception('Error atendiendo la petición HTTP')
+        await _respond(writer, 500, {'error': 'internal error'})
+    finally:
+        writer.close()
+
+
+async def _serve_http(batcher: MicroBatcher, watcher: ModelWatcher | None) -> None:
+    """Levanta el servidor HTTP y atiende conexiones indefinidamente."""
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_http(batcher, watcher, reader, writer),
+        host=serving_settings.serving_host,
+        port=serving_settings.serving_port,
+    )
+    logger.info(
+        f'Servidor HTTP escuchando en '
+        f'{serving_settings.serving_host}:{serving_settings.serving_port}'
+    )
+    async with server:
+        await server.serve_forever()
+
+
+async def _handle_line(
+        batcher: MicroBatcher,
+        line: str,
+        output: asyncio.Lock,
+    ) -> None:
+    """Procesa una petición del transporte stdio y escribe su respuesta."""
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get('id')
+        features = _validate(request.get('features'), batcher.service.feature_names)
+        response = {'id': request_id, 'prediction': await batcher.submit(features)}
+    except Exception as error:
+        response = {'id': request_id, 'error': str(error)}
+    async with output:
+        sys.stdout.write(json.dumps(response) + '\n')
+        sys.stdout.flush()
+
+
+async def _serve_stdio(batcher: MicroBatcher, watcher: ModelWatcher | None) -> None:
+    """Lee peticiones JSON por línea desde stdin hasta EOF."""
+    loop = asyncio.get_running_loop()
+    output = asyncio.Lock()
+    pending = set()
+    while line := await loop.run_in_executor(None, sys.stdin.readline):
+        if not line.strip():
+            continue
+        task = asyncio.create_task(_handle_line(batcher, line, output))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.wait(pending)
+    logger.info(f'Métricas finales: {_metrics(batcher, watcher)}')
+
+
+async def serve(mode: str) -> None:
+    """
+    Carga el modelo y atiende peticiones con micro-batching.
+
+    Parameters
+    ----------
+    mode : str
+        Transporte a utilizar: `http` o `stdio`.
+    """
+    ml_svc = ModelService()
+    ml_svc.load_model(model_name=model_settings.model_name)
+    # Con enrutado por segmento, el registro evalúa cada fila con el modelo
+    # de su segmento y recurre a `ml_svc` para el resto.
+    predictor = ModelRegistry(ml_svc) if model_settings.segment_routing_enabled else ml_svc
+
+    batcher = MicroBatcher(
+        predictor,
+        max_batch_size=serving_settings.max_batch_size,
+        max_wait_ms=serving_settings.max_wait_ms,
+        max_queue_size=serving_settings.max_queue_size,
+        latency_window=serving_settings.latency_window,
+    )
+    watcher = None
+    if model_settings.model_reload_enabled:
+        watcher = ModelWatcher(
+            ml_svc,
+            model_settings.model_name,
+            interval_seconds=model_settings.model_reload_interval_seconds,
+            warmup_rows=model_settings.model_reload_warmup_rows,
+        )
+        watcher.start()
+    await batcher.start()
+    try:
+        with profiling(f'server-{mode}'):
+            if mode == 'stdio':
+                await _serve_stdio(batcher, watcher)
+            else:
+                await _serve_http(batcher, watcher)
+    finally:
+        await batcher.stop()
+        if watcher is not None:
+            watcher.stop()
+
+
+@logger.catch
+def main() -> None:
+    """Interpreta los argumentos de línea de comandos y arranca el servidor."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--mode', choices=('http', 'stdio'), default='http')
+    args = parser.parse_args()
+
+    logger.info(f'running the inference server in {args.mode} mode...')
+    asyncio.run(serve(args.mode))
+
+
+if __name__ == "__main__":
+    main()